@@ -0,0 +1,104 @@
+"""
+Offline benchmarks of the commands against the fake Google Sheets server.
+
+    python -m benchmarks --latency 0.1 --quota 100 --tabs 30 --lines 20
+
+Every scenario runs on freshly generated spreadsheets, so the results are
+comparable between the runs with the same options.
+"""
+
+import time
+from unittest import mock
+
+import click
+from click.testing import CliRunner
+
+from gsheets import cli
+from tests.fake_google.generators import populate
+from tests.fake_google.server import FakeGoogleServer, make_client
+from utils.rate_limit import RateLimiter
+
+SCENARIOS = {
+    "validate": lambda books: ["validate", *books],
+    "mark_transactions": lambda books: [
+        "mark-transactions",
+        *books,
+        "Transactions 2019",
+    ],
+    "receipts_to_billing": lambda books: [
+        "receipts-to-billing",
+        books[0],
+        "Billing 2019",
+    ],
+    "move_from_workbook": lambda books: ["move-from-workbook", "Workbook"],
+}
+
+
+def run_scenario(name, latency, quota, months, tabs, lines):
+    """
+    Run the command on the fake server.
+
+    :return dict: {"wall": 1.23, "requests": Counter({"get": 3, ...}), "rejected": 0}
+    """
+    with FakeGoogleServer(latency=latency, quota=quota) as server:
+        receipt_books = populate(server.google, months=months, tabs=tabs, lines=lines)
+        rate_limiter = (
+            RateLimiter(read_quota=quota, write_quota=quota) if quota else None
+        )
+        client = make_client(server, rate_limiter=rate_limiter)
+
+        with mock.patch("utils.api._client", client):
+            started = time.monotonic()
+            result = CliRunner().invoke(
+                cli, SCENARIOS[name](receipt_books), input="y\n" * (tabs + 2)
+            )
+            wall = time.monotonic() - started
+
+        if result.exception:
+            raise click.ClickException(f"{name} failed: {result.exception!r}")
+        return {
+            "wall": wall,
+            "requests": server.google.requests,
+            "rejected": server.google.rejected,
+        }
+
+
+@click.command()
+@click.option("--latency", default=0.05, help="Latency of each API call in seconds.")
+@click.option("--quota", default=0, help="Requests per 100 seconds, 0 - unlimited.")
+@click.option("--months", default=2, help="Number of receipt books.")
+@click.option("--tabs", default=10, help="Number of receipts in each receipt book.")
+@click.option("--lines", default=10, help="Number of goods in each receipt.")
+@click.option(
+    "--scenario",
+    "scenarios",
+    multiple=True,
+    type=click.Choice(list(SCENARIOS)),
+    help="Scenario to run, all of them by default.",
+)
+def benchmark(latency, quota, months, tabs, lines, scenarios):
+    """Time the commands end to end and count the API requests they make."""
+    click.echo(
+        f"{'scenario':<20} {'wall s':>8} {'requests':>8} {'429':>5}  by endpoint"
+    )
+    for name in scenarios or SCENARIOS:
+        result = run_scenario(
+            name,
+            latency=latency,
+            quota=quota,
+            months=range(1, months + 1),
+            tabs=tabs,
+            lines=lines,
+        )
+        requests = result["requests"]
+        by_endpoint = ", ".join(
+            f"{kind}: {count}" for kind, count in sorted(requests.items())
+        )
+        click.echo(
+            f"{name:<20} {result['wall']:>8.2f} {sum(requests.values()):>8} "
+            f"{result['rejected']:>5}  {by_endpoint}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,10 +1,11 @@
 import click
-from dateutil.parser import parse
 
 from models.billing_book import BillingBook
 from models.receipt_book import ReceiptBook
 from models.transaction import TransactionHistory
+from utils.batch import WriteSession
 from utils.constants import RESULT_ERROR, RESULT_OK, RESULT_WARNING, CellType
+from utils.dates import parse_title_date
 
 
 @click.command()
@@ -24,8 +25,8 @@ def receipts_to_billing(source_filename, billing_filename, note_threshold, one_b
     """
     receipt_book_name, *receipt_titles = source_filename.split(":")
 
-    receipt_book = ReceiptBook(receipt_book_name)
-    month = parse(receipt_book_name).month
+    receipt_book = ReceiptBook(receipt_book_name, prefetch=not receipt_titles)
+    month = parse_title_date(receipt_book_name).month
 
     billing_book = BillingBook(billing_filename)
     month_billing = billing_book.get_month_billing(month=month)
@@ -40,16 +41,22 @@ def receipts_to_billing(source_filename, billing_filename, note_threshold, one_b
     else:
         receipts_to_import = receipt_book.receipts
 
-    for receipt in receipts_to_import:
-        click.echo(f"Importing {receipt.worksheet.title}...")
+    with WriteSession() as session:
+        for receipt in receipts_to_import:
+            click.echo(f"Importing {receipt.worksheet.title}...")
 
-        if not one_by_one or one_by_one and click.confirm(f"Continue?", default=True):
-            result_msg = RESULT_OK
-            try:
-                month_billing.import_receipt(receipt, note_threshold=note_threshold)
-            except Exception as e:
-                result_msg = RESULT_ERROR.format(e)
-            click.echo(result_msg)
+            if not one_by_one or one_by_one and click.confirm(f"Continue?", default=True):
+                result_msg = RESULT_OK
+                try:
+                    month_billing.import_receipt(
+                        receipt, note_threshold=note_threshold, session=session
+                    )
+                except Exception as e:
+                    result_msg = RESULT_ERROR.format(e)
+                click.echo(result_msg)
+
+        click.echo("Saving the billing spreadsheet...")
+    click.echo(RESULT_OK)
 
 
 @click.command()
@@ -70,6 +77,7 @@ def transactions_to_billing(
     click.echo(f"Reading the transactions history from '{transactions_filename}'")
     history = TransactionHistory(filename=transactions_filename)
     if history.transactions:
+        history.classify()
         click.echo(RESULT_OK)
 
     click.echo(f"Reading the destination billing file '{billing_filename}'")
@@ -77,6 +85,7 @@ def transactions_to_billing(
     if billing_book.month_billings:
         click.echo(RESULT_OK)
 
+    session = WriteSession()
     try:
         for transaction in history.transactions:
             if transaction.has_receipt or transaction.created.year != billing_book.year:
@@ -132,6 +141,7 @@ def transactions_to_billing(
                         transaction,
                         note_threshold=note_threshold,
                         preferred_type=preferred_type,
+                        session=session,
                     )
                 except ValueError as e:
                     result_msg = RESULT_WARNING.format(e)
@@ -142,6 +152,9 @@ def transactions_to_billing(
                 click.echo(result_msg)
                 transaction.has_receipt = True
     finally:
+        click.echo("Saving the billing spreadsheet...")
+        session.flush()
+        click.echo(RESULT_OK)
         click.echo("Updating the history spreadsheet...")
         history.post_to_spreadsheet()
         click.echo(RESULT_OK)
@@ -1,13 +1,12 @@
 import click
-import gspread
 
-from utils.api import get_credentials
+from utils.api import get_client
 
 
 @click.command()
-def ls():
+@click.option("--refresh", is_flag=True, help="Re-read the list from Drive.")
+def ls(refresh):
     """List all available spreadsheets."""
-    credentials = get_credentials()
-    gc = gspread.authorize(credentials)
-    for sheet_data in gc.list_spreadsheet_files():
+    client = get_client()
+    for sheet_data in client.get_spreadsheet_files(refresh=refresh):
         click.echo(sheet_data["name"])
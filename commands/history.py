@@ -27,7 +27,7 @@ def mark_transactions(source_filenames, transactions_filename, overwrite):
 
     for source_filename in source_filenames:
         click.echo(f"Processing '{source_filename}'")
-        receipt_book = ReceiptBook(filename=source_filename)
+        receipt_book = ReceiptBook(filename=source_filename, prefetch=True)
 
         try:
             for receipt in receipt_book.receipts:
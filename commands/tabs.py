@@ -1,9 +1,23 @@
+import json
+
 import click
 from gspread import SpreadsheetNotFound
 
+from config import DUPLICATES_DAYS, DUPLICATES_TOLERANCE, VALIDATE_JOBS
 from models.receipt_book import ReceiptBook
 from models.workbook import Workbook
-from utils.constants import RESULT_WARNING, RESULT_ERROR, RESULT_OK
+from utils.constants import RESULT_ERROR, RESULT_OK
+from utils.money import Money
+
+REPORT_JSON = "json"
+REPORT_NDJSON = "ndjson"
+
+
+def parse_amount(ctx, param, value):
+    try:
+        return Money.parse(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
 
 
 @click.command()
@@ -31,14 +45,15 @@ def normalize(filename, one_by_one, reorder, validate, find_duplicates):
     4. Identification of potential duplicates.
     """
     click.echo(f"Analyzing tabs in {filename}...")
-    receipt_book = ReceiptBook(filename)
+    receipt_book = ReceiptBook(filename, prefetch=validate or find_duplicates)
 
     receipt_book.rename_tabs(one_by_one=one_by_one, dry=True)
 
     if click.confirm("Rename all tabs (tabs without proper date will be skipped)?"):
-        receipt_book.rename_tabs(one_by_one=one_by_one)
-
-    if reorder:
+        if reorder:
+            click.echo("Renaming and sorting all tabs alphabetically...")
+        receipt_book.rename_tabs(one_by_one=one_by_one, reorder=reorder)
+    elif reorder:
         click.echo("Sorting all tabs alphabetically...")
         receipt_book.reorder()
 
@@ -62,69 +77,125 @@ def reorder(filename):
 
 @click.command()
 @click.argument("filenames", nargs=-1)
-def validate(filenames):
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=VALIDATE_JOBS,
+    show_default=True,
+    help="Number of files validated in parallel.",
+)
+@click.option(
+    "--report",
+    type=click.File("w"),
+    help="Write the result of each receipt to the file.",
+)
+@click.option(
+    "--report-format",
+    type=click.Choice([REPORT_JSON, REPORT_NDJSON]),
+    help="Format of the report, by default chosen by the file extension.",
+)
+def validate(filenames, jobs, report, report_format):
     """
     Validate prices in all tabs of specified files.
 
-    If numbers don't add up there - shows the warning.
-    Shows the summary with issues across all files at the end.
+    Files are validated in parallel, the issues are shown as soon as each file
+    is done. Shows the summary with issues across all files at the end.
+
+    With --report, the results of all receipts (including the amounts which
+    don't add up) are saved as a JSON array or one JSON object per line.
     """
-    suspicious_receipts = []
-    total = 0
-    for filename in filenames:
-        try:
-            receipt_book = ReceiptBook(filename)
-        except SpreadsheetNotFound:
+    if report and not report_format:
+        report_format = REPORT_JSON if report.name.endswith(".json") else REPORT_NDJSON
+
+    results = []
+    for filename, book_results in ReceiptBook.validate_many(filenames, jobs=jobs):
+        if isinstance(book_results, SpreadsheetNotFound):
             click.echo(
                 RESULT_ERROR.format(
                     f"'{filename}' not found. Check the name or permissions."
                 )
             )
             continue
+        elif isinstance(book_results, Exception):
+            raise book_results
 
-        click.echo(f"Validating prices in '{filename}'...")
-        suspicious_receipts.extend(
-            receipt
-            for receipt in receipt_book.receipts
-            if not receipt.prices_are_valid(raise_exception=False) or receipt.discount
+        suspicious = [result for result in book_results if result.suspicious]
+        click.echo(
+            f"Validated prices in '{filename}': {len(book_results)} receipts, "
+            f"{len(suspicious)} suspicious."
         )
-        total += len(receipt_book.receipts)
+        for result in suspicious:
+            click.echo(f"{result.book} : {result.tab} ==> {result.format_result()}")
+
+        if report and report_format == REPORT_NDJSON:
+            for result in book_results:
+                report.write(json.dumps(result.to_dict()) + "\n")
+            report.flush()
+        results.extend(book_results)
 
+    if report and report_format == REPORT_JSON:
+        json.dump([result.to_dict() for result in results], report, indent=2)
+
+    suspicious = [result for result in results if result.suspicious]
     click.echo(
         "\n"
         + RESULT_OK
-        + f"{total} receipts analyzed. {len(suspicious_receipts)} suspicious found:\n"
+        + f"{len(results)} receipts analyzed. {len(suspicious)} suspicious found:\n"
     )
-
-    for receipt in suspicious_receipts:
-        click.echo(
-            f"{receipt.worksheet.spreadsheet.title} : {receipt.worksheet.title} ==> ",
-            nl=False,
-        )
-        try:
-            receipt.prices_are_valid(raise_exception=True)
-            if receipt.discount:
-                click.echo(
-                    RESULT_OK + f"Receipt has a discount/loyalty of {receipt.discount}."
-                )
-        except ValueError as e:
-            click.echo(RESULT_WARNING.format(e))
-        except Exception as e:
-            click.echo(RESULT_ERROR.format(e))
+    for result in suspicious:
+        click.echo(f"{result.book} : {result.tab} ==> {result.format_result()}")
 
 
 @click.command()
-@click.argument("filename")
-def find_duplicates(filename):
-    """Analyze receipt book for duplicate tabs."""
-    receipt_book = ReceiptBook(filename)
-    if not click.confirm(
-        "This may take a while, make sure that the titles of all tabs are normalized. Continue?",
-        default=True,
-    ):
-        return
+@click.argument("filenames", nargs=-1, required=True)
+@click.option(
+    "--days",
+    type=click.IntRange(min=0),
+    default=DUPLICATES_DAYS,
+    show_default=True,
+    help="Max difference of dates of duplicate receipts.",
+)
+@click.option(
+    "--tolerance",
+    default=str(Money(DUPLICATES_TOLERANCE)),
+    show_default=True,
+    callback=parse_amount,
+    help="Max difference of amounts of duplicate receipts.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=VALIDATE_JOBS,
+    show_default=True,
+    help="Number of files read in parallel.",
+)
+def find_duplicates(filenames, days, tolerance, jobs):
+    """
+    Look for duplicate receipts across receipt books and the workbook.
+
+    Receipts from the same store with the same amount and close dates are
+    reported as likely duplicates. Tabs of the workbook are dated by their
+    titles like "22.11.2017".
+    """
     click.echo("Gathering data...")
-    receipt_book.find_duplicates()
+    receipt_books = []
+    for filename, receipt_book in zip(
+        filenames, ReceiptBook.open_many(filenames, jobs=jobs)
+    ):
+        if isinstance(receipt_book, SpreadsheetNotFound):
+            click.echo(
+                RESULT_ERROR.format(
+                    f"'{filename}' not found. Check the name or permissions."
+                )
+            )
+            continue
+        elif isinstance(receipt_book, Exception):
+            raise receipt_book
+        receipt_books.append(receipt_book)
+
+    ReceiptBook.find_duplicates_in(receipt_books, days=days, tolerance=tolerance)
 
 
 @click.command()
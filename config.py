@@ -1,6 +1,54 @@
-# Google Sheets API has quotas (default 100 requests per 100 seconds)
-# Use this parameter to set a delay between the requests to prevent exceeding is (sec):
-QUOTA_DELAY = 0.2
+# Google Sheets API has quotas (default 100 read and 100 write requests per 100 seconds).
+# The requests are paced by token buckets sized from these quotas:
+READ_QUOTA = 100
+WRITE_QUOTA = 100
+QUOTA_PERIOD = 100
+
+# Throttled (429) and failed (5xx) requests are retried with exponential backoff (sec):
+MAX_RETRIES = 5
+BACKOFF_BASE = 1
+BACKOFF_MAX = 64
+
+# Max number of kept-alive connections to the API, also the max number of requests in flight:
+HTTP_POOL_SIZE = 10
+
+# Max number of API calls made concurrently (they still share the same quota):
+MAX_CONCURRENT_REQUESTS = 8
+
+# Receipt books validated in parallel by default (each one fetches its tabs concurrently too):
+VALIDATE_JOBS = 4
+
+# Receipts are likely duplicates if their amounts differ by up to this number of cents
+# and dates by up to this number of days (e.g. a receipt on the border of months):
+DUPLICATES_TOLERANCE = 0
+DUPLICATES_DAYS = 1
+
+# Max number of tabs which grids are requested in one spreadsheets.get:
+GRID_PAGE_SIZE = 30
+
+# Max number of ranges requested in one values:batchGet:
+VALUES_PAGE_SIZE = 100
+
+# Spreadsheet names are resolved to IDs via local index refreshed at most once
+# per this period (sec) or when a name is not found there:
+SPREADSHEET_INDEX_FILE = ".cache/spreadsheets.json"
+SPREADSHEET_INDEX_TTL = 3600
+
+# Responses of unchanged spreadsheets are cached locally (max size in bytes):
+RESPONSE_CACHE_FILE = ".cache/responses.sqlite3"
+RESPONSE_CACHE_MAX_SIZE = 200 * 1024 * 1024
+
+# Parsed receipts of unchanged receipt books are kept locally:
+RECEIPT_STORE_FILE = ".cache/receipts.sqlite3"
+
+# Cell colors differing from the CellType palette by up to this value in each
+# of red/green/blue components (0..1) are still recognized as that CellType:
+COLOR_TOLERANCE = 0.02
+
+# Extra keywords to find the category of transactions by title, in addition to
+# the ones in models.transaction.TYPE_WORDS_MAPPING (TOML, optional):
+#     GROCERY = ["FARM BOY", "T&T"]
+CLASSIFIER_RULES_FILE = "classifier.toml"
 
 SCOPES = [
     "https://spreadsheets.google.com/feeds",
@@ -1,11 +1,59 @@
 import click
 
 from commands import tabs, files, billing, history
+from utils.cache import response_cache
+from utils.cassette import cassette
+from utils.receipt_store import receipt_store
+from utils.stats import api_stats
 
 
 @click.group()
-def cli():
-    pass
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Read everything from Google Sheets, ignoring the local response cache "
+    "and parsed receipts.",
+)
+@click.option("--stats", is_flag=True, help="Print the summary of API usage at exit.")
+@click.option(
+    "--trace",
+    type=click.File("w"),
+    help="Write each API call to the file as a JSON line.",
+)
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Record all API requests and responses to the cassette file.",
+)
+@click.option(
+    "--replay",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Serve API responses from the recorded cassette file instead of Google.",
+)
+@click.option(
+    "--replay-latency",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Scale of the recorded latency in replay, 0 answers right away.",
+)
+@click.pass_context
+def cli(ctx, no_cache, stats, trace, record, replay, replay_latency):
+    if record and replay:
+        raise click.UsageError("--record and --replay can't be used together.")
+
+    # the local response cache is skipped, so the cassette has all requests of the run
+    response_cache.enabled = not (no_cache or record or replay)
+    receipt_store.enabled = response_cache.enabled
+    if record:
+        cassette.record(record)
+        ctx.call_on_close(cassette.close)
+    elif replay:
+        cassette.replay(replay, latency_scale=replay_latency)
+
+    api_stats.trace_file = trace
+    if stats:
+        ctx.call_on_close(lambda: click.echo("\n" + api_stats.summary()))
 
 
 cli.add_command(tabs.normalize)
@@ -1,10 +1,10 @@
 import click
 from cached_property import cached_property
-from dateutil.parser import parse
 
 from models.base import BaseSpreadsheet
 from models.month_billing import MonthBilling
 from utils.constants import RESULT_WARNING
+from utils.dates import parse_title_date
 from utils.names import extract_number
 
 
@@ -18,7 +18,7 @@ class BillingBook(BaseSpreadsheet):
         result = {}
         for worksheet in self.spreadsheet.worksheets():
             try:
-                month = parse(worksheet.title).month
+                month = parse_title_date(worksheet.title).month
             except ValueError:
                 continue
 
@@ -1,16 +1,16 @@
-import math
+from contextlib import nullcontext
 from datetime import date
-from decimal import Decimal
 
 import click
 from cached_property import cached_property
-from dateutil.parser import parse
-from gspread import Cell
-from gspread.utils import a1_to_rowcol, rowcol_to_a1
 
 from models.receipt import Receipt
 from models.transaction import Transaction
+from utils.batch import WriteSession
+from utils.cells import coords_to_label, get_column_number, pack_coords
 from utils.constants import CellType, RESULT_WARNING
+from utils.dates import parse_title_date
+from utils.money import Money
 from utils.names import extract_number
 
 
@@ -57,27 +57,42 @@ class MonthBilling:
     def month(self) -> int:
         """Return the month the billing month heet is related to."""
         try:
-            return parse(self.worksheet.title).month
+            return parse_title_date(self.worksheet.title).month
         except ValueError:
             raise ValueError("Billing month sheet must have month in the title.")
 
+    @cached_property
+    def category_ranges(self) -> list:
+        """Return A1 ranges of the category rows for all days: ["E14:AI14", ...]."""
+        return [
+            f"{self.FIRST_DAY_COLUMN}{row}:{self.LAST_DAY_COLUMN}{row}"
+            for row in sorted(set(self.CATEGORY_ROWS.values()))
+        ]
+
     @cached_property
     def year(self) -> int:
         """Return the year current billing month sheet belongs to."""
         try:
             year_string = extract_number(self.worksheet.spreadsheet.title)
-            return parse(str(year_string)).year
+            return parse_title_date(str(year_string)).year
         except ValueError:
             raise ValueError("Billing book must have a year in the title.")
 
     def import_transaction(
-        self, transaction: Transaction, note_threshold=50, preferred_type=None
+        self,
+        transaction: Transaction,
+        note_threshold=50,
+        preferred_type=None,
+        session: WriteSession = None,
     ):
         """
         Adds the data from the transaction to the month billing spreadsheet.
 
         If a price in transaction exceeds threshold, it's name will be included
         into a note for a cell.
+
+        If the session is provided, the changes are collected there and written
+        when the session is flushed, otherwise they are written right away.
         """
         good_type = preferred_type or transaction.good_type
 
@@ -89,20 +104,30 @@ class MonthBilling:
         destination_label = self.get_destination_label(
             created=transaction.created, good_type=good_type
         )
-        cell = self.worksheet.acell(destination_label, value_render_option="FORMULA")
-        cell.value += f"+{transaction.price}" if cell.value else f"={transaction.price}"
-
-        is_note_needed = transaction.price > note_threshold or transaction.price < 0
-        if is_note_needed:
-            note = "\n" + transaction.title if transaction.price > 0 else f"Return/Discount: {transaction.title}"
-            self.worksheet.spreadsheet.client.insert_notes(
-                worksheet=self.worksheet,
-                labels_notes={destination_label: note},
-                replace=False,
+        with self._write_session(session) as session:
+            session.read(self.worksheet, self.category_ranges)
+            cell_str_value = session.get_value(self.worksheet, destination_label)
+            cell_price_before = Money.parse(cell_str_value) if cell_str_value else 0
+
+            cell_formula = session.get_formula(self.worksheet, destination_label)
+            cell_formula += (
+                f"+{transaction.price}" if cell_formula else f"={transaction.price}"
+            )
+
+            is_note_needed = transaction.price > note_threshold or transaction.price < 0
+            if is_note_needed:
+                note = "\n" + transaction.title if transaction.price > 0 else f"Return/Discount: {transaction.title}"
+                session.append_note(self.worksheet, destination_label, note)
+            session.update_value(
+                self.worksheet,
+                destination_label,
+                cell_formula,
+                evaluated_value=cell_price_before + transaction.price,
             )
-        self.worksheet.update_cells([cell], value_input_option="USER_ENTERED")
 
-    def import_receipt(self, receipt: Receipt, note_threshold=50):
+    def import_receipt(
+        self, receipt: Receipt, note_threshold=50, session: WriteSession = None
+    ):
         """
         Adds the data from the receipt to the month billing spreadsheet.
 
@@ -112,6 +137,9 @@ class MonthBilling:
         Rules for HST/taxes:
             if all purchases are groceries, then it is added too total grocery price;
             if there are other categories, then it is added to the biggest one.
+
+        If the session is provided, the changes are collected there and written
+        when the session is flushed, otherwise they are written right away.
         """
         date_match = receipt.date.month == self.month and receipt.date.year == self.year
         if not date_match:
@@ -127,82 +155,88 @@ class MonthBilling:
                 )
             )
 
-        cells_to_update = []
+        cells_to_update = {}
         notes_to_add = {}
-        for good_type, purchases in receipt.purchases_by_type.items():
-            if not purchases:
-                continue
-
-            destination_label = self.get_destination_label(
-                created=purchases[0].created, good_type=purchases[0].good_type
-            )
-            cell = self.worksheet.acell(
-                destination_label, value_render_option="FORMULA"
-            )
-            cells_to_update.append(cell)
-
-            cell_str_value = self.worksheet.acell(destination_label).value
-            cell_price_before = Decimal(cell_str_value) if cell_str_value else 0
-
-            cell_formula = cell.value
-            for purchase in purchases:
-                cell_formula += (
-                    f"+{purchase.price}" if cell_formula else f"={purchase.price}"
+        with self._write_session(session) as session:
+            session.read(self.worksheet, self.category_ranges)
+            for good_type, purchases in receipt.purchases_by_type.items():
+                if not purchases:
+                    continue
+
+                destination_label = self.get_destination_label(
+                    created=purchases[0].created, good_type=purchases[0].good_type
                 )
 
-            is_tax_here = receipt.tax and good_type == receipt.tax_belongs_to
-            if is_tax_here:
-                cell_formula += f"+{receipt.tax}"
+                cell_str_value = session.get_value(self.worksheet, destination_label)
+                cell_price_before = Money.parse(cell_str_value) if cell_str_value else 0
 
-            if receipt.discount and good_type == receipt.most_expensive_category:
-                cell_formula += f"-{receipt.discount}"
+                cell_formula = session.get_formula(self.worksheet, destination_label)
+                for purchase in purchases:
+                    cell_formula += (
+                        f"+{purchase.price}" if cell_formula else f"={purchase.price}"
+                    )
 
-            cell.value = cell_formula
+                is_tax_here = receipt.tax and good_type == receipt.tax_belongs_to
+                if is_tax_here:
+                    cell_formula += f"+{receipt.tax}"
 
-            category_price = receipt.get_category_price(good_type=good_type)
-            added_price = category_price + (receipt.tax if is_tax_here else 0)
+                if receipt.discount and good_type == receipt.most_expensive_category:
+                    cell_formula += f"-{receipt.discount}"
 
-            note = "\n".join(
-                purchase.good_name
-                if purchase.price > 0
-                else f"Return/Discount: {purchase.good_name}"
-                for purchase in purchases
-                if purchase.price > note_threshold or purchase.price < 0
-            )
-            if note:
-                notes_to_add[destination_label] = f"{receipt.store}: \n {note}"
+                category_price = receipt.get_category_price(good_type=good_type)
+                added_price = category_price + (receipt.tax if is_tax_here else 0)
+                cells_to_update[destination_label] = (
+                    cell_formula,
+                    cell_price_before + added_price,
+                )
+
+                note = "\n".join(
+                    purchase.good_name
+                    if purchase.price > 0
+                    else f"Return/Discount: {purchase.good_name}"
+                    for purchase in purchases
+                    if purchase.price > note_threshold or purchase.price < 0
+                )
+                if note:
+                    notes_to_add[destination_label] = f"{receipt.store}: \n {note}"
 
-            if cell_price_before and math.isclose(cell_price_before % added_price, 0):
-                click.echo(
-                    RESULT_WARNING.format(
-                        f"Purchase in a cell {destination_label} is likely imported multiple times."
+                is_multiple = (
+                    cell_price_before
+                    and added_price
+                    and cell_price_before % added_price == 0
+                )
+                if is_multiple:
+                    click.echo(
+                        RESULT_WARNING.format(
+                            f"Purchase in a cell {destination_label} is likely imported multiple times."
+                        )
                     )
+
+            for label, note in notes_to_add.items():
+                session.append_note(self.worksheet, label, note)
+            for label, (cell_formula, cell_price) in cells_to_update.items():
+                session.update_value(
+                    self.worksheet, label, cell_formula, evaluated_value=cell_price
                 )
 
-        if notes_to_add:
-            self.worksheet.spreadsheet.client.insert_notes(
-                worksheet=self.worksheet, labels_notes=notes_to_add, replace=False
-            )
-        self.worksheet.update_cells(cells_to_update, value_input_option="USER_ENTERED")
+    @staticmethod
+    def _write_session(session):
+        """Use the provided session, or a new one flushed right after the import."""
+        return nullcontext(session) if session is not None else WriteSession()
 
     def get_destination_label(self, created: date, good_type: CellType) -> str:
         """Return the cell label in a month billing for a certain Purchase or Transaction."""
         row = self.CATEGORY_ROWS[good_type]
-        _, col = a1_to_rowcol(f"{self.FIRST_DAY_COLUMN}1")
-        col += created.day - 1
-        return rowcol_to_a1(row, col)
+        col = get_column_number(self.FIRST_DAY_COLUMN) + created.day - 1
+        return coords_to_label(pack_coords(row, col))
 
     def clear_expenses(self):
         """Clear all expenses and notes for the month in all categories."""
-        _, col_1 = a1_to_rowcol(f"{self.FIRST_DAY_COLUMN}1")
-        _, col_31 = a1_to_rowcol(f"{self.LAST_DAY_COLUMN}1")
-        cell_list = [
-            Cell(row=row, col=col, value="")
-            for col in range(col_1, col_31 + 1)
-            for row in self.CATEGORY_ROWS.values()
-        ]
-        label_notes = {rowcol_to_a1(cell.row, cell.col): "" for cell in cell_list}
-        self.worksheet.update_cells(cell_list=cell_list)
-        self.worksheet.spreadsheet.client.insert_notes(
-            worksheet=self.worksheet, labels_notes=label_notes, replace=True
-        )
+        col_1 = get_column_number(self.FIRST_DAY_COLUMN)
+        col_31 = get_column_number(self.LAST_DAY_COLUMN)
+        with WriteSession() as session:
+            for col in range(col_1, col_31 + 1):
+                for row in self.CATEGORY_ROWS.values():
+                    label = coords_to_label(pack_coords(row, col))
+                    session.update_value(self.worksheet, label, "")
+                    session.update_note(self.worksheet, label, "")
@@ -1,9 +1,10 @@
 from datetime import date
-from decimal import Decimal
+from typing import List
 
-from attr import dataclass
+from attr import Factory, dataclass
 
 from utils.constants import CellType
+from utils.money import Money
 
 
 @dataclass
@@ -15,5 +16,7 @@ class Purchase:
     good_name: str
     good_type: CellType
     good_label: str
-    price: Decimal
+    price: Money
     created: date
+    # labels of the price cells the price is summed up from
+    price_labels: List[str] = Factory(list)
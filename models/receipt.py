@@ -1,21 +1,36 @@
-import math
 from collections import defaultdict, Counter
-from copy import copy
 from datetime import date
 from typing import List
 
 import click
 from cached_property import cached_property
-from dateutil.parser import parse
-from gspread import Cell
-from gspread.utils import rowcol_to_a1, a1_to_rowcol
-from natsort import natsorted
 
 from models.base import Color
 from models.purchase import Purchase
-from utils.cells import a1_to_coords, price_to_decimal, get_earliest_label
-from utils.constants import CellType, GOODS_TYPES, SUMMARY_TYPES, HST, RESULT_WARNING
-from utils.names import extract_number
+from models.validation import ReceiptValidation, MISMATCH, DISCOUNT, INVALID, ERROR
+from utils.alignment import align_prices
+from utils.money import Money
+from utils.cells import (
+    a1_to_coords,
+    coords_to_label,
+    get_column_number,
+    label_to_coords,
+    pack_coords,
+    price_to_money,
+    split_label,
+)
+from utils.constants import (
+    CellType,
+    GOODS_TYPES,
+    SUMMARY_TYPES,
+    HST,
+    RESULT_WARNING,
+    get_cell_type,
+    get_cell_types,
+)
+from utils.dates import parse_title_date
+from utils.duplicates import Fingerprint
+from utils.names import extract_date_string, extract_number
 
 
 class Receipt:
@@ -33,23 +48,118 @@ class Receipt:
     CODE_COLUMN = "C"
     PRICE_COLUMN = "D"
 
-    def __init__(self, worksheet):
-        """Instantiate the Receipt from the *normalized worksheet* tab."""
+    # the only ranges of the tab the receipt data is read from
+    SNAPSHOT_RANGES = (f"{LINE_COLUMN}:{PRICE_COLUMN}", f"{STORE_CELL}:{JSON_CELL}")
+
+    def __init__(self, worksheet, snapshot=None):
+        """
+        Instantiate the Receipt from the *normalized worksheet* tab.
+
+        :param dict snapshot: grid data of the tab if it is fetched in advance
+            (see QuotaCompliantClient.get_grid_snapshot).
+        """
         self.worksheet = worksheet
+        self._prefetched_snapshot = snapshot
+
+    @classmethod
+    def from_snapshot(cls, worksheet, data):
+        """
+        Restore the Receipt parsed earlier, without reading the tab again.
+
+        :param dict data: the result of to_snapshot()
+        """
+        receipt = cls(worksheet)
+        # parsed values take place of the lazily evaluated properties
+        receipt.__dict__.update(
+            store=data["store"],
+            date=date.fromisoformat(data["date"]),
+            _prices={
+                coords: (Money(cents), cls._get_type(type_name))
+                for coords, cents, type_name in data["prices"]
+            },
+        )
+        receipt.__dict__["purchases"] = [
+            Purchase(
+                good_name=good_name,
+                good_type=cls._get_type(type_name),
+                good_label=good_label,
+                price=Money(cents),
+                created=receipt.date,
+                price_labels=price_labels,
+            )
+            for good_name, type_name, good_label, cents, price_labels in data[
+                "purchases"
+            ]
+        ]
+        return receipt
+
+    def to_snapshot(self):
+        """
+        Return the parsed data of the receipt, serializable to JSON.
+
+        Raises ValueError or NotImplementedError if the receipt can't be parsed.
+
+        :return dict: {
+            "store": "LOBLAWS",
+            "date": "2019-01-13",
+            "prices": [[<D3>, 345, "REGULAR"], ..., [<D9>, 1023, "TOTAL"]],
+            "purchases": [["BREAD", "GROCERY", "B3", 345, ["D3"]], ...]
+        }
+        """
+        return {
+            "store": self.store,
+            "date": self.date.isoformat(),
+            "prices": [
+                [coords, price.cents, cell_type and cell_type.name]
+                for coords, (price, cell_type) in self._prices.items()
+            ],
+            "purchases": [
+                [
+                    purchase.good_name,
+                    purchase.good_type and purchase.good_type.name,
+                    purchase.good_label,
+                    purchase.price.cents,
+                    purchase.price_labels,
+                ]
+                for purchase in self.purchases
+            ],
+        }
+
+    @staticmethod
+    def _get_type(type_name):
+        return CellType[type_name] if type_name else None
+
+    @cached_property
+    def _snapshot(self):
+        """Lazy load of values, colors and notes of the tab in a single request."""
+        if self._prefetched_snapshot is not None:
+            return self._prefetched_snapshot
+
+        client = self.worksheet.spreadsheet.client
+        return client.get_grid_snapshot(
+            self.worksheet, ranges=list(self.SNAPSHOT_RANGES)
+        )
 
     @cached_property
     def content(self):
         """Lazy load of entire spreadsheet content."""
-        return self.worksheet.get_all_values()
+        return self._snapshot["values"]
 
     @cached_property
     def _background_colors(self):
-        client = self.worksheet.spreadsheet.client
-        cells_colors = client.get_all_colors(self.worksheet)
-        result = {
-            label: Color(**color_props) for label, color_props in cells_colors.items()
+        """
+        Return colors of the names and prices columns by row (starting from 1st).
+
+        :return dict: {"B": [None, Color(...), None, ...], "D": [...]}
+        """
+        cells_colors = self._snapshot["colors"]
+        return {
+            column: [
+                Color(**color_props) if color_props else None
+                for color_props in cells_colors.get(column, [])
+            ]
+            for column in (self.NAME_COLUMN, self.PRICE_COLUMN)
         }
-        return result
 
     @cached_property
     def date(self) -> date:
@@ -66,7 +176,7 @@ class Receipt:
         """
         try:
             day_from_title = int(extract_number(self.worksheet.title))
-            date_from_spreadsheet = parse(self.worksheet.spreadsheet.title)
+            date_from_spreadsheet = parse_title_date(self.worksheet.spreadsheet.title)
         except ValueError:
             raise NotImplementedError(
                 "Receipt must have normalized title with day number and "
@@ -78,7 +188,7 @@ class Receipt:
             day=day_from_title,
         )
 
-    @property
+    @cached_property
     def store(self):
         y, x = a1_to_coords(self.STORE_CELL)
         try:
@@ -109,14 +219,32 @@ class Receipt:
             )
 
     def get_cell_color(self, label):
-        return self._background_colors.get(label)
+        column, row = split_label(label)
+        column_colors = self._background_colors.get(column, [])
+        return column_colors[row - 1] if row <= len(column_colors) else None
+
+    @cached_property
+    def _cell_types(self):
+        """
+        Return cell types of the names and prices columns by row (starting from 1st).
+
+        :return dict: {"B": [CellType.REGULAR, CellType.GROCERY, None, ...], "D": [...]}
+        """
+        cells_colors = self._snapshot["colors"]
+        return {
+            column: get_cell_types(cells_colors.get(column, []))
+            for column in (self.NAME_COLUMN, self.PRICE_COLUMN)
+        }
 
     def get_cell_type(self, label):
-        cell_color = self.get_cell_color(label)
-        try:
-            return CellType(cell_color)
-        except ValueError:
-            return None
+        column, row = split_label(label)
+        if column not in self._cell_types:
+            return get_cell_type(self.get_cell_color(label))
+        return self._get_column_cell_type(column, row)
+
+    def _get_column_cell_type(self, column, row):
+        column_types = self._cell_types[column]
+        return column_types[row - 1] if row <= len(column_types) else CellType.REGULAR
 
     @cached_property
     def _names(self):
@@ -129,31 +257,30 @@ class Receipt:
         order to reduce the number of API requests because it takes
         one API call to get the style of each cell.
 
-        :return dict: a map sorted by cell label
+        :return dict: a map by cell coordinates (see utils.cells.pack_coords),
+            sorted top to bottom
             {
-                "B8": ('Bread', CellType.GROCERY),
-                "B10": ('SUSHI ROLL', CellType.TAKEOUTS),
-                "B14": ('DEBIT', CellType.REGULAR),
+                <B8>: ('Bread', CellType.GROCERY),
+                <B10>: ('SUSHI ROLL', CellType.TAKEOUTS),
+                <B14>: ('DEBIT', CellType.REGULAR),
                 ...
             }
         """
         result = {}
 
-        _, col = a1_to_rowcol(f"{self.NAME_COLUMN}1")
+        col = get_column_number(self.NAME_COLUMN)
 
         for row, line in enumerate(self.content, 1):
             if row == 1:
                 continue
 
             value = line[col - 1]
-            label = rowcol_to_a1(row, col)
-            cell_type = self.get_cell_type(label=label)
+            cell_type = self._get_column_cell_type(self.NAME_COLUMN, row)
             if (not cell_type or cell_type == CellType.REGULAR) and not value:
                 continue
 
-            result[label] = (value, cell_type)
+            result[pack_coords(row, col)] = (value, cell_type)
 
-        result = dict(natsorted(result.items()))
         return result
 
     @cached_property
@@ -164,16 +291,16 @@ class Receipt:
         Unlike _names() this one returns only those which belong to
         a certain goods category, ignoring all other kind of cells.
 
-        :return dict:
+        :return dict: a map by cell coordinates
             {
-                "B8": ('Bread', CellType.GROCERY),
-                "B10": ('SUSHI ROLL', CellType.TAKEOUTS),
+                <B8>: ('Bread', CellType.GROCERY),
+                <B10>: ('SUSHI ROLL', CellType.TAKEOUTS),
                 ...
             }
         """
         return {
-            label: (name, cell_type)
-            for label, (name, cell_type) in self._names.items()
+            coords: (name, cell_type)
+            for coords, (name, cell_type) in self._names.items()
             if cell_type in GOODS_TYPES
         }
 
@@ -184,28 +311,30 @@ class Receipt:
 
         This method practices lazy evaluation too for the same reasons.
 
-        :return dict: a map sorted by cell label
+        :return dict: a map by cell coordinates sorted top to bottom
             {
-                "D10": (Decimal(3.45), CellType.REGULAR),
-                "D12": (Decimal(4.56), CellType.REGULAR),
+                <D10>: (Money("3.45"), CellType.REGULAR),
+                <D12>: (Money("4.56"), CellType.REGULAR),
                 ...
-                "D13": (Decimal(1.23), CellType.TOTAL),
-                "D15": (Decimal(1.23), CellType.TAX),
+                <D13>: (Money("1.23"), CellType.TOTAL),
+                <D15>: (Money("1.23"), CellType.TAX),
             }
         """
         result = {}
 
-        _, col = a1_to_rowcol(f"{self.PRICE_COLUMN}1")
+        col = get_column_number(self.PRICE_COLUMN)
         price_cells = [
-            Cell(row=row, col=col, value=line[col - 1])
+            (row, line[col - 1])
             for row, line in enumerate(self.content, 1)
             if line[col - 1] and row > 1
         ]
 
-        for cell in reversed(price_cells):
-            label = rowcol_to_a1(cell.row, cell.col)
-            amount = price_to_decimal(
-                cell.value, worksheet_title=self.worksheet.title, label=label
+        for row, value in reversed(price_cells):
+            coords = pack_coords(row, col)
+            amount = price_to_money(
+                value,
+                worksheet_title=self.worksheet.title,
+                label=coords_to_label(coords),
             )
 
             is_summary_collected = all(
@@ -213,16 +342,18 @@ class Receipt:
             )
 
             if is_summary_collected:
-                result[label] = (amount, CellType.REGULAR)
+                result[coords] = (amount, CellType.REGULAR)
                 # if all summary prices are identified already, then we don't need
                 # to check the color of other prices because the rest of them are
                 # regular prices. That's why we move on to the next cell right away.
                 continue
 
-            cell_type = self.get_cell_type(label=label) or CellType.REGULAR
-            result[label] = (amount, cell_type)
+            cell_type = (
+                self._get_column_cell_type(self.PRICE_COLUMN, row) or CellType.REGULAR
+            )
+            result[coords] = (amount, cell_type)
 
-        result = dict(natsorted(result.items()))
+        result = dict(sorted(result.items()))
         return result
 
     @cached_property
@@ -235,14 +366,14 @@ class Receipt:
         and all others fall into REGULAR.
         :return dict:
             {
-                CellType.TOTAL: Decimal(3.45),
-                CellType.REGULAR: Decimal(34.56),
-                CellType.TAX: Decimal(1.23)
+                CellType.TOTAL: Money("3.45"),
+                CellType.REGULAR: Money("34.56"),
+                CellType.TAX: Money("1.23")
                 ...
             }
         """
         result = {}
-        for label, (price, cell_type) in self._prices.items():
+        for price, cell_type in self._prices.values():
             if cell_type in result and cell_type not in [
                 CellType.ACTUALLY_PAID,
                 CellType.TOTAL,
@@ -257,16 +388,16 @@ class Receipt:
         """
         Get a dict of all goods prices.
 
-        :return dict: a map
+        :return dict: a map by cell coordinates
             {
-                "D10": Decimal(3.45),
-                "D12": Decimal(4.56),
+                <D10>: Money("3.45"),
+                <D12>: Money("4.56"),
                 ...
             }
         """
         return {
-            label: price
-            for label, (price, cell_type) in self._prices.items()
+            coords: price
+            for coords, (price, cell_type) in self._prices.items()
             if cell_type == CellType.REGULAR or not cell_type
         }
 
@@ -277,16 +408,18 @@ class Receipt:
 
         This method handles possible recognition artifacts when prices are not
         aligned with the goods and can be shifted up or down. It also handles
-        the case when one good may have multiple prices which need to be added up.
+        the case when one good may have multiple prices which need to be added up
+        (see utils.alignment.align_prices). The prices each purchase is made of
+        are listed in its price_labels.
 
         :return list: list of Purchases
         """
         result = []
-        goods = copy(self.goods)
-        goods_prices = copy(self.goods_prices)
+        goods = self.goods
+        goods_prices = self.goods_prices
         if not goods_prices and len(goods) == 1:
             goods_prices = {
-                f"{self.PRICE_COLUMN}3": self.subtotal
+                label_to_coords(f"{self.PRICE_COLUMN}3"): self.subtotal
                 or self.total
                 or self.actually_paid
             }
@@ -294,47 +427,19 @@ class Receipt:
         elif len(goods_prices) < len(goods):
             raise ValueError(f"Some prices are missing in '{self.worksheet.title}'")
 
-        # we determine if there are any goods with multiple prices per item in order
-        # to determine the strategy of matching goods with the prices. Sometimes,
-        # due to recognition artifacts, price may be shifted up or down comparing to
-        # the item name, and therefore may appear to belong to the item which already
-        # has the price. In some situations multiple prices per item is a valid case.
-        # So, to distinguish that, we check it the total number of goods matches the
-        # total number of prices: if they are equal, then we have an artifact.
-        multiple_prices_per_good = len(goods_prices) > len(goods)
-
-        while goods:
-            good_label, (good_name, good_type) = next(iter(goods.items()))
-            del goods[good_label]
-
-            if multiple_prices_per_good:
-                # greedy strategy - we should add as many prices as we can
-                # before meeting the next good's name
-                next_good_label = next(iter(goods), "")
-                next_good_met = False
-                result_price = 0
-                while not next_good_met and goods_prices:
-                    price_label, price = next(iter(goods_prices.items()))
-                    result_price += price
-                    del goods_prices[price_label]
-
-                    if not goods_prices:
-                        continue
-                    next_price_label = next(iter(goods_prices), "")
-                    earliest_label = get_earliest_label(
-                        next_price_label, next_good_label
-                    )
-                    next_good_met = earliest_label == next_good_label
-            else:
-                price_label, result_price = next(iter(goods_prices.items()))
-                del goods_prices[price_label]
-
+        goods_coords = list(goods)
+        prices_coords = list(goods_prices)
+        alignment = align_prices(goods_coords, prices_coords)
+        for good_coords, price_indices in zip(goods_coords, alignment):
+            good_name, good_type = goods[good_coords]
+            price_coords = [prices_coords[i] for i in price_indices]
             purchase = Purchase(
                 good_name=good_name,
                 good_type=good_type,
-                good_label=good_label,
-                price=result_price,
+                good_label=coords_to_label(good_coords),
+                price=sum((goods_prices[coords] for coords in price_coords), Money()),
                 created=self.date,
+                price_labels=[coords_to_label(coords) for coords in price_coords],
             )
             result.append(purchase)
 
@@ -443,38 +548,102 @@ class Receipt:
 
         return result
 
+    def get_fingerprint(self):
+        """
+        Return the content fingerprint to compare with other receipts.
+
+        Tabs outside of receipt books (e.g. in the workbook) are dated by their
+        title like "22.11.2017", the date is None if the title has no date.
+
+        :return Fingerprint:
+        """
+        try:
+            receipt_date = self.date
+        except (NotImplementedError, ValueError):
+            try:
+                receipt_date = parse_title_date(
+                    extract_date_string(self.worksheet.title)
+                ).date
+            except (ValueError, OverflowError):
+                receipt_date = None
+
+        return Fingerprint(
+            book=self.worksheet.spreadsheet.title,
+            tab=self.worksheet.title,
+            store=str(self.store).strip().upper(),
+            date=receipt_date,
+            amount=self.actually_paid
+            or self.total
+            or self.subtotal
+            or sum(self.goods_prices.values(), Money()),
+            lines=Fingerprint.hash_lines(self.goods_prices.values()),
+        )
+
     def prices_are_valid(self, raise_exception=True):
         """Return True if all prices adds up correctly to subtotal and total numbers."""
+        mismatch = self._find_price_mismatch()
+        if raise_exception and mismatch:
+            message, _, _ = mismatch
+            raise ValueError(message)
+        return mismatch is None
+
+    def _find_price_mismatch(self):
+        """
+        Compare the sum of prices with subtotal and total numbers.
+
+        :return tuple: None if all prices add up correctly, otherwise
+            (message, expected amount, actual amount)
+        """
         if not self._prices:
-            if raise_exception:
-                raise ValueError(f"There is no prices in {self.worksheet.title}.")
-            else:
-                return False
+            return f"There is no prices in {self.worksheet.title}.", None, None
 
         calculated_sum = self.price_stats.get(CellType.REGULAR, 0)
         if not self.subtotal and not calculated_sum:
             # some receipts has just one total price
-            return True
+            return None
 
         tax = self.tax or 0
-        match_total = math.isclose(
-            (self.total or self.actually_paid), (self.subtotal or calculated_sum) + tax
-        )
-        if raise_exception and not match_total:
-            raise ValueError(
+        expected_total = self.total or self.actually_paid
+        actual_total = (self.subtotal or calculated_sum) + tax
+        if expected_total != actual_total:
+            return (
                 f"Subtotal {self.subtotal or calculated_sum} + tax {tax} is not equal to amount "
-                f"{self.total or self.actually_paid} in tab '{self.worksheet.title}'"
+                f"{expected_total} in tab '{self.worksheet.title}'",
+                expected_total,
+                actual_total,
             )
 
-        if self.subtotal and calculated_sum:
-            match_subtotal = math.isclose(calculated_sum, self.subtotal)
-            if raise_exception and not match_subtotal:
-                raise ValueError(
-                    f"Sum of prices {calculated_sum} is not equal to subtotal amount {self.subtotal} "
-                    f"in tab '{self.worksheet.title}'"
-                )
-            result = match_subtotal and match_total
-        else:
-            result = match_total
+        if self.subtotal and calculated_sum and calculated_sum != self.subtotal:
+            return (
+                f"Sum of prices {calculated_sum} is not equal to subtotal amount {self.subtotal} "
+                f"in tab '{self.worksheet.title}'",
+                self.subtotal,
+                calculated_sum,
+            )
+        return None
+
+    def validate(self):
+        """
+        Check the prices once and return the outcome.
 
+        :return ReceiptValidation:
+        """
+        result = ReceiptValidation(
+            book=self.worksheet.spreadsheet.title, tab=self.worksheet.title
+        )
+        try:
+            mismatch = self._find_price_mismatch()
+            # the discount depends on the purchases, which may not be readable
+            # when the prices don't add up
+            discount = None if mismatch else self.discount
+        except ValueError as e:
+            result.status, result.message = INVALID, str(e)
+        except Exception as e:
+            result.status, result.message = ERROR, str(e)
+        else:
+            if mismatch:
+                result.status = MISMATCH
+                result.message, result.expected, result.actual = mismatch
+            elif discount:
+                result.status, result.discount = DISCOUNT, discount
         return result
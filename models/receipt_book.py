@@ -1,11 +1,15 @@
-from collections import Counter
+import asyncio
 
 import click
 from cached_property import cached_property
 
+from config import DUPLICATES_DAYS, DUPLICATES_TOLERANCE, VALIDATE_JOBS
 from models.base import BaseSpreadsheet
 from models.receipt import Receipt
+from utils.async_api import AsyncQuotaCompliantClient, run_as_completed
 from utils.constants import RESULT_SKIPPED, RESULT_OK, RESULT_ERROR, RESULT_WARNING
+from utils.duplicates import find_clusters
+from utils.money import Money
 from utils.names import get_normalized_title
 
 
@@ -16,13 +20,117 @@ class ReceiptBook(BaseSpreadsheet):
     Typical name `2019-01`.
     """
 
+    def __init__(self, filename, prefetch=False):
+        """
+        :param bool prefetch: if True, the data of all receipts is loaded in bulk
+            with a few requests instead of two requests per each receipt.
+        """
+        super().__init__(filename)
+        self.prefetch = prefetch
+
+    @classmethod
+    def open_many(cls, filenames, jobs=VALIDATE_JOBS):
+        """
+        Open and load receipt books in parallel.
+
+        :return list: ReceiptBook for each filename, or the exception
+            (e.g. SpreadsheetNotFound) if it couldn't be loaded.
+        """
+
+        def load(filename):
+            receipt_book = cls(filename, prefetch=True)
+            receipt_book.receipts
+            return receipt_book
+
+        results = dict(
+            run_as_completed(
+                load, *((filename,) for filename in filenames), concurrency=jobs
+            )
+        )
+        return [results[(filename,)] for filename in filenames]
+
+    @classmethod
+    def validate_many(cls, filenames, jobs=VALIDATE_JOBS):
+        """
+        Validate receipt books in parallel, checking each receipt once.
+
+        Yields the results of each book as soon as it's validated:
+            ("2019-02", [ReceiptValidation, ...]), ("2019-01", SpreadsheetNotFound(...)), ...
+
+        Exceptions are yielded in place of the results of the books which
+        couldn't be loaded.
+        """
+
+        def validate(filename):
+            receipt_book = cls(filename, prefetch=True)
+            return [receipt.validate() for receipt in receipt_book.receipts]
+
+        for (filename,), results in run_as_completed(
+            validate, *((filename,) for filename in filenames), concurrency=jobs
+        ):
+            yield filename, results
+
     @cached_property
     def _receipts_map(self):
-        return {
-            worksheet.title: Receipt(worksheet=worksheet)
-            for worksheet in self.spreadsheet.worksheets()
+        """
+        Create receipts of all tabs.
+
+        Receipts parsed earlier from the same version of the spreadsheet are
+        loaded from the receipt store. In prefetch mode, the rest are parsed
+        right away and saved there.
+        """
+        client = self.spreadsheet.client
+        worksheets = self._worksheets
+
+        version, stored = None, {}
+        if client.receipt_store.enabled:
+            version = client.get_spreadsheet_version(self.spreadsheet.id)
+            stored = client.receipt_store.get(self.spreadsheet.id, version)
+
+        missing = [worksheet for worksheet in worksheets if worksheet.id not in stored]
+        snapshots = self._fetch_snapshots(missing) if self.prefetch and missing else {}
+
+        result, new_receipts = {}, []
+        for worksheet in worksheets:
+            if worksheet.id in stored:
+                receipt = Receipt.from_snapshot(worksheet, stored[worksheet.id])
+            else:
+                receipt = Receipt(
+                    worksheet=worksheet, snapshot=snapshots.get(worksheet.title)
+                )
+                new_receipts.append(receipt)
+            result[worksheet.title] = receipt
+
+        if snapshots and version is not None:
+            self._store_receipts(version, new_receipts)
+        return result
+
+    def _store_receipts(self, version, receipts):
+        """Save parsed receipts to the store, except those which can't be parsed."""
+        snapshots = {}
+        for receipt in receipts:
+            try:
+                snapshots[receipt.worksheet.id] = receipt.to_snapshot()
+            except (ValueError, NotImplementedError):
+                # the errors are reported by the commands using the receipt
+                continue
+        client = self.spreadsheet.client
+        client.receipt_store.set(self.spreadsheet.id, version, snapshots)
+
+    def _fetch_snapshots(self, worksheets):
+        """Load the receipt ranges of all tabs at once, pages are fetched concurrently."""
+        ranges_by_title = {
+            worksheet.title: Receipt.SNAPSHOT_RANGES for worksheet in worksheets
         }
 
+        async def fetch():
+            async with AsyncQuotaCompliantClient(self.spreadsheet.client) as client:
+                return await client.get_grid_snapshots(
+                    self.spreadsheet, ranges_by_title
+                )
+
+        return asyncio.run(fetch())
+
     @property
     def receipts(self):
         return list(self._receipts_map.values())
@@ -30,57 +138,142 @@ class ReceiptBook(BaseSpreadsheet):
     def get_receipt(self, title):
         return self._receipts_map.get(title)
 
-    def rename_tabs(self, one_by_one, dry=False):
-        """Rename each tab title to reflect the day number of the receipt."""
+    @cached_property
+    def _worksheets(self):
+        """Tabs of the spreadsheet, fetched once and kept up to date by the changes made here."""
+        return self.spreadsheet.worksheets()
+
+    @cached_property
+    def _renames(self):
+        """
+        Compute the normalized title of each tab.
+
+        :return list: [(worksheet, "01", None), (worksheet, None, ValueError(...)), ...]
+        """
+        result = []
         names_registry = set()
-        for worksheet in self.spreadsheet.worksheets():
-            title_before = worksheet.title
+        for worksheet in self._worksheets:
             try:
                 normalized_title = get_normalized_title(
-                    tab_title=title_before,
+                    tab_title=worksheet.title,
                     filename=self.spreadsheet.title,
                     names_registry=names_registry,
                 )
             except ValueError as e:
-                conversion_error = RESULT_WARNING.format(e) if dry else RESULT_SKIPPED
-                normalized_title = None
+                normalized_title, error = None, e
             else:
-                conversion_error = None
+                error = None
+
+            names_registry.add(normalized_title or worksheet.title)
+            result.append((worksheet, normalized_title, error))
+        return result
 
-            names_registry.add(normalized_title or title_before)
+    def rename_tabs(self, one_by_one, dry=False, reorder=False):
+        """
+        Rename each tab title to reflect the day number of the receipt.
+
+        All renames are sent in one batchUpdate, along with sorting of tabs
+        if `reorder`. If it fails, the tabs are renamed one by one to find
+        out which ones can't be renamed.
+        """
+        new_titles = {}
+        for worksheet, normalized_title, error in self._renames:
+            if error:
+                conversion_error = (
+                    RESULT_WARNING.format(error) if dry else RESULT_SKIPPED
+                )
+            else:
+                conversion_error = None
 
             click.echo(
-                f"{title_before} ==> " + f"{normalized_title or conversion_error}"
+                f"{worksheet.title} ==> " + f"{normalized_title or conversion_error}"
             )
             if dry or conversion_error:
                 continue
 
             if not one_by_one or one_by_one and click.confirm(f"Rename?", default=True):
-                result_msg = RESULT_SKIPPED if conversion_error else RESULT_OK
-                try:
-                    worksheet.update_title(normalized_title)
-                except Exception as e:
-                    result_msg = RESULT_ERROR.format(e)
-                click.echo(result_msg)
+                new_titles[worksheet.id] = normalized_title
 
-    def reorder(self):
-        """Sort tabs in the spreadsheet by title alphabetically."""
-        api_payload = []
-        title_id_map = {
-            worksheet.title: worksheet.id for worksheet in self.spreadsheet.worksheets()
+        if dry or not (new_titles or reorder):
+            return
+
+        properties = {
+            sheet_id: {"title": title} for sheet_id, title in new_titles.items()
         }
-        sorted_titles = sorted(title_id_map.keys())
-        for i, title in enumerate(sorted_titles):
-            api_payload.append(
-                {
-                    "updateSheetProperties": {
-                        "properties": {"sheetId": title_id_map.get(title), "index": i},
-                        "fields": "index",
-                    }
+        if reorder:
+            # tabs are moved one after another, so they go in the new order
+            properties = {
+                sheet_id: {**properties.get(sheet_id, {}), "index": index}
+                for sheet_id, index in self._get_sorted_indexes(new_titles).items()
+            }
+
+        try:
+            self._update_properties(properties)
+        except Exception as e:
+            click.echo(RESULT_WARNING.format(e))
+            click.echo("Renaming tabs one by one...")
+            self._rename_one_by_one(new_titles)
+            if reorder:
+                self.reorder()
+        else:
+            click.echo(RESULT_OK + f"{len(new_titles)} tabs renamed.")
+        del self.__dict__["_renames"]
+
+    def _rename_one_by_one(self, new_titles):
+        for worksheet in self._worksheets:
+            if worksheet.id not in new_titles:
+                continue
+            title_before = worksheet.title
+            click.echo(f"{title_before} ==> {new_titles[worksheet.id]} ", nl=False)
+            try:
+                self._update_properties(
+                    {worksheet.id: {"title": new_titles[worksheet.id]}}
+                )
+            except Exception as e:
+                click.echo(RESULT_ERROR.format(e))
+            else:
+                click.echo(RESULT_OK)
+
+    def _get_sorted_indexes(self, new_titles=None):
+        """
+        Return the indexes of tabs sorted by title alphabetically.
+
+        :param dict new_titles: titles of the tabs being renamed by sheet ID
+        :return dict: {sheet ID: index} in the order of indexes
+        """
+        new_titles = new_titles or {}
+        sorted_worksheets = sorted(
+            self._worksheets,
+            key=lambda worksheet: new_titles.get(worksheet.id, worksheet.title),
+        )
+        return {worksheet.id: i for i, worksheet in enumerate(sorted_worksheets)}
+
+    def _update_properties(self, properties):
+        """
+        Change the properties of many tabs in one batchUpdate.
+
+        :param dict properties: {sheet ID: {"title": "01", "index": 0}, ...}
+        """
+        api_payload = [
+            {
+                "updateSheetProperties": {
+                    "properties": {"sheetId": sheet_id, **sheet_properties},
+                    "fields": ",".join(sheet_properties),
                 }
-            )
+            }
+            for sheet_id, sheet_properties in properties.items()
+        ]
+        self.spreadsheet.batch_update(body={"requests": api_payload})
+        for worksheet in self._worksheets:
+            worksheet._properties.update(properties.get(worksheet.id, {}))
+
+    def reorder(self):
+        """Sort tabs in the spreadsheet by title alphabetically."""
+        indexes = self._get_sorted_indexes()
         try:
-            self.spreadsheet.batch_update(body={"requests": api_payload})
+            self._update_properties(
+                {sheet_id: {"index": index} for sheet_id, index in indexes.items()}
+            )
         except Exception as e:
             click.echo(RESULT_ERROR.format(e))
         else:
@@ -90,48 +283,51 @@ class ReceiptBook(BaseSpreadsheet):
         """Check if the prices in each tab add up correctly."""
         for receipt in self.receipts:
             click.echo(f"{receipt.worksheet.title} ==> ", nl=False)
-            try:
-                receipt.prices_are_valid(raise_exception=True)
-                discount = receipt.discount
-            except ValueError as e:
-                click.echo(RESULT_WARNING.format(e))
-                continue
-            except Exception as e:
-                click.echo(RESULT_ERROR.format(e))
-                continue
+            click.echo(receipt.validate().format_result())
 
-            if discount:
-                click.echo(
-                    RESULT_OK + f"Receipt has a discount/loyalty of {receipt.discount}."
-                )
-            else:
-                click.echo(RESULT_OK)
+    def find_duplicates(self, days=DUPLICATES_DAYS, tolerance=None):
+        """Look for likely duplicate receipts in this receipt book."""
+        self.find_duplicates_in([self], days=days, tolerance=tolerance)
 
-    def find_duplicates(self):
-        comparison_attrs = []
-        for receipt in self.receipts:
-            click.echo(f"Reading receipt {receipt.worksheet.title}")
-            try:
-                comparison_attrs.append(
-                    (
-                        receipt.date,
-                        receipt.subtotal,
-                        receipt.total,
-                        receipt.actually_paid,
-                    )
-                )
-            except (ValueError, NotImplementedError) as e:
-                click.echo(
-                    RESULT_WARNING.format(
-                        f"Receipt {receipt.worksheet.title} has wrong data and skipped from analysis: {e}"
-                    )
-                )
+    @staticmethod
+    def find_duplicates_in(receipt_books, days=DUPLICATES_DAYS, tolerance=None):
+        """
+        Look for likely duplicate receipts across the receipt books.
+
+        The receipts are compared by store, amount and date (see utils.duplicates),
+        so that a receipt copied to the next month or left in the workbook
+        after it was moved is found too.
+
+        :param Money tolerance: max difference of amounts, DUPLICATES_TOLERANCE by default
+        """
+        if tolerance is None:
+            tolerance = Money(DUPLICATES_TOLERANCE)
 
-        for attrs, count in Counter(comparison_attrs).items():
-            if count > 1:
-                click.echo(
-                    RESULT_WARNING.format(
-                        f"There are likely {count} duplicates of receipt from {attrs[0]}"
+        fingerprints = []
+        for receipt_book in receipt_books:
+            for receipt in receipt_book.receipts:
+                try:
+                    fingerprints.append(receipt.get_fingerprint())
+                except (ValueError, NotImplementedError) as e:
+                    click.echo(
+                        RESULT_WARNING.format(
+                            f"Receipt {receipt.worksheet.title} has wrong data and skipped from analysis: {e}"
+                        )
                     )
+
+        clusters = find_clusters(fingerprints, days=days, tolerance=tolerance)
+        for cluster in clusters:
+            first = cluster[0]
+            tabs = ", ".join(
+                f"{fingerprint.book} : {fingerprint.tab}" for fingerprint in cluster
+            )
+            click.echo(
+                RESULT_WARNING.format(
+                    f"There are likely {len(cluster)} duplicates of receipt from "
+                    f"{first.date or 'unknown date'} ({first.store}, {first.amount}): {tabs}"
                 )
-        click.echo(RESULT_OK.format(f"No other duplicates found."))
+            )
+        click.echo(
+            RESULT_OK + f"{len(fingerprints)} receipts analyzed. "
+            f"{len(clusters)} groups of likely duplicates found."
+        )
@@ -1,24 +1,27 @@
-import math
 from collections import defaultdict
 from datetime import date, timedelta
-from decimal import Decimal
 from typing import List, Dict, Union
 
 import click
 from attr import dataclass
 from cached_property import cached_property
-from dateutil.parser import parse
 from gspread import Worksheet, Cell
-from gspread.utils import rowcol_to_a1, a1_to_rowcol
+from gspread.utils import a1_to_rowcol
 
+from config import CLASSIFIER_RULES_FILE
 from models.base import BaseSpreadsheet
+from utils.async_api import run_concurrently
+from utils.classifier import KeywordClassifier, load_keyword_rules
+from utils.cells import coords_to_label, get_column_number, pack_coords
 from utils.constants import RESULT_WARNING, CellType
+from utils.dates import parse_cell_date
+from utils.money import Money
 
 
 TYPE_WORDS_MAPPING = {
     CellType.GROCERY: {
         "FOOD",
-        "SOBEY"
+        "SOBEY",
         "YUMMY",
         "LOBLAW",
         "WAL-MART",
@@ -67,50 +70,38 @@ TYPE_WORDS_MAPPING = {
 }
 
 
+_classifier = None
+
+
+def get_classifier():
+    """Return the classifier of transaction titles by TYPE_WORDS_MAPPING and the extra rules."""
+    global _classifier
+    if _classifier is None:
+        mapping = {
+            cell_type: set(words) for cell_type, words in TYPE_WORDS_MAPPING.items()
+        }
+        for cell_type, words in load_keyword_rules(CLASSIFIER_RULES_FILE).items():
+            mapping.setdefault(cell_type, set()).update(words)
+        _classifier = KeywordClassifier(mapping)
+    return _classifier
+
+
 @dataclass(repr=False)
 class Transaction:
     worksheet: Worksheet
     has_receipt: bool
     created: date
     title: str
-    price: Decimal
+    price: Money
     label: str
 
     @classmethod
     def from_cells(cls, worksheet: Worksheet, row: int, cells: List):
-        kwargs = dict(
-            worksheet=worksheet, label=f"{TransactionHistory.HAS_RECEIPT_COLUMN}{row}"
-        )
-        for col, cell_value in enumerate(cells, 1):
-            label = rowcol_to_a1(row, col)
-
-            try:
-                if label.startswith(TransactionHistory.HAS_RECEIPT_COLUMN):
-                    kwargs.update(has_receipt=bool(cell_value))
-
-                elif label.startswith(TransactionHistory.DATE_COLUMN):
-                    kwargs.update(created=parse(cell_value).date())
-
-                elif label.startswith(TransactionHistory.TITLE_COLUMN):
-                    kwargs.update(title=cell_value)
-
-                elif label.startswith(TransactionHistory.PRICE_COLUMN):
-                    kwargs.update(price=Decimal(cell_value))
-            except Exception:
-                raise ValueError(
-                    f"Can't convert '{cell_value}' from cell {label} ({worksheet.title}) into Transaction. "
-                    f"Transaction wasn't created."
-                )
-        return cls(**kwargs)
+        return TransactionDecoder(worksheet).decode_row(row, cells)
 
     @cached_property
     def matching_types(self) -> List[CellType]:
-        matches = []
-        for cell_type, words in TYPE_WORDS_MAPPING.items():
-            for word in words:
-                if word in self.title.upper():
-                    matches.append(cell_type)
-        return matches
+        return get_classifier().classify(self.title)
 
     @property
     def good_type(self) -> Union[CellType, None]:
@@ -130,6 +121,60 @@ class Transaction:
         return f"{self.created} - {self.title} - {self.price} ({'Y' if self.has_receipt else ' '})"
 
 
+class TransactionDecoder:
+    """
+    Converts the rows of a transaction history tab into Transactions.
+
+    The column of each field and its converter are resolved once, so each
+    row is decoded by the indexes of its cells. The rows which can't be
+    converted are collected in `errors`.
+    """
+
+    def __init__(self, worksheet: Worksheet):
+        self.worksheet = worksheet
+        self.errors = []
+        self._fields = [
+            (get_column_number(column) - 1, field, convert)
+            for column, field, convert in (
+                (TransactionHistory.HAS_RECEIPT_COLUMN, "has_receipt", bool),
+                (TransactionHistory.DATE_COLUMN, "created", parse_cell_date),
+                (TransactionHistory.TITLE_COLUMN, "title", str),
+                (TransactionHistory.PRICE_COLUMN, "price", Money.parse),
+            )
+        ]
+
+    def decode_row(self, row: int, cells: List) -> Transaction:
+        """:raise ValueError: if some cell of the row can't be converted"""
+        kwargs = {}
+        for index, field, convert in self._fields:
+            cell_value = cells[index] if index < len(cells) else ""
+            try:
+                kwargs[field] = convert(cell_value)
+            except Exception:
+                label = coords_to_label(pack_coords(row, index + 1))
+                raise ValueError(
+                    f"Can't convert '{cell_value}' from cell {label} ({self.worksheet.title}) into Transaction. "
+                    f"Transaction wasn't created."
+                )
+        return Transaction(
+            worksheet=self.worksheet,
+            label=f"{TransactionHistory.HAS_RECEIPT_COLUMN}{row}",
+            **kwargs,
+        )
+
+    def decode(self, rows: List[List], start_row: int = 1) -> List[Transaction]:
+        """Convert the rows (empty ones are skipped) starting from the row number."""
+        result = []
+        for row, cells in enumerate(rows, start_row):
+            if not any(cells):
+                continue
+            try:
+                result.append(self.decode_row(row, cells))
+            except ValueError as e:
+                self.errors.append(str(e))
+        return result
+
+
 class TransactionHistory(BaseSpreadsheet):
     """
     Represents the spreadsheet with the log of credit/debit card transactions.
@@ -146,7 +191,7 @@ class TransactionHistory(BaseSpreadsheet):
     PAYMENT_COLUMN = "E"
     TIME_COLUMN = "F"
 
-    price_match_threshold = Decimal(0.03)
+    price_match_threshold = Money.parse("0.03")
     day_match_threshold = 2
 
     @cached_property
@@ -165,32 +210,44 @@ class TransactionHistory(BaseSpreadsheet):
             "Sheet2":  [[...], [...], ...],
         }
         """
+        worksheets = list(self._tabs.values())
+        values = run_concurrently(
+            Worksheet.get_all_values,
+            *((worksheet,) for worksheet in worksheets),
+        )
         return {
-            worksheet_title: worksheet.get_all_values()
-            for worksheet_title, worksheet in self._tabs.items()
+            worksheet.title: worksheet_values
+            for worksheet, worksheet_values in zip(worksheets, values)
         }
 
     def fetch_transactions(self):
-        """Read the transactions from transaction history spreadsheet into memory."""
-        result = []
-        for worksheet_title, row_containers in self.content.items():
-            worksheet = self._tabs[worksheet_title]
-
-            for row, cells in enumerate(row_containers, 1):
-                if row == 1:
-                    continue
+        """
+        Read the transactions from transaction history spreadsheet into memory.
 
-                try:
-                    transaction = Transaction.from_cells(
-                        worksheet=worksheet, row=row, cells=cells
-                    )
-                except ValueError as e:
-                    click.echo(RESULT_WARNING.format(e))
-                    continue
+        The rows which can't be read are skipped and listed in `errors`.
+        """
+        result, self.errors = [], []
+        for worksheet_title, row_containers in self.content.items():
+            decoder = TransactionDecoder(self._tabs[worksheet_title])
+            result.extend(decoder.decode(row_containers[1:], start_row=2))
+            self.errors.extend(decoder.errors)
 
-                result.append(transaction)
+        if self.errors:
+            click.echo(
+                RESULT_WARNING.format(
+                    f"{len(self.errors)} rows were skipped, e.g. {self.errors[0]}"
+                )
+            )
         return result
 
+    def classify(self):
+        """Find the matching types of all transactions in one batch."""
+        types_by_title = get_classifier().classify_many(
+            transaction.title for transaction in self.transactions
+        )
+        for transaction in self.transactions:
+            transaction.matching_types = types_by_title[transaction.title]
+
     @cached_property
     def transactions(self) -> List[Transaction]:
         """
@@ -242,7 +299,7 @@ class TransactionHistory(BaseSpreadsheet):
 
         exact_matches = []
         for transaction in transactions:
-            if math.isclose(transaction.price, price):
+            if transaction.price == price:
                 if transaction.created > created:
                     click.echo(f"Found on the day {transaction.created}")
                 exact_matches.append(transaction)
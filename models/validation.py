@@ -0,0 +1,85 @@
+from attr import dataclass
+
+from utils.constants import RESULT_OK, RESULT_WARNING, RESULT_ERROR
+from utils.money import Money
+
+OK = "ok"
+DISCOUNT = "discount"
+MISMATCH = "mismatch"
+INVALID = "invalid"
+ERROR = "error"
+
+
+@dataclass
+class ReceiptValidation:
+    """
+    Result of the price validation of one receipt.
+
+    Statuses:
+        ok - prices add up correctly
+        discount - prices add up, but less than the total was actually paid
+        mismatch - prices don't add up, `expected` and `actual` are the amounts
+            compared, e.g. total vs subtotal + tax
+        invalid - receipt data can't be read, e.g. a price is not a number
+        error - any other failure
+    """
+
+    book: str
+    tab: str
+    status: str = OK
+    message: str = ""
+    expected: Money = None
+    actual: Money = None
+    discount: Money = None
+
+    @property
+    def suspicious(self):
+        return self.status != OK
+
+    @property
+    def difference(self):
+        if self.expected is None or self.actual is None:
+            return None
+        return self.actual - self.expected
+
+    def format_result(self):
+        """Return the colored outcome as other results in the output."""
+        if self.status == OK:
+            return RESULT_OK
+        if self.status == DISCOUNT:
+            return RESULT_OK + f"Receipt has a discount/loyalty of {self.discount}."
+        if self.status == ERROR:
+            return RESULT_ERROR.format(self.message)
+        return RESULT_WARNING.format(self.message)
+
+    def to_dict(self):
+        """
+        Return the result for JSON report, amounts are strings of dollars.
+
+        :return dict: {
+            "book": "2019-01",
+            "tab": "03",
+            "status": "mismatch",
+            "message": "Subtotal 10.00 + tax 1.30 is not equal to amount 11.50 ...",
+            "expected": "11.50",
+            "actual": "11.30",
+            "difference": "-0.20",
+            "discount": None,
+        }
+        """
+        amounts = {
+            "expected": self.expected,
+            "actual": self.actual,
+            "difference": self.difference,
+            "discount": self.discount,
+        }
+        return {
+            "book": self.book,
+            "tab": self.tab,
+            "status": self.status,
+            "message": self.message,
+            **{
+                name: None if amount is None else str(amount)
+                for name, amount in amounts.items()
+            },
+        }
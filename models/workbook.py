@@ -1,9 +1,14 @@
+from collections import defaultdict
+
 import click
-from dateutil.parser import parse
+from cached_property import cached_property
 
 from models.base import BaseSpreadsheet
 from models.receipt import Receipt
+from utils.api import quote_title
+from utils.async_api import run_concurrently
 from utils.constants import RESULT_OK, RESULT_ERROR, RESULT_WARNING
+from utils.dates import parse_title_date
 from utils.names import extract_date_string
 
 
@@ -12,25 +17,53 @@ class Workbook(BaseSpreadsheet):
     Represents the source file with unordered receipts.
     """
 
+    @cached_property
+    def _worksheets(self):
+        return self.spreadsheet.worksheets()
+
+    @cached_property
+    def _stores(self):
+        """
+        Read the store of all tabs at once.
+
+        :return dict: {sheet ID: "LOBLAWS", ...}
+        """
+        values = self.spreadsheet.client.get_values(
+            self.spreadsheet,
+            [
+                f"{quote_title(worksheet.title)}!{Receipt.STORE_CELL}"
+                for worksheet in self._worksheets
+            ],
+        )
+        return {
+            worksheet.id: cell_values[0][0] if cell_values else ""
+            for worksheet, cell_values in zip(self._worksheets, values)
+        }
+
     def move_tabs(self, one_by_one, dry=False, unambiguous_only=False):
         """
         Move each tab of the workbook to an appropriate Receipt book.
+
+        Tabs are copied to different receipt books concurrently, then all
+        copied tabs are deleted from the workbook at once.
         """
-        for worksheet in self.spreadsheet.worksheets():
-            receipt = Receipt(worksheet)
+        destinations = defaultdict(list)
+        for worksheet in self._worksheets:
             click.echo(
-                f"'{worksheet.title}' ({receipt.store}) will go to ==> ", nl=False
+                f"'{worksheet.title}' ({self._stores[worksheet.id]}) will go to ==> ",
+                nl=False,
             )
             try:
-                date = parse(extract_date_string(worksheet.title))
+                date = parse_title_date(extract_date_string(worksheet.title))
+                if date.day is None:
+                    raise ValueError(f"Date not found in title '{worksheet.title}'")
             except ValueError as e:
                 click.echo(RESULT_WARNING.format(e))
                 continue
 
             dest_filename = f"{date.year}-{date.month:02d}"
 
-            is_unambiguous = date.day > 12 or date.day == date.month
-            if unambiguous_only and not is_unambiguous:
+            if unambiguous_only and date.ambiguous:
                 click.echo(RESULT_WARNING.format("Skipped because date is ambiguous."))
                 continue
 
@@ -38,19 +71,89 @@ class Workbook(BaseSpreadsheet):
             if dry:
                 continue
 
-            is_unambiguous = date.day > 12 or date.day == date.month
-            if unambiguous_only and not is_unambiguous:
-                click.echo(RESULT_WARNING.format("Skipped because date is ambiguous."))
-                continue
-
             if not one_by_one or (one_by_one and click.confirm(f"Move?", default=True)):
+                destinations[dest_filename].append(worksheet)
+
+        if dry or not destinations:
+            return
+
+        copied = []
+        for dest_filename, results in zip(
+            destinations, self._copy_tabs(destinations.items())
+        ):
+            for worksheet, result in results:
+                click.echo(f"'{worksheet.title}' ==> '{dest_filename}' ", nl=False)
+                if isinstance(result, Exception):
+                    click.echo(RESULT_ERROR.format(result))
+                else:
+                    click.echo(f"{RESULT_OK} New title: '{result}'.")
+                    copied.append(worksheet)
+
+        if copied:
+            self._delete_tabs(copied)
+
+    def _copy_tabs(self, destinations):
+        """
+        Copy the tabs to their destinations, concurrently across destinations.
+
+        :param list destinations: [("2017-11", [worksheet, ...]), ...]
+        :return list: [(worksheet, new title or exception), ...] for each destination
+        """
+        client = self.spreadsheet.client
+
+        def copy(dest_filename, worksheets):
+            results = []
+            for worksheet in worksheets:
                 try:
-                    new_title = self.spreadsheet.client.copy_worksheet_to(
+                    new_title = client.copy_worksheet_to(
                         worksheet=worksheet, dest_filename=dest_filename
                     )
-                    self.spreadsheet.del_worksheet(worksheet)
                 except Exception as e:
-                    result_msg = RESULT_ERROR.format(e)
+                    results.append((worksheet, e))
                 else:
-                    result_msg = f"{RESULT_OK} New title: '{new_title}'."
-                click.echo(result_msg)
+                    results.append((worksheet, new_title))
+            return results
+
+        return run_concurrently(copy, *destinations)
+
+    def _delete_tabs(self, worksheets):
+        """
+        Delete the tabs from the workbook in one batchUpdate.
+
+        If it fails, the tabs are deleted one by one, so the ones which can be
+        deleted aren't copied again by the next run.
+        """
+        try:
+            self._send_deletes(worksheets)
+        except Exception as e:
+            click.echo(RESULT_WARNING.format(f"Copied tabs were not deleted: {e}"))
+            click.echo("Deleting copied tabs one by one...")
+            deleted = self._delete_one_by_one(worksheets)
+        else:
+            deleted = worksheets
+
+        deleted_ids = {worksheet.id for worksheet in deleted}
+        self._worksheets = [
+            worksheet
+            for worksheet in self._worksheets
+            if worksheet.id not in deleted_ids
+        ]
+
+    def _delete_one_by_one(self, worksheets):
+        deleted = []
+        for worksheet in worksheets:
+            click.echo(f"Deleting '{worksheet.title}' ", nl=False)
+            try:
+                self._send_deletes([worksheet])
+            except Exception as e:
+                click.echo(RESULT_ERROR.format(e))
+            else:
+                click.echo(RESULT_OK)
+                deleted.append(worksheet)
+        return deleted
+
+    def _send_deletes(self, worksheets):
+        api_payload = [
+            {"deleteSheet": {"sheetId": worksheet.id}} for worksheet in worksheets
+        ]
+        self.spreadsheet.batch_update(body={"requests": api_payload})
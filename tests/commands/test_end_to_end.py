@@ -0,0 +1,183 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest import TestCase, mock
+
+from click.testing import CliRunner
+from gspread.utils import rowcol_to_a1
+
+from gsheets import cli
+from tests.fake_google.generators import populate
+from tests.fake_google.server import FakeGoogleServer, make_client
+from utils.api import QuotaCompliantClient
+
+
+class EndToEndTestCase(TestCase):
+    """Run the commands against the fake Google Sheets server."""
+
+    def setUp(self):
+        self.server = FakeGoogleServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.google = self.server.google
+        self.receipt_books = populate(self.google, tabs=3, lines=4)
+
+        patcher = mock.patch("utils.api._client", make_client(self.server))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def invoke(self, *args, input="y\n"):
+        result = CliRunner().invoke(cli, args, input=input)
+        self.assertIsNone(result.exception, result.output)
+        return result.output
+
+    def test_validate(self):
+        output = self.invoke("validate", *self.receipt_books)
+        self.assertIn("3 receipts analyzed. 0 suspicious found", output)
+
+    def test_validate_report(self):
+        sheet = self.google.get_spreadsheet(self.receipt_books[0]).sheets[0]
+        total = sheet.cells[max(coords for coords in sheet.cells if coords[1] == 3)]
+        total["value"] = str(Decimal(total["value"]) + 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report.ndjson")
+            output = self.invoke(
+                "validate",
+                "--jobs",
+                "2",
+                *self.receipt_books,
+                "Missing",
+                "--report",
+                path,
+            )
+            with open(path) as file:
+                report = [json.loads(line) for line in file]
+
+        self.assertIn("'Missing' not found", output)
+        self.assertIn("3 receipts analyzed. 1 suspicious found", output)
+        self.assertEqual(len(report), 3)
+        mismatch = next(result for result in report if result["status"] != "ok")
+        self.assertEqual(mismatch["status"], "mismatch")
+        self.assertEqual(mismatch["tab"], sheet.title)
+        self.assertEqual(mismatch["difference"], "-1.00")
+
+    def test_find_duplicates(self):
+        sheet = self.google.get_spreadsheet(self.receipt_books[0]).sheets[0]
+        cells = {
+            rowcol_to_a1(row + 1, col + 1): cell
+            for (row, col), cell in sheet.cells.items()
+        }
+        self.google.add_spreadsheet("Scans", {f"2019/01/{sheet.title}": cells})
+
+        output = self.invoke("find-duplicates", *self.receipt_books, "Scans")
+        self.assertIn("There are likely 2 duplicates", output)
+        self.assertIn(f"Scans : 2019/01/{sheet.title}", output)
+        self.assertIn("4 receipts analyzed. 1 groups", output)
+
+    def test_mark_transactions(self):
+        output = self.invoke(
+            "mark-transactions", *self.receipt_books, "Transactions 2019"
+        )
+        self.assertEqual(output.count("Found."), 3)
+
+        rows = self.google.get_values("Transactions 2019", "2019")
+        self.assertEqual(sum(1 for row in rows[1:] if row and row[0]), 3)
+
+    def test_receipts_to_billing(self):
+        self.invoke("receipts-to-billing", self.receipt_books[0], "Billing 2019")
+
+        spreadsheet = self.google.get_spreadsheet("Billing 2019")
+        january = spreadsheet.get_sheet(title="January")
+        formulas = [
+            cell["value"]
+            for (row, col), cell in january.cells.items()
+            if col >= 4 and cell.get("value")
+        ]
+        self.assertTrue(formulas)
+        self.assertTrue(all(formula.startswith("=") for formula in formulas))
+
+        billing_reads = [
+            query["ranges"]
+            for kind, query in self.google.log
+            if kind == "get" and "'January'!E14:AI14" in query.get("ranges", [])
+        ]
+        self.assertEqual(len(billing_reads), 1)
+        self.assertTrue(all(r.startswith("'January'!E") for r in billing_reads[0]))
+        whole_tab_reads = [
+            query
+            for _, query in self.google.log
+            if query.get("ranges") == ["'January'"]
+        ]
+        self.assertEqual(whole_tab_reads, [])
+
+    def test_normalize(self):
+        self.google.add_spreadsheet(
+            "2019-03", {"Copy of 2019/03/05": {}, "07": {}, "2019/03/02 PM": {}}
+        )
+        output = self.invoke("normalize", "2019-03", "--reorder")
+
+        titles = [
+            sheet.title for sheet in self.google.get_spreadsheet("2019-03").sheets
+        ]
+        self.assertEqual(titles, ["02", "05", "07"])
+        self.assertIn("2 tabs renamed", output)
+        self.assertEqual(self.google.requests["batchUpdate"], 1)
+
+    def test_normalize_reports_failed_renames(self):
+        self.google.add_spreadsheet(
+            "2019-03", {"2019/03/05": {}, "05": {}, "2019/03/02": {}}
+        )
+        output = self.invoke("normalize", "2019-03")
+
+        titles = [
+            sheet.title for sheet in self.google.get_spreadsheet("2019-03").sheets
+        ]
+        self.assertEqual(titles, ["2019/03/05", "05", "02"])
+        self.assertIn("2019/03/05 ==> 05 ERROR:", output)
+        self.assertIn("2019/03/02 ==> 02 OK.", output)
+
+    def test_move_from_workbook(self):
+        self.invoke("move-from-workbook", "Workbook")
+
+        workbook = self.google.get_spreadsheet("Workbook")
+        destination = self.google.get_spreadsheet("2019-02")
+        self.assertEqual(workbook.sheets, [])
+        self.assertEqual(len(destination.sheets), 4)
+        self.assertEqual(self.google.requests["values"], 1)
+        self.assertEqual(self.google.requests["copyTo"], 3)
+        self.assertEqual(self.google.requests["batchUpdate"], 1)
+
+    def test_move_from_workbook_deletes_tabs_one_by_one(self):
+        workbook = self.google.get_spreadsheet("Workbook")
+        removed = workbook.sheets[0]
+        copy_worksheet_to = QuotaCompliantClient.copy_worksheet_to
+
+        def copy_and_remove(client, worksheet, dest_filename):
+            new_title = copy_worksheet_to(client, worksheet, dest_filename)
+            if worksheet.id == removed.sheet_id:
+                # the tab is deleted by someone else in the meantime
+                workbook.sheets.remove(removed)
+            return new_title
+
+        with mock.patch.object(
+            QuotaCompliantClient, "copy_worksheet_to", copy_and_remove
+        ):
+            output = self.invoke("move-from-workbook", "Workbook")
+
+        self.assertEqual(workbook.sheets, [])
+        self.assertIn("Deleting copied tabs one by one...", output)
+        self.assertIn(f"Deleting '{removed.title}' ERROR:", output)
+        deleted = [
+            line
+            for line in output.splitlines()
+            if line.startswith("Deleting '") and line.endswith("OK. ")
+        ]
+        self.assertEqual(len(deleted), 2)
+        self.assertEqual(self.google.requests["batchUpdate"], 4)
+
+    def test_rate_limited_requests_are_retried(self):
+        self.google.quota, self.google.quota_period = 2, 1
+        output = self.invoke("validate", *self.receipt_books)
+        self.assertIn("3 receipts analyzed", output)
+        self.assertGreater(self.google.rejected, 0)
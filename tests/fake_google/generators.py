@@ -0,0 +1,180 @@
+"""Synthetic spreadsheets in the layouts gsheet_tools works with."""
+
+import calendar
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from attr import asdict
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+
+from models.month_billing import MonthBilling
+from models.receipt import Receipt
+from models.transaction import TransactionHistory
+from utils.constants import HST, CellType
+
+GOODS = {
+    CellType.GROCERY: ["BREAD", "MILK 2%", "BANANAS", "EGGS LARGE", "CHEDDAR"],
+    CellType.HOUSEKEEPING: ["PAPER TOWEL", "DISH SOAP", "BLEACH"],
+    CellType.TAKEOUTS: ["SUSHI ROLL", "COFFEE", "SANDWICH"],
+    CellType.DRUGS: ["ADVIL", "VITAMIN D"],
+}
+STORES = ["LOBLAWS", "NOFRILLS", "METRO", "SHOPPERS", "DOLLARAMA"]
+
+
+def color(cell_type):
+    return asdict(cell_type.value)
+
+
+def generate_receipt(rng, lines=10):
+    """
+    Return the cells of a normalized receipt tab and its total.
+
+    The names are in B column marked with the category color, prices are in D,
+    followed by colored subtotal, tax and total.
+    """
+    cells = {
+        "A1": {"value": "Line"},
+        "B1": {"value": "Name"},
+        "D1": {"value": "Price"},
+        Receipt.STORE_CELL: {"value": rng.choice(STORES)},
+    }
+    _, name_col = a1_to_rowcol(f"{Receipt.NAME_COLUMN}1")
+    _, price_col = a1_to_rowcol(f"{Receipt.PRICE_COLUMN}1")
+
+    subtotal = Decimal(0)
+    row = 3
+    for _ in range(lines):
+        good_type = rng.choice(list(GOODS))
+        price = Decimal(rng.randint(50, 4000)) / 100
+        subtotal += price
+        cells[rowcol_to_a1(row, 1)] = {"value": str(row - 2)}
+        cells[rowcol_to_a1(row, name_col)] = {
+            "value": rng.choice(GOODS[good_type]),
+            "color": color(good_type),
+        }
+        cells[rowcol_to_a1(row, price_col)] = {"value": str(price)}
+        row += 1
+
+    tax = (subtotal * HST).quantize(Decimal("0.01"))
+    total = subtotal + tax
+    for cell_type, amount in (
+        (CellType.SUBTOTAL, subtotal),
+        (CellType.TAX, tax),
+        (CellType.TOTAL, total),
+    ):
+        row += 1
+        cells[rowcol_to_a1(row, name_col)] = {"value": cell_type.name}
+        cells[rowcol_to_a1(row, price_col)] = {
+            "value": str(amount),
+            "color": color(cell_type),
+        }
+    return cells, total
+
+
+def generate_receipt_book(rng, year, month, tabs=10, lines=10):
+    """
+    Return normalized receipt book tabs and the receipts' (date, total).
+
+    :return tuple: ({"01": cells, "03": cells, ...}, [(date(2019, 1, 1), Decimal("12.34")), ...])
+    """
+    days = sorted(rng.sample(range(1, calendar.monthrange(year, month)[1] + 1), tabs))
+    sheets, totals = {}, []
+    for day in days:
+        sheets[f"{day:02d}"], total = generate_receipt(rng, lines=lines)
+        totals.append((date(year, month, day), total))
+    return sheets, totals
+
+
+def generate_billing_book():
+    """Return the tabs of an empty annual billing book."""
+    sheets = {}
+    for month in range(1, 13):
+        cells = {"A1": {"value": calendar.month_name[month]}}
+        for cell_type, row in MonthBilling.CATEGORY_ROWS.items():
+            cells[f"A{row}"] = {"value": cell_type.name.title()}
+        sheets[calendar.month_name[month]] = cells
+    return sheets
+
+
+def generate_transaction_history(rng, year, receipts=(), extra=100):
+    """
+    Return the transaction history tab with the receipts' transactions and random ones.
+
+    :param list receipts: [(date(2019, 1, 1), Decimal("12.34")), ...]
+    """
+    transactions = list(receipts)
+    start = date(year, 1, 1)
+    for _ in range(extra):
+        created = start + timedelta(days=rng.randrange(365))
+        transactions.append((created, Decimal(rng.randint(100, 20000)) / 100))
+    transactions.sort()
+
+    columns = {
+        column: a1_to_rowcol(f"{column}1")[1]
+        for column in (
+            TransactionHistory.HAS_RECEIPT_COLUMN,
+            TransactionHistory.DATE_COLUMN,
+            TransactionHistory.TITLE_COLUMN,
+            TransactionHistory.PRICE_COLUMN,
+        )
+    }
+    cells = {
+        f"{TransactionHistory.DATE_COLUMN}1": {"value": "Date"},
+        f"{TransactionHistory.TITLE_COLUMN}1": {"value": "Title"},
+        f"{TransactionHistory.PRICE_COLUMN}1": {"value": "Price"},
+    }
+    for row, (created, price) in enumerate(transactions, 2):
+        for column, value in (
+            (TransactionHistory.DATE_COLUMN, created.isoformat()),
+            (TransactionHistory.TITLE_COLUMN, f"POS {rng.choice(STORES)} #{row}"),
+            (TransactionHistory.PRICE_COLUMN, str(price)),
+        ):
+            cells[rowcol_to_a1(row, columns[column])] = {"value": value}
+    return {str(year): cells}
+
+
+def generate_workbook(rng, year, month, tabs=10, lines=10):
+    """Return the workbook tabs with unsorted receipts titled like '22.11.2017'."""
+    sheets = {}
+    days = calendar.monthrange(year, month)[1]
+    while len(sheets) < tabs:
+        day = rng.randint(13, days)
+        title = f"{day:02d}.{month:02d}.{year}"
+        if len(sheets) % 2:
+            title = f"Copy of {title}"
+        if title not in sheets:
+            sheets[title], _ = generate_receipt(rng, lines=lines)
+    return sheets
+
+
+def populate(google, seed=0, year=2019, months=(1,), tabs=10, lines=10):
+    """
+    Create the set of spreadsheets for all commands on the fake server.
+
+    Receipt books "2019-01", ..., workbook "Workbook", billing "Billing 2019",
+    history "Transactions 2019" and empty month receipt books for moved tabs.
+
+    :return list: titles of receipt books
+    """
+    rng = random.Random(seed)
+    receipt_books, all_totals = [], []
+    for month in months:
+        title = f"{year}-{month:02d}"
+        sheets, totals = generate_receipt_book(rng, year, month, tabs=tabs, lines=lines)
+        google.add_spreadsheet(title, sheets)
+        receipt_books.append(title)
+        all_totals.extend(totals)
+
+    google.add_spreadsheet(f"Billing {year}", generate_billing_book())
+    google.add_spreadsheet(
+        f"Transactions {year}",
+        generate_transaction_history(rng, year, receipts=all_totals),
+    )
+
+    workbook_month = max(months) % 12 + 1
+    google.add_spreadsheet(
+        "Workbook", generate_workbook(rng, year, workbook_month, tabs=tabs, lines=lines)
+    )
+    google.add_spreadsheet(f"{year}-{workbook_month:02d}", {"Sheet1": {}})
+    return receipt_books
@@ -0,0 +1,89 @@
+import ast
+import operator
+import re
+
+from gspread.utils import a1_to_rowcol
+
+CELL_PATTERN = re.compile(r"^([A-Z]*)(\d*)$")
+
+
+def split_range(a1_range):
+    """
+    Split A1 range into the tab title and the cells part.
+
+    :return tuple: "'Bob''s'!A1:D" ==> ("Bob's", "A1:D"), "Sheet1" ==> ("Sheet1", "")
+    """
+    if a1_range.startswith("'"):
+        end = 1
+        while True:
+            end = a1_range.index("'", end)
+            if a1_range[end + 1 : end + 2] == "'":
+                end += 2
+                continue
+            break
+        title = a1_range[1:end].replace("''", "'")
+        rest = a1_range[end + 1 :]
+        return title, rest[1:] if rest.startswith("!") else rest
+
+    title, _, cells = a1_range.partition("!")
+    return title, cells
+
+
+def column_to_index(letters):
+    _, col = a1_to_rowcol(f"{letters}1")
+    return col - 1
+
+
+def parse_cells(cells):
+    """
+    Parse the cells part of A1 range into 0-based half-open bounds.
+
+    None means the range is unbounded from that side.
+
+    :return tuple: "B2:D" ==> (1, None, 1, 4), "G2" ==> (1, 2, 6, 7), "" ==> whole tab
+    """
+    if not cells:
+        return 0, None, 0, None
+
+    start, _, end = cells.partition(":")
+    end = end or start
+    start_letters, start_digits = CELL_PATTERN.match(start.upper()).groups()
+    end_letters, end_digits = CELL_PATTERN.match(end.upper()).groups()
+
+    start_row = int(start_digits) - 1 if start_digits else 0
+    end_row = int(end_digits) if end_digits else None
+    start_col = column_to_index(start_letters) if start_letters else 0
+    end_col = column_to_index(end_letters) + 1 if end_letters else None
+    return start_row, end_row, start_col, end_col
+
+
+OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+def evaluate_formula(formula):
+    """Evaluate an arithmetic formula like "=1.23+4.56-0.5"."""
+
+    def evaluate(node):
+        if isinstance(node, ast.Expression):
+            return evaluate(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            return OPERATORS[type(node.op)](evaluate(node.left), evaluate(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+            return OPERATORS[type(node.op)](evaluate(node.operand))
+        raise ValueError(f"Unsupported formula {formula}")
+
+    return evaluate(ast.parse(formula.lstrip("="), mode="eval"))
+
+
+def format_number(number):
+    """Format the number the way Sheets does it with the default format."""
+    return "%.10g" % round(number, 10)
@@ -0,0 +1,584 @@
+"""
+Local stand-in for the subset of Google Sheets v4 and Drive v3 APIs used by gsheet_tools.
+
+Supported endpoints:
+    GET  drive/v3/files                          - spreadsheets listing
+    GET  drive/v3/files/{id}                     - version and modifiedTime
+    GET  v4/spreadsheets/{id}                    - metadata, grid data with ranges/fields
+    GET  v4/spreadsheets/{id}/values/{range}     - values
+    GET  v4/spreadsheets/{id}/values:batchGet    - values of many ranges
+    PUT  v4/spreadsheets/{id}/values/{range}     - update values
+    POST v4/spreadsheets/{id}:batchUpdate        - updateCells, updateSheetProperties, deleteSheet
+    POST v4/spreadsheets/{id}/sheets/{id}:copyTo - copy a tab to another spreadsheet
+
+    with FakeGoogleServer(latency=0.05, quota=100) as server:
+        server.add_spreadsheet("2019-01", {"01": {"B2": {"value": "Bread"}}})
+        client = make_client(server)
+"""
+
+import json
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from gspread.utils import a1_to_rowcol
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from utils.api import QuotaCompliantClient
+from utils.cache import ResponseCache
+from utils.drive_index import SpreadsheetIndex
+from utils.rate_limit import RateLimiter
+from utils.receipt_store import ReceiptStore
+from utils.stats import get_endpoint_kind
+from tests.fake_google.ranges import (
+    evaluate_formula,
+    format_number,
+    parse_cells,
+    split_range,
+)
+
+SHEETS_HOST = "https://sheets.googleapis.com"
+DRIVE_HOST = "https://www.googleapis.com"
+
+
+class FakeSheet:
+    def __init__(self, sheet_id, title, cells=None):
+        self.sheet_id = sheet_id
+        self.title = title
+        # {(row, col): {"value": "=1+2", "note": "Blah", "color": {"red": 1}}}, 0-based
+        self.cells = cells or {}
+
+    @property
+    def size(self):
+        rows = max((row for row, _ in self.cells), default=-1) + 1
+        cols = max((col for _, col in self.cells), default=-1) + 1
+        return rows, cols
+
+    def copy(self, sheet_id, title):
+        cells = {coords: dict(cell) for coords, cell in self.cells.items()}
+        return FakeSheet(sheet_id, title, cells)
+
+
+class FakeSpreadsheet:
+    def __init__(self, spreadsheet_id, title):
+        self.id = spreadsheet_id
+        self.title = title
+        self.sheets = []
+        self.version = 1
+        self.modified = datetime.now(timezone.utc)
+
+    def touch(self):
+        self.version += 1
+        self.modified = datetime.now(timezone.utc)
+
+    def get_sheet(self, title=None, sheet_id=None):
+        for sheet in self.sheets:
+            if sheet.title == title or sheet.sheet_id == sheet_id:
+                return sheet
+        raise ApiError(400, f"Unable to parse range: {title or sheet_id}")
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def get_formatted_value(value):
+    if value.startswith("="):
+        return format_number(evaluate_formula(value))
+    return value
+
+
+def get_user_entered_value(value):
+    if value.startswith("="):
+        return {"formulaValue": value}
+    try:
+        return {"numberValue": float(value.replace(",", ""))}
+    except ValueError:
+        return {"stringValue": value}
+
+
+def from_extended_value(extended_value):
+    if "formulaValue" in extended_value:
+        return extended_value["formulaValue"]
+    if "numberValue" in extended_value:
+        return format_number(extended_value["numberValue"])
+    if "boolValue" in extended_value:
+        return str(extended_value["boolValue"]).upper()
+    return extended_value.get("stringValue", "")
+
+
+class FakeGoogle:
+    """State of the fake Drive with the spreadsheets, served by FakeGoogleServer."""
+
+    def __init__(self, latency=0, quota=None, quota_period=100):
+        self.latency = latency
+        self.quota = quota
+        self.quota_period = quota_period
+        self.spreadsheets = {}
+        self.requests = Counter()
+        # [(endpoint kind, query params), ...] in the order of the requests
+        self.log = []
+        self.rejected = 0
+        self._lock = threading.RLock()
+        self._calls = {"read": deque(), "write": deque()}
+        self._next_id = 1
+
+    def _generate_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def add_spreadsheet(self, title, sheets):
+        """
+        Add a spreadsheet with the tabs.
+
+        :param dict sheets: {
+            "01": {
+                "B2": {"value": "Bread", "color": {"red": 1}, "note": "Organic"},
+                ...
+            }
+        }
+        """
+        with self._lock:
+            spreadsheet = FakeSpreadsheet(f"spreadsheet-{self._generate_id()}", title)
+            for sheet_title, cells in sheets.items():
+                spreadsheet.sheets.append(
+                    FakeSheet(
+                        self._generate_id(),
+                        sheet_title,
+                        {
+                            tuple(x - 1 for x in a1_to_rowcol(label)): dict(cell)
+                            for label, cell in cells.items()
+                        },
+                    )
+                )
+            self.spreadsheets[spreadsheet.id] = spreadsheet
+            return spreadsheet
+
+    def get_spreadsheet(self, title):
+        for spreadsheet in self.spreadsheets.values():
+            if spreadsheet.title == title:
+                return spreadsheet
+        raise KeyError(title)
+
+    def get_values(self, title, sheet_title, formatted=True):
+        """Return the values of the tab like get_all_values() does."""
+        spreadsheet = self.get_spreadsheet(title)
+        sheet = spreadsheet.get_sheet(title=sheet_title)
+        return self._values(sheet, "", formatted=formatted)["values"]
+
+    def handle(self, method, path, query, body):
+        """Dispatch the request, return (status, headers, payload)."""
+        time.sleep(self.latency)
+        url = (DRIVE_HOST if path.startswith("/drive") else SHEETS_HOST) + path
+        kind = get_endpoint_kind(method, url)
+        with self._lock:
+            self.requests[kind] += 1
+            self.log.append((kind, query))
+            self._check_quota("read" if method == "GET" else "write")
+
+            parts = [unquote(part) for part in path.strip("/").split("/")]
+            if parts[:3] == ["drive", "v3", "files"]:
+                if len(parts) == 3:
+                    return self._list_files(query)
+                return self._get_file(parts[3])
+
+            if parts[:2] != ["v4", "spreadsheets"]:
+                raise ApiError(404, f"Unknown endpoint {path}")
+
+            spreadsheet_id, _, action = parts[2].partition(":")
+            spreadsheet = self.spreadsheets.get(spreadsheet_id)
+            if spreadsheet is None:
+                raise ApiError(404, f"Requested entity was not found: {spreadsheet_id}")
+
+            if len(parts) == 3 and action == "batchUpdate":
+                return self._batch_update(spreadsheet, body)
+            if len(parts) == 3 and method == "GET":
+                return self._get_spreadsheet(spreadsheet, query)
+            if parts[3] == "sheets" and parts[4].endswith(":copyTo"):
+                sheet_id = int(parts[4].split(":")[0])
+                return self._copy_to(spreadsheet, sheet_id, body)
+            if parts[3] == "values:batchGet":
+                return {
+                    "spreadsheetId": spreadsheet.id,
+                    "valueRanges": [
+                        self._get_values(spreadsheet, a1_range, query)
+                        for a1_range in query.get("ranges", [])
+                    ],
+                }
+            if parts[3] == "values" and method == "GET":
+                return self._get_values(spreadsheet, "/".join(parts[4:]), query)
+            if parts[3] == "values" and method == "PUT":
+                return self._update_values(spreadsheet, "/".join(parts[4:]), body)
+
+        raise ApiError(404, f"Unknown endpoint {method} {path}")
+
+    def _check_quota(self, kind):
+        if not self.quota:
+            return
+        now = time.monotonic()
+        calls = self._calls[kind]
+        while calls and now - calls[0] >= self.quota_period:
+            calls.popleft()
+        if len(calls) >= self.quota:
+            self.rejected += 1
+            retry_after = self.quota_period - (now - calls[0])
+            raise ApiError(
+                429,
+                "Quota exceeded",
+                headers={"Retry-After": str(max(1, round(retry_after)))},
+            )
+        calls.append(now)
+
+    def _list_files(self, query):
+        page_size = int(query.get("pageSize", ["100"])[0])
+        offset = int(query.get("pageToken", ["0"])[0] or 0)
+        spreadsheets = list(self.spreadsheets.values())
+        page = spreadsheets[offset : offset + page_size]
+        result = {"files": [{"id": s.id, "name": s.title} for s in page]}
+        if offset + page_size < len(spreadsheets):
+            result["nextPageToken"] = str(offset + page_size)
+        return result
+
+    def _get_file(self, spreadsheet_id):
+        spreadsheet = self.spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            raise ApiError(404, f"File not found: {spreadsheet_id}")
+        return {
+            "version": str(spreadsheet.version),
+            "modifiedTime": spreadsheet.modified.isoformat(),
+        }
+
+    @staticmethod
+    def _sheet_properties(sheet, index):
+        rows, cols = sheet.size
+        return {
+            "sheetId": sheet.sheet_id,
+            "title": sheet.title,
+            "index": index,
+            "sheetType": "GRID",
+            "gridProperties": {
+                "rowCount": max(rows, 1000),
+                "columnCount": max(cols, 26),
+            },
+        }
+
+    def _get_spreadsheet(self, spreadsheet, query):
+        fields = query.get("fields", [""])[0]
+        include_grid = query.get("includeGridData", ["false"])[0] == "true"
+        ranges = query.get("ranges", [])
+
+        if not include_grid and "data" not in fields:
+            return {
+                "spreadsheetId": spreadsheet.id,
+                "properties": {"title": spreadsheet.title},
+                "sheets": [
+                    {"properties": self._sheet_properties(sheet, index)}
+                    for index, sheet in enumerate(spreadsheet.sheets)
+                ],
+            }
+
+        sheets = []
+        if not ranges:
+            ranges = [f"'{sheet.title}'" for sheet in spreadsheet.sheets]
+        for a1_range in ranges:
+            title, cells = split_range(a1_range)
+            sheet = spreadsheet.get_sheet(title=title)
+            index = spreadsheet.sheets.index(sheet)
+            if not sheets or sheets[-1]["properties"]["sheetId"] != sheet.sheet_id:
+                sheets.append(
+                    {"properties": self._sheet_properties(sheet, index), "data": []}
+                )
+            sheets[-1]["data"].append(self._grid_data(sheet, cells, fields))
+        return {"spreadsheetId": spreadsheet.id, "sheets": sheets}
+
+    @staticmethod
+    def _grid_data(sheet, cells, fields):
+        start_row, end_row, start_col, end_col = parse_cells(cells)
+        rows, cols = sheet.size
+        end_row = rows if end_row is None else min(end_row, rows)
+        end_col = cols if end_col is None else min(end_col, cols)
+
+        row_data = []
+        for row in range(start_row, end_row):
+            values = []
+            for col in range(start_col, end_col):
+                cell = sheet.cells.get((row, col), {})
+                cell_data = {}
+                value = cell.get("value", "")
+                if value and (not fields or "formattedValue" in fields):
+                    cell_data["formattedValue"] = get_formatted_value(value)
+                if value and (not fields or "userEnteredValue" in fields):
+                    cell_data["userEnteredValue"] = get_user_entered_value(value)
+                if cell.get("color") and (not fields or "userEnteredFormat" in fields):
+                    cell_data["userEnteredFormat"] = {"backgroundColor": cell["color"]}
+                if cell.get("note") and (not fields or "note" in fields):
+                    cell_data["note"] = cell["note"]
+                values.append(cell_data)
+
+            while values and not values[-1]:
+                values.pop()
+            row_data.append({"values": values} if values else {})
+
+        while row_data and not row_data[-1]:
+            row_data.pop()
+
+        result = {"rowData": row_data}
+        if start_row:
+            result["startRow"] = start_row
+        if start_col:
+            result["startColumn"] = start_col
+        return result
+
+    def _values(self, sheet, cells, formatted=True):
+        start_row, end_row, start_col, end_col = parse_cells(cells)
+        rows, cols = sheet.size
+        end_row = rows if end_row is None else min(end_row, rows)
+        end_col = cols if end_col is None else min(end_col, cols)
+
+        values = []
+        for row in range(start_row, end_row):
+            row_values = []
+            for col in range(start_col, end_col):
+                value = sheet.cells.get((row, col), {}).get("value", "")
+                row_values.append(get_formatted_value(value) if formatted else value)
+            while row_values and not row_values[-1]:
+                row_values.pop()
+            values.append(row_values)
+        while values and not values[-1]:
+            values.pop()
+        return {"majorDimension": "ROWS", "values": values}
+
+    def _get_values(self, spreadsheet, a1_range, query):
+        title, cells = split_range(a1_range)
+        sheet = spreadsheet.get_sheet(title=title)
+        render = query.get("valueRenderOption", ["FORMATTED_VALUE"])[0]
+        result = self._values(sheet, cells, formatted=render != "FORMULA")
+        result["range"] = a1_range
+        if not result["values"]:
+            del result["values"]
+        return result
+
+    def _update_values(self, spreadsheet, a1_range, body):
+        title, cells = split_range(a1_range)
+        sheet = spreadsheet.get_sheet(title=title)
+        start_row, _, start_col, _ = parse_cells(cells)
+        for row, row_values in enumerate(body.get("values", []), start_row):
+            for col, value in enumerate(row_values, start_col):
+                self._set_cell(sheet, row, col, value=str(value))
+        spreadsheet.touch()
+        return {"spreadsheetId": spreadsheet.id, "updatedRange": a1_range}
+
+    @staticmethod
+    def _set_cell(sheet, row, col, **changes):
+        cell = sheet.cells.setdefault((row, col), {})
+        cell.update(changes)
+        if not any(cell.values()):
+            del sheet.cells[row, col]
+
+    def _batch_update(self, spreadsheet, body):
+        # the requests are applied all together or not at all
+        sheets = list(spreadsheet.sheets)
+        states = [
+            (
+                sheet,
+                sheet.title,
+                {coords: dict(cell) for coords, cell in sheet.cells.items()},
+            )
+            for sheet in sheets
+        ]
+        try:
+            return self._apply_requests(spreadsheet, body)
+        except ApiError:
+            spreadsheet.sheets = sheets
+            for sheet, title, cells in states:
+                sheet.title, sheet.cells = title, cells
+            raise
+
+    def _apply_requests(self, spreadsheet, body):
+        replies = []
+        for request in body.get("requests", []):
+            if not isinstance(request, dict):
+                raise ApiError(400, "Invalid JSON payload: requests must be objects")
+
+            if "updateCells" in request:
+                self._update_cells(spreadsheet, request["updateCells"])
+            elif "updateSheetProperties" in request:
+                self._update_sheet_properties(
+                    spreadsheet, request["updateSheetProperties"]
+                )
+            elif "deleteSheet" in request:
+                sheet = spreadsheet.get_sheet(
+                    sheet_id=request["deleteSheet"]["sheetId"]
+                )
+                spreadsheet.sheets.remove(sheet)
+            else:
+                raise ApiError(400, f"Unsupported request {list(request)}")
+            replies.append({})
+
+        spreadsheet.touch()
+        return {"spreadsheetId": spreadsheet.id, "replies": replies}
+
+    def _update_cells(self, spreadsheet, request):
+        grid_range = request["range"]
+        sheet = spreadsheet.get_sheet(sheet_id=grid_range["sheetId"])
+        fields = request["fields"].split(",")
+        start_row = grid_range.get("startRowIndex", 0)
+        start_col = grid_range.get("startColumnIndex", 0)
+        for row, row_data in enumerate(request.get("rows", []), start_row):
+            for col, cell_data in enumerate(row_data.get("values", []), start_col):
+                changes = {}
+                if "userEnteredValue" in fields:
+                    changes["value"] = from_extended_value(
+                        cell_data.get("userEnteredValue", {})
+                    )
+                if "note" in fields:
+                    changes["note"] = cell_data.get("note", "")
+                self._set_cell(sheet, row, col, **changes)
+
+    def _update_sheet_properties(self, spreadsheet, request):
+        properties = request["properties"]
+        sheet = spreadsheet.get_sheet(sheet_id=properties["sheetId"])
+        fields = request["fields"].split(",")
+        if "title" in fields:
+            if any(
+                other.title == properties["title"] and other is not sheet
+                for other in spreadsheet.sheets
+            ):
+                raise ApiError(
+                    400,
+                    f"A sheet with the name \"{properties['title']}\" already exists.",
+                )
+            sheet.title = properties["title"]
+        if "index" in fields:
+            spreadsheet.sheets.remove(sheet)
+            spreadsheet.sheets.insert(properties["index"], sheet)
+
+    def _copy_to(self, spreadsheet, sheet_id, body):
+        sheet = spreadsheet.get_sheet(sheet_id=sheet_id)
+        destination = self.spreadsheets.get(body["destinationSpreadsheetId"])
+        if destination is None:
+            raise ApiError(404, "Destination spreadsheet not found")
+
+        titles = {s.title for s in destination.sheets}
+        title, i = f"Copy of {sheet.title}", 1
+        while title in titles:
+            i += 1
+            title = f"Copy {i} of {sheet.title}"
+
+        copy = sheet.copy(self._generate_id(), title)
+        destination.sheets.append(copy)
+        destination.touch()
+        return self._sheet_properties(copy, len(destination.sheets) - 1)
+
+
+class FakeGoogleServer:
+    """HTTP server running FakeGoogle in a background thread."""
+
+    def __init__(self, latency=0, quota=None, quota_period=100):
+        self.google = FakeGoogle(
+            latency=latency, quota=quota, quota_period=quota_period
+        )
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def __getattr__(self, name):
+        return getattr(self.google, name)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        google = self.google
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self):
+                url = urlsplit(self.path)
+                query = parse_qs(url.query, keep_blank_values=True)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                headers = {}
+                try:
+                    status, payload = 200, google.handle(
+                        self.command, url.path, query, body
+                    )
+                except ApiError as e:
+                    status, headers = e.status, e.headers
+                    payload = {"error": {"code": e.status, "message": str(e)}}
+
+                content = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class RedirectAdapter(HTTPAdapter):
+    """Send the requests to Google APIs to the fake server instead."""
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        for host in (SHEETS_HOST, DRIVE_HOST):
+            if request.url.startswith(host):
+                request.url = self.base_url + request.url[len(host) :]
+        return super().send(request, **kwargs)
+
+
+class FakeCredentials:
+    access_token = "fake-token"
+    access_token_expired = False
+
+
+def make_client(server, rate_limiter=None, cache_path=None):
+    """
+    Create the client talking to the fake server.
+
+    By default it's not limited by the real quota and doesn't use any
+    caches persisted on disk.
+    """
+    session = Session()
+    session.mount("https://", RedirectAdapter(server.url))
+    client = QuotaCompliantClient(auth=FakeCredentials(), session=session)
+    client.login()
+    client.rate_limiter = rate_limiter or RateLimiter(
+        read_quota=10**6, write_quota=10**6
+    )
+    client.spreadsheet_index = SpreadsheetIndex(path=None)
+    client.response_cache = ResponseCache(path=cache_path or ":memory:")
+    client.response_cache.enabled = cache_path is not None
+    client.receipt_store = ReceiptStore(path=":memory:")
+    client.receipt_store.enabled = cache_path is not None
+    return client
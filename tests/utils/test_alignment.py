@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from utils.alignment import align_prices
+from utils.cells import label_to_coords
+
+
+def coords(*labels):
+    return [label_to_coords(label) for label in labels]
+
+
+class AlignPricesTestCase(TestCase):
+    def test_shifted_prices(self):
+        result = align_prices(coords("B3", "B4", "B5"), coords("D4", "D5", "D6"))
+        self.assertEqual(result, [[0], [1], [2]])
+
+    def test_multiple_prices_per_good(self):
+        result = align_prices(coords("B3", "B6"), coords("D3", "D4", "D5", "D6", "D7"))
+        self.assertEqual(result, [[0, 1, 2], [3, 4]])
+
+    def test_first_price_is_always_taken(self):
+        result = align_prices(coords("B5", "B6"), coords("D2", "D3", "D7"))
+        self.assertEqual(result, [[0, 1], [2]])
+
+    def test_prices_run_out(self):
+        result = align_prices(coords("B3"), coords("D3", "D4"))
+        self.assertEqual(result, [[0, 1]])
+        result = align_prices(coords("B3", "B4"), coords("D3"))
+        self.assertEqual(result, [[0], []])
@@ -0,0 +1,56 @@
+import threading
+import time
+from unittest import TestCase
+
+from tests.fake_google.server import FakeGoogleServer, make_client
+from utils.async_api import run_as_completed, run_concurrently
+
+
+class RunConcurrentlyTestCase(TestCase):
+    def test_results_keep_the_order(self):
+        def slow_square(number):
+            time.sleep(0.01 * (5 - number))
+            return number * number
+
+        result = run_concurrently(slow_square, *((i,) for i in range(5)))
+        self.assertEqual(result, [0, 1, 4, 9, 16])
+
+    def test_calls_are_concurrent(self):
+        barrier = threading.Barrier(3, timeout=1)
+        result = run_concurrently(barrier.wait, (), (), ())
+        self.assertEqual(sorted(result), [0, 1, 2])
+
+    def test_exceptions(self):
+        def parse(value):
+            return int(value)
+
+        result = run_concurrently(parse, ("1",), ("x",), return_exceptions=True)
+        self.assertEqual(result[0], 1)
+        self.assertIsInstance(result[1], ValueError)
+
+        with self.assertRaises(ValueError):
+            run_concurrently(parse, ("1",), ("x",))
+
+
+class NestedConcurrencyTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeGoogleServer(latency=0.05).__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.server.add_spreadsheet("2019-01", {"01": {"A1": {"value": "1"}}})
+        self.client = make_client(self.server)
+
+    def test_requests_in_flight_fit_into_connection_pool(self):
+        spreadsheet = self.client.open("2019-01")
+        expected = self.client.get_values(spreadsheet, ["'01'!A1"])
+
+        def read_values(_):
+            return run_concurrently(
+                self.client.get_values,
+                *((spreadsheet, ["'01'!A1"]) for _ in range(8)),
+            )
+
+        with self.assertNoLogs("urllib3.connectionpool", level="WARNING"):
+            results = list(
+                run_as_completed(read_values, *((i,) for i in range(4)), concurrency=4)
+            )
+        self.assertEqual([values for _, values in results], [[expected] * 8] * 4)
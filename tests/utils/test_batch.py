@@ -0,0 +1,166 @@
+from datetime import date
+from unittest import TestCase
+
+from models.month_billing import MonthBilling
+from models.transaction import Transaction
+from tests.fake_google.generators import generate_billing_book
+from tests.fake_google.server import FakeGoogleServer, make_client
+from utils.batch import WriteSession
+from utils.constants import CellType
+from utils.money import Money
+
+
+class FakeClient:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.snapshot_requests = 0
+        self.ranges = []
+
+    def get_grid_snapshot(self, worksheet, fields, ranges):
+        self.snapshot_requests += 1
+        self.ranges.append(ranges)
+        return self.snapshot
+
+
+class FakeSpreadsheet:
+    id = "spreadsheet"
+
+    def __init__(self, client):
+        self.client = client
+        self.batch_updates = []
+
+    def batch_update(self, body):
+        self.batch_updates.append(body)
+
+
+class FakeWorksheet:
+    id = 7
+
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+
+
+class WriteSessionTestCase(TestCase):
+    def setUp(self):
+        self.client = FakeClient(
+            {
+                "values": [["", ""], ["", "3.45"]],
+                "colors": {},
+                "notes": {"B2": "Bread"},
+                "formulas": {"B2": "=3.45"},
+            }
+        )
+        self.spreadsheet = FakeSpreadsheet(self.client)
+        self.worksheet = FakeWorksheet(self.spreadsheet)
+
+    def test_changes_are_flushed_in_one_batch_update(self):
+        with WriteSession() as session:
+            formula = session.get_formula(self.worksheet, "B2")
+            session.update_value(self.worksheet, "B2", formula + "+1.2")
+            session.append_note(self.worksheet, "B2", "Milk")
+            session.update_value(self.worksheet, "A1", "=7")
+            self.assertEqual(self.spreadsheet.batch_updates, [])
+
+        self.assertEqual(self.client.snapshot_requests, 1)
+        self.assertEqual(len(self.spreadsheet.batch_updates), 1)
+        requests = self.spreadsheet.batch_updates[0]["requests"]
+        self.assertEqual(
+            requests[0]["updateCells"],
+            {
+                "range": {
+                    "sheetId": 7,
+                    "startRowIndex": 1,
+                    "endRowIndex": 2,
+                    "startColumnIndex": 1,
+                    "endColumnIndex": 2,
+                },
+                "rows": [
+                    {
+                        "values": [
+                            {
+                                "userEnteredValue": {"formulaValue": "=3.45+1.2"},
+                                "note": "Bread, Milk",
+                            }
+                        ]
+                    }
+                ],
+                "fields": "userEnteredValue,note",
+            },
+        )
+        self.assertEqual(requests[1]["updateCells"]["fields"], "userEnteredValue")
+
+    def test_pending_changes_are_visible_before_flush(self):
+        session = WriteSession()
+        session.update_value(self.worksheet, "B2", "=3.45+1", evaluated_value=4.45)
+        session.append_note(self.worksheet, "B2", "Milk")
+        session.append_note(self.worksheet, "B2", "Eggs")
+
+        self.assertEqual(session.get_formula(self.worksheet, "B2"), "=3.45+1")
+        self.assertEqual(session.get_value(self.worksheet, "B2"), "4.45")
+        self.assertEqual(session.get_note(self.worksheet, "B2"), "Bread, Milk, Eggs")
+
+        session.flush()
+        self.assertEqual(session.get_formula(self.worksheet, "B2"), "=3.45+1")
+        self.assertEqual(session.get_note(self.worksheet, "B2"), "Bread, Milk, Eggs")
+        self.assertEqual(self.client.snapshot_requests, 1)
+
+    def test_writes_only_do_not_read_the_tab(self):
+        with WriteSession() as session:
+            session.update_value(self.worksheet, "B2", "")
+            session.update_note(self.worksheet, "B2", "")
+
+        self.assertEqual(self.client.snapshot_requests, 0)
+        cell = self.spreadsheet.batch_updates[0]["requests"][0]["updateCells"]
+        self.assertEqual(
+            cell["rows"], [{"values": [{"userEnteredValue": {}, "note": ""}]}]
+        )
+
+    def test_read_ranges_are_not_requested_again(self):
+        session = WriteSession()
+        session.read(self.worksheet, ["A1:B2", "C3"])
+        session.read(self.worksheet, ["B2", "C3"])
+        self.assertEqual(session.get_formula(self.worksheet, "B2"), "=3.45")
+        self.assertEqual(session.get_value(self.worksheet, "B2"), "3.45")
+        self.assertEqual(session.get_note(self.worksheet, "A1"), "")
+        self.assertEqual(session.get_note(self.worksheet, "D4"), "")
+        self.assertEqual(self.client.ranges, [["A1:B2", "C3"], ["D4"]])
+
+    def test_nothing_to_flush(self):
+        with WriteSession():
+            pass
+        self.assertEqual(self.spreadsheet.batch_updates, [])
+
+
+class ImportInSessionTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeGoogleServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.server.add_spreadsheet("Billing 2019", generate_billing_book())
+        client = make_client(self.server)
+        worksheet = client.open("Billing 2019").worksheet("January")
+        self.month_billing = MonthBilling(worksheet)
+
+    def import_transaction(self, session, price):
+        transaction = Transaction(
+            worksheet=None,
+            has_receipt=False,
+            created=date(2019, 1, 5),
+            title="POS SHELL",
+            price=Money.parse(price),
+            label="C2",
+        )
+        self.month_billing.import_transaction(
+            transaction, preferred_type=CellType.GASOLINE, session=session
+        )
+
+    def test_transactions_are_added_up_in_one_cell(self):
+        worksheet = self.month_billing.worksheet
+        with WriteSession() as session:
+            self.import_transaction(session, "12.30")
+            self.import_transaction(session, "7.70")
+            self.assertEqual(session.get_value(worksheet, "I45"), "20.00")
+            self.assertEqual(session.get_formula(worksheet, "I45"), "=12.30+7.70")
+
+        sheet = self.server.get_spreadsheet("Billing 2019").get_sheet(title="January")
+        self.assertEqual(sheet.cells[44, 8]["value"], "=12.30+7.70")
+        self.assertEqual(session.get_value(worksheet, "I45"), "20.00")
@@ -0,0 +1,48 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from utils.cache import ResponseCache
+
+
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        self.now = 0
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(
+            path=os.path.join(self.directory.name, "responses.sqlite3"),
+            max_size=1000,
+            clock=self.clock,
+        )
+
+    def tearDown(self):
+        self.cache.connection.close()
+        self.directory.cleanup()
+
+    def clock(self):
+        self.now += 1
+        return self.now
+
+    def test_hit(self):
+        self.cache.set("spreadsheet", "v1", "key", b"content")
+        self.assertEqual(self.cache.get("spreadsheet", "v1", "key"), b"content")
+
+    def test_miss(self):
+        self.cache.set("spreadsheet", "v1", "key", b"content")
+        self.assertIsNone(self.cache.get("spreadsheet", "v1", "another key"))
+        self.assertIsNone(self.cache.get("another spreadsheet", "v1", "key"))
+
+    def test_changed_version(self):
+        self.cache.set("spreadsheet", "v1", "key", b"content")
+        self.assertIsNone(self.cache.get("spreadsheet", "v2", "key"))
+        self.assertIsNone(self.cache.get("spreadsheet", "v1", "key"))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cache.set("spreadsheet", "v1", "first", os.urandom(400))
+        self.cache.set("spreadsheet", "v1", "second", os.urandom(400))
+        self.cache.get("spreadsheet", "v1", "first")
+        self.cache.set("spreadsheet", "v1", "third", os.urandom(400))
+
+        self.assertIsNotNone(self.cache.get("spreadsheet", "v1", "first"))
+        self.assertIsNone(self.cache.get("spreadsheet", "v1", "second"))
+        self.assertIsNotNone(self.cache.get("spreadsheet", "v1", "third"))
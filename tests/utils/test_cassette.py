@@ -0,0 +1,50 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from requests import Session
+
+from tests.fake_google.server import FakeGoogleServer
+from utils.cassette import Cassette, CassetteAdapter, CassetteMissError
+
+
+class CassetteTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "run.jsonl.gz")
+
+    def get_session(self, cassette):
+        session = Session()
+        session.mount("http://", CassetteAdapter(cassette))
+        return session
+
+    def test_record_and_replay(self):
+        cassette = Cassette()
+        cassette.record(self.path)
+        with FakeGoogleServer() as server:
+            server.add_spreadsheet("2019-01", {"01": {"B2": {"value": "Bread"}}})
+            spreadsheet_id = server.get_spreadsheet("2019-01").id
+            session = self.get_session(cassette)
+            url = f"{server.url}/v4/spreadsheets/{spreadsheet_id}/values/01"
+            recorded = session.get(url).json()
+            session.put(url, json={"values": [["Milk"]]})
+            recorded_after_update = session.get(url).json()
+            missing = session.get(f"{server.url}/v4/spreadsheets/unknown")
+        cassette.close()
+
+        cassette = Cassette()
+        cassette.replay(self.path, latency_scale=0)
+        session = self.get_session(cassette)
+        self.assertEqual(session.get(url).json(), recorded)
+        self.assertEqual(session.put(url, json={"values": [["Milk"]]}).status_code, 200)
+        self.assertEqual(session.get(url).json(), recorded_after_update)
+        # the last recorded response is repeated
+        self.assertEqual(session.get(url).json(), recorded_after_update)
+
+        response = session.get(missing.url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), missing.json())
+
+        with self.assertRaises(CassetteMissError):
+            session.put(url, json={"values": [["Eggs"]]})
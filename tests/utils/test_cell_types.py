@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+from utils.constants import CellType, get_cell_type, get_cell_types
+
+
+class GetCellTypeTestCase(TestCase):
+    def test_exact_palette_colors(self):
+        for cell_type in CellType:
+            with self.subTest(cell_type=cell_type):
+                self.assertEqual(get_cell_type(cell_type.value), cell_type)
+
+    def test_colors_within_tolerance(self):
+        color = {"red": 1, "green": 0.95, "blue": 0.79}
+        self.assertEqual(get_cell_type(color), CellType.GROCERY)
+        self.assertIsNone(get_cell_type(color, tolerance=0))
+
+    def test_missing_components_are_zero(self):
+        self.assertIsNone(get_cell_type({"red": 1}))
+        self.assertEqual(
+            get_cell_type(
+                {"red": 0.8, "green": 0.25490198, "blue": 0.14509805, "alpha": 1}
+            ),
+            CellType.TAX,
+        )
+
+    def test_column(self):
+        colors = [
+            None,
+            {"red": 1, "green": 0.9490196, "blue": 0.8},
+            {"red": 1, "green": 1, "blue": 1},
+        ]
+        self.assertEqual(
+            get_cell_types(colors), [CellType.REGULAR, CellType.GROCERY, None]
+        )
@@ -0,0 +1,71 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from utils.classifier import KeywordClassifier, load_keyword_rules
+from utils.constants import CellType
+
+MAPPING = {
+    CellType.GROCERY: {"FOOD", "WAL-MART", "-MART", "RABBA"},
+    CellType.TAKEOUTS: {"RABBA", "EGGSMART", "COFFEE"},
+    CellType.GASOLINE: {"SHELL"},
+}
+
+
+class KeywordClassifierTestCase(TestCase):
+    def setUp(self):
+        self.classifier = KeywordClassifier(MAPPING)
+
+    def test_classify(self):
+        for text, expected in (
+            ("POS SHELL C00123", [CellType.GASOLINE]),
+            ("pos shell", [CellType.GASOLINE]),
+            ("PRESTO", []),
+            ("", []),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(self.classifier.classify(text), expected)
+
+    def test_types_are_deduplicated_in_mapping_order(self):
+        self.assertEqual(self.classifier.classify("WAL-MART #12"), [CellType.GROCERY])
+        self.assertEqual(
+            self.classifier.classify("COFFEE RABBA"),
+            [CellType.GROCERY, CellType.TAKEOUTS],
+        )
+
+    def test_overlapping_keywords(self):
+        self.assertEqual(
+            self.classifier.classify("EGGSMARTFOOD"),
+            [CellType.GROCERY, CellType.TAKEOUTS],
+        )
+
+    def test_classify_many(self):
+        result = self.classifier.classify_many(["SHELL", "FOOD", "SHELL"])
+        self.assertEqual(
+            result, {"SHELL": [CellType.GASOLINE], "FOOD": [CellType.GROCERY]}
+        )
+
+
+class LoadKeywordRulesTestCase(TestCase):
+    def write_rules(self, content):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "classifier.toml")
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def test_load(self):
+        path = self.write_rules('grocery = ["Farm Boy", "T&T"]\nTAKEOUTS = ["PIZZA"]\n')
+        self.assertEqual(
+            load_keyword_rules(path),
+            {CellType.GROCERY: {"FARM BOY", "T&T"}, CellType.TAKEOUTS: {"PIZZA"}},
+        )
+
+    def test_missing_file(self):
+        self.assertEqual(load_keyword_rules("no-such-file.toml"), {})
+
+    def test_unknown_category(self):
+        path = self.write_rules('SNACKS = ["CHIPS"]\n')
+        with self.assertRaises(ValueError):
+            load_keyword_rules(path)
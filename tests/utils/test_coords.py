@@ -0,0 +1,23 @@
+from unittest import TestCase
+
+from utils.cells import (
+    coords_to_label,
+    get_column_number,
+    label_to_coords,
+    pack_coords,
+    unpack_coords,
+)
+
+
+class CoordsTestCase(TestCase):
+    def test_conversions(self):
+        self.assertEqual(unpack_coords(pack_coords(2, 3)), (2, 3))
+        self.assertEqual(label_to_coords("C2"), pack_coords(2, 3))
+        self.assertEqual(coords_to_label(pack_coords(120, 28)), "AB120")
+        self.assertEqual(get_column_number("AI"), 35)
+
+    def test_order(self):
+        labels = ["D10", "B10", "D9", "AA2", "B100"]
+        self.assertEqual(
+            sorted(labels, key=label_to_coords), ["AA2", "D9", "B10", "D10", "B100"]
+        )
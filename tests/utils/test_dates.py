@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from utils.dates import TitleDate, parse_title_date
+from utils.names import get_normalized_title
+
+
+class ParseTitleDateTestCase(TestCase):
+    def test_formats(self):
+        for string, expected in (
+            ("2019", TitleDate(year=2019)),
+            ("2019-01", TitleDate(year=2019, month=1)),
+            ("January", TitleDate(month=1)),
+            ("Sep 2019", TitleDate(year=2019, month=9)),
+            ("Copy of 2018/08/01 PM", TitleDate(year=2018, month=8, day=1)),
+            ("22.11.2017", TitleDate(year=2017, month=11, day=22)),
+        ):
+            with self.subTest(string=string):
+                self.assertEqual(parse_title_date(string), expected)
+
+    def test_ambiguous(self):
+        result = parse_title_date("05.11.2017")
+        self.assertEqual((result.month, result.day), (5, 11))
+        self.assertEqual(result.alternatives, (TitleDate(year=2017, month=11, day=5),))
+        self.assertTrue(result.ambiguous)
+
+        self.assertEqual(parse_title_date("05.11.2017", dayfirst=True).month, 11)
+        self.assertFalse(parse_title_date("05.05.2017").ambiguous)
+
+    def test_two_digit_year(self):
+        result = parse_title_date("18/08/07")
+        self.assertEqual(result.date.isoformat(), "2007-08-18")
+        result = parse_title_date("18/08/07", yearfirst=True)
+        self.assertEqual(result.date.isoformat(), "2018-08-07")
+
+    def test_fallback(self):
+        self.assertEqual(parse_title_date("2019 Mar 3").month, 3)
+        with self.assertRaises(ValueError):
+            parse_title_date("Workbook")
+
+
+class GetNormalizedTitleTestCase(TestCase):
+    def test_normalized_title(self):
+        for tab_title, filename, expected in (
+            ("Copy of 2018/08/01 PM", "2018-08", "01"),
+            ("Copy of 18/08/07 1", "2018-08", "07"),
+            ("07/08/18", "2018-08", "07"),
+            ("08/07/18", "2018-08", "07"),
+        ):
+            with self.subTest(tab_title=tab_title):
+                self.assertEqual(get_normalized_title(tab_title, filename), expected)
+
+    def test_names_registry(self):
+        result = get_normalized_title("2018/08/01", "2018-08", names_registry={"01"})
+        self.assertEqual(result, "01a")
+
+    def test_wrong_month(self):
+        with self.assertRaises(ValueError):
+            get_normalized_title("2018/09/01", "2018-08")
+        with self.assertRaises(ValueError):
+            get_normalized_title("01", "2018-08")
@@ -0,0 +1,52 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from utils.drive_index import SpreadsheetIndex
+
+FILES = [
+    {"id": "id-1", "name": "2019-01", "kind": "drive#file"},
+    {"id": "id-2", "name": "2019-02"},
+    {"id": "id-3", "name": "2019-01"},
+]
+
+
+class SpreadsheetIndexTestCase(TestCase):
+    def setUp(self):
+        self.now = 1000
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache", "index.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_index(self):
+        return SpreadsheetIndex(path=self.path, ttl=60, clock=lambda: self.now)
+
+    def test_empty_index(self):
+        index = self.make_index()
+        self.assertFalse(index.is_fresh)
+        self.assertIsNone(index.get_id("2019-01"))
+        self.assertEqual(index.files, [])
+
+    def test_first_spreadsheet_with_the_name_wins(self):
+        index = self.make_index()
+        index.update(FILES)
+        self.assertEqual(index.get_id("2019-01"), "id-1")
+        self.assertEqual(index.get_id("2019-02"), "id-2")
+        self.assertIsNone(index.get_id("2019-03"))
+
+    def test_index_is_persisted(self):
+        self.make_index().update(FILES)
+        index = self.make_index()
+        self.assertTrue(index.is_fresh)
+        self.assertEqual(index.get_id("2019-01"), "id-1")
+        self.assertEqual(index.get_id("2019-02"), "id-2")
+        self.assertEqual(index.files[0], {"id": "id-1", "name": "2019-01"})
+
+    def test_stale_index(self):
+        index = self.make_index()
+        index.update(FILES)
+        self.now += 61
+        self.assertFalse(index.is_fresh)
+        self.assertIsNone(index.get_id("2019-02"))
@@ -0,0 +1,66 @@
+from datetime import date
+from unittest import TestCase
+
+from utils.duplicates import Fingerprint, find_clusters
+from utils.money import Money
+
+
+def fingerprint(tab, amount, day=None, store="LOBLAWS", prices=("1.00",)):
+    return Fingerprint(
+        book="2019-01",
+        tab=tab,
+        store=store,
+        date=day and date(2019, 1, day),
+        amount=Money.parse(amount),
+        lines=Fingerprint.hash_lines(Money.parse(price) for price in prices),
+    )
+
+
+def tabs(clusters):
+    return [[fingerprint.tab for fingerprint in cluster] for cluster in clusters]
+
+
+class FindClustersTestCase(TestCase):
+    def test_exact_duplicates(self):
+        fingerprints = [
+            fingerprint("01", "12.34", day=1),
+            fingerprint("02", "5.00", day=2),
+            fingerprint("01a", "12.34", day=1),
+        ]
+        self.assertEqual(tabs(find_clusters(fingerprints)), [["01", "01a"]])
+
+    def test_date_window(self):
+        fingerprints = [
+            fingerprint("01", "12.34", day=1),
+            fingerprint("02", "12.34", day=2),
+            fingerprint("05", "12.34", day=5),
+        ]
+        self.assertEqual(tabs(find_clusters(fingerprints, days=1)), [["01", "02"]])
+        self.assertEqual(tabs(find_clusters(fingerprints, days=0)), [])
+
+    def test_amount_tolerance(self):
+        fingerprints = [
+            fingerprint("01", "12.34", day=1),
+            fingerprint("01a", "12.39", day=1),
+            fingerprint("01b", "12.44", day=1),
+        ]
+        self.assertEqual(tabs(find_clusters(fingerprints)), [])
+        self.assertEqual(
+            tabs(find_clusters(fingerprints, tolerance=Money(5))),
+            [["01", "01a", "01b"]],
+        )
+
+    def test_different_stores(self):
+        fingerprints = [
+            fingerprint("01", "12.34", day=1),
+            fingerprint("01a", "12.34", day=1, store="METRO"),
+        ]
+        self.assertEqual(tabs(find_clusters(fingerprints)), [])
+
+    def test_unknown_date_compares_lines(self):
+        fingerprints = [
+            fingerprint("01", "3.00", day=1, prices=("1.00", "2.00")),
+            fingerprint("Scan", "3.00", prices=("2.00", "1.00")),
+            fingerprint("Scan 2", "3.00", prices=("1.50", "1.50")),
+        ]
+        self.assertEqual(tabs(find_clusters(fingerprints)), [["01", "Scan"]])
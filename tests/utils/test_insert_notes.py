@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from tests.fake_google.server import FakeGoogleServer, make_client
+
+
+class InsertNotesTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeGoogleServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.server.add_spreadsheet(
+            "Billing 2019",
+            {
+                "January": {
+                    "E14": {"value": "=1.5", "note": "Bread"},
+                    "Z90": {"note": "Other"},
+                }
+            },
+        )
+        self.client = make_client(self.server)
+        self.worksheet = self.client.open("Billing 2019").worksheet("January")
+        self.server.requests.clear()
+        self.server.log.clear()
+
+    def get_notes(self):
+        sheet = self.server.get_spreadsheet("Billing 2019").get_sheet(title="January")
+        return {
+            (row, col): cell["note"]
+            for (row, col), cell in sheet.cells.items()
+            if cell.get("note")
+        }
+
+    def test_notes_are_appended(self):
+        self.client.insert_notes(self.worksheet, {"E14": "Milk", "F14": "Eggs"})
+        self.assertEqual(
+            self.get_notes(),
+            {(13, 4): "Bread, Milk", (13, 5): "Eggs", (89, 25): "Other"},
+        )
+        self.assertEqual(self.server.requests["get"], 1)
+
+    def test_notes_are_requested_for_updated_cells_only(self):
+        self.client.insert_notes(self.worksheet, {"E14": "Milk"})
+        self.client.insert_notes(self.worksheet, {"E14": "Cheese"})
+        self.assertEqual(self.get_notes()[13, 4], "Bread, Milk, Cheese")
+        self.assertEqual(self.server.requests["get"], 2)
+        ranges = [query["ranges"] for kind, query in self.server.log if kind == "get"]
+        self.assertEqual(ranges, [["'January'!E14"], ["'January'!E14"]])
@@ -0,0 +1,44 @@
+from decimal import Decimal
+from unittest import TestCase
+
+from utils.cells import price_to_money
+from utils.money import Money
+
+
+class MoneyTestCase(TestCase):
+    def test_parse(self):
+        cases = [
+            ("3.45", 345),
+            ("7", 700),
+            ("-0.5", -50),
+            (".99", 99),
+            ("1,234.56", 123456),
+            ("12.345", 1235),
+            ("1e2", 10000),
+        ]
+        for value, cents in cases:
+            with self.subTest(value=value):
+                self.assertEqual(Money.parse(value).cents, cents)
+
+    def test_parse_errors(self):
+        for value in ("", "abc", "1,23"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                Money.parse(value)
+
+        with self.assertRaisesRegex(ValueError, "worksheet '01', cell D5"):
+            price_to_money("abc", worksheet_title="01", label="D5")
+
+    def test_arithmetic(self):
+        prices = [Money.parse("0.10"), Money.parse("0.20")]
+        self.assertEqual(sum(prices), Money.parse("0.30"))
+        self.assertEqual(str(Money(5) - Money(20)), "-0.15")
+        self.assertEqual(Decimal("0.13") * Money(1000), Money(130))
+        self.assertEqual(abs(Money(-3)), Money(3))
+
+    def test_comparison_with_numbers(self):
+        self.assertGreater(Money(5001), 50)
+        self.assertEqual(Money(1234), Decimal("12.34"))
+        self.assertNotEqual(Money(1234), Decimal("12.345"))
+        self.assertEqual(hash(Money(1234)), hash(Decimal("12.34")))
+        self.assertEqual(hash(Money(300)), hash(3))
+        self.assertEqual(len({Money(300), Money.parse("3.00")}), 1)
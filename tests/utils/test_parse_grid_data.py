@@ -0,0 +1,100 @@
+from unittest import TestCase
+
+from utils.api import parse_grid_data
+
+GREEN = {"red": 0.41568628, "green": 0.65882355, "blue": 0.30980393}
+
+
+class ParseGridDataTestCase(TestCase):
+    def test_values_colors_and_notes(self):
+        sheet = {
+            "data": [
+                {
+                    "rowData": [
+                        {
+                            "values": [
+                                {"formattedValue": "#"},
+                                {"formattedValue": "Name"},
+                            ]
+                        },
+                        {},
+                        {
+                            "values": [
+                                {},
+                                {
+                                    "formattedValue": "Bread",
+                                    "userEnteredFormat": {"backgroundColor": GREEN},
+                                    "note": "Organic",
+                                },
+                            ]
+                        },
+                    ]
+                }
+            ]
+        }
+        result = parse_grid_data(sheet)
+        self.assertEqual(result["values"], [["#", "Name"], ["", ""], ["", "Bread"]])
+        self.assertEqual(result["colors"], {"B": [None, None, GREEN]})
+        self.assertEqual(result["notes"], {"B3": "Organic"})
+
+    def test_ranges_are_merged_by_start_position(self):
+        sheet = {
+            "data": [
+                {"rowData": [{"values": [{"formattedValue": "1"}]}]},
+                {
+                    "startRow": 1,
+                    "startColumn": 6,
+                    "rowData": [{"values": [{"formattedValue": "Store"}]}],
+                },
+            ]
+        }
+        result = parse_grid_data(sheet)
+        self.assertEqual(
+            result["values"],
+            [["1", "", "", "", "", "", ""], ["", "", "", "", "", "", "Store"]],
+        )
+
+    def test_empty_sheet(self):
+        result = parse_grid_data({"data": [{}]})
+        self.assertEqual(
+            result, {"values": [], "colors": {}, "notes": {}, "formulas": {}}
+        )
+
+    def test_formulas(self):
+        sheet = {
+            "data": [
+                {
+                    "rowData": [
+                        {
+                            "values": [
+                                {"userEnteredValue": {"formulaValue": "=1+2"}},
+                                {"userEnteredValue": {"numberValue": 7.0}},
+                                {"userEnteredValue": {"numberValue": 7.5}},
+                                {"userEnteredValue": {"stringValue": "Bread"}},
+                            ]
+                        }
+                    ]
+                }
+            ]
+        }
+        result = parse_grid_data(sheet)
+        self.assertEqual(
+            result["formulas"], {"A1": "=1+2", "B1": "7", "C1": "7.5", "D1": "Bread"}
+        )
+
+    def test_colors_by_column(self):
+        sheet = {
+            "data": [
+                {
+                    "startRow": 2,
+                    "startColumn": 3,
+                    "rowData": [
+                        {"values": [{"userEnteredFormat": {"backgroundColor": GREEN}}]},
+                        {},
+                        {"values": [{"userEnteredFormat": {"backgroundColor": GREEN}}]},
+                    ],
+                }
+            ]
+        }
+        result = parse_grid_data(sheet)
+        self.assertEqual(result["colors"], {"D": [None, None, GREEN, None, GREEN]})
@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+from requests import Response
+
+from config import BACKOFF_BASE
+from utils.rate_limit import RateLimiter, TokenBucket, get_retry_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketTestCase(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(
+            capacity=10, period=100, clock=self.clock, sleep=self.clock.sleep
+        )
+
+    def test_burst_within_capacity_is_not_delayed(self):
+        delays = [self.bucket.acquire() for _ in range(10)]
+        self.assertEqual(delays, [0] * 10)
+        self.assertEqual(self.clock.now, 0)
+
+    def test_requests_over_capacity_are_paced(self):
+        for _ in range(10):
+            self.bucket.acquire()
+        self.assertAlmostEqual(self.bucket.acquire(), 10)
+        self.assertAlmostEqual(self.bucket.acquire(), 10)
+        self.assertAlmostEqual(self.clock.now, 20)
+
+    def test_concurrent_reservations_queue_up(self):
+        for _ in range(10):
+            self.bucket.reserve()
+        self.assertAlmostEqual(self.bucket.reserve(), 10)
+        self.assertAlmostEqual(self.bucket.reserve(), 20)
+
+    def test_refill_does_not_exceed_capacity(self):
+        self.clock.now = 1000
+        for _ in range(10):
+            self.assertEqual(self.bucket.reserve(), 0)
+        self.assertGreater(self.bucket.reserve(), 0)
+
+    def test_drain(self):
+        self.bucket.drain()
+        self.assertAlmostEqual(self.bucket.reserve(), 10)
+
+
+class RateLimiterTestCase(TestCase):
+    def test_read_and_write_buckets_are_separate(self):
+        clock = FakeClock()
+        limiter = RateLimiter(
+            read_quota=1, write_quota=1, period=100, clock=clock, sleep=clock.sleep
+        )
+        self.assertEqual(limiter.acquire(limiter.get_kind("get")), 0)
+        self.assertEqual(limiter.acquire(limiter.get_kind("post")), 0)
+        self.assertAlmostEqual(limiter.acquire(limiter.get_kind("put")), 100)
+
+
+class GetRetryDelayTestCase(TestCase):
+    def make_response(self, headers=None):
+        response = Response()
+        response.status_code = 429
+        response.headers.update(headers or {})
+        return response
+
+    def test_retry_after_seconds(self):
+        response = self.make_response({"Retry-After": "7"})
+        self.assertEqual(get_retry_delay(response, attempt=3), 7)
+
+    def test_retry_after_date_in_the_past(self):
+        response = self.make_response({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        self.assertEqual(get_retry_delay(response, attempt=0), 0)
+
+    def test_exponential_backoff(self):
+        response = self.make_response()
+        for attempt in range(3):
+            delay = get_retry_delay(response, attempt=attempt)
+            self.assertGreaterEqual(delay, BACKOFF_BASE * 2 ** attempt)
+            self.assertLessEqual(delay, BACKOFF_BASE * 2 ** attempt + BACKOFF_BASE)
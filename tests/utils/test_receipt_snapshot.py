@@ -0,0 +1,30 @@
+import random
+from unittest import TestCase, mock
+
+from models.receipt_book import ReceiptBook
+from tests.fake_google.generators import generate_receipt_book
+from tests.fake_google.server import FakeGoogleServer, make_client
+
+
+class ReceiptSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeGoogleServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        sheets, _ = generate_receipt_book(random.Random(0), 2019, 1, tabs=2, lines=5)
+        self.server.add_spreadsheet("2019-01", sheets)
+
+        patcher = mock.patch("utils.api._client", make_client(self.server))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_only_receipt_ranges_are_requested(self):
+        receipt = ReceiptBook("2019-01").receipts[0]
+        self.server.log.clear()
+
+        self.assertTrue(receipt.prices_are_valid())
+        self.assertTrue(receipt.store)
+        title = receipt.worksheet.title
+        self.assertEqual(
+            [query["ranges"] for kind, query in self.server.log if kind == "get"],
+            [[f"'{title}'!A:D", f"'{title}'!G2:I2"]],
+        )
@@ -0,0 +1,54 @@
+import random
+from unittest import TestCase, mock
+
+from models.receipt_book import ReceiptBook
+from tests.fake_google.generators import generate_receipt_book
+from tests.fake_google.server import FakeGoogleServer, make_client
+from utils.receipt_store import ReceiptStore
+
+
+class ReceiptStoreTestCase(TestCase):
+    def test_receipts_of_other_versions_are_dropped(self):
+        store = ReceiptStore(path=":memory:")
+        store.set("spreadsheet", "v1", {1: {"store": "METRO"}, 2: {"store": "RABBA"}})
+        self.assertEqual(store.get("spreadsheet", "v1")[2], {"store": "RABBA"})
+        self.assertEqual(store.get("other", "v1"), {})
+        self.assertEqual(store.get("spreadsheet", "v2"), {})
+        self.assertEqual(store.get("spreadsheet", "v1"), {})
+
+
+class StoredReceiptsTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeGoogleServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        sheets, _ = generate_receipt_book(random.Random(0), 2019, 1, tabs=3, lines=5)
+        self.server.add_spreadsheet("2019-01", sheets)
+
+        self.client = make_client(self.server)
+        self.client.receipt_store.enabled = True
+        patcher = mock.patch("utils.api._client", self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_receipts(self):
+        self.client._spreadsheets.clear()
+        return ReceiptBook("2019-01", prefetch=True).receipts
+
+    def test_parsed_receipts_are_reused(self):
+        receipts = self.get_receipts()
+        self.assertEqual(self.server.requests["get"], 2)
+
+        stored_receipts = self.get_receipts()
+        # only the list of tabs is requested
+        self.assertEqual(self.server.requests["get"], 3)
+        for receipt, stored_receipt in zip(receipts, stored_receipts):
+            self.assertEqual(stored_receipt.store, receipt.store)
+            self.assertEqual(stored_receipt.date, receipt.date)
+            self.assertEqual(stored_receipt.price_stats, receipt.price_stats)
+            self.assertEqual(stored_receipt.purchases, receipt.purchases)
+            self.assertTrue(stored_receipt.prices_are_valid())
+
+    def test_receipts_are_parsed_again_after_changes(self):
+        receipts = self.get_receipts()
+        receipts[0].worksheet.update_acell("G2", "NOFRILLS")
+        self.assertEqual(self.get_receipts()[0].store, "NOFRILLS")
@@ -0,0 +1,40 @@
+import random
+from unittest import TestCase, mock
+
+from gspread.utils import rowcol_to_a1
+
+from models.receipt_book import ReceiptBook
+from models.validation import MISMATCH
+from tests.fake_google.generators import color, generate_receipt
+from tests.fake_google.server import FakeGoogleServer, make_client
+from utils.constants import CellType
+from utils.money import Money
+
+
+class ReceiptValidationTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeGoogleServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+        patcher = mock.patch("utils.api._client", make_client(self.server))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_mismatch_is_kept_when_discount_is_unknown(self):
+        cells, _ = generate_receipt(random.Random(0), lines=3)
+        # the total is paid by card, so the discount depends on the purchases
+        total_label = next(
+            label
+            for label, cell in cells.items()
+            if cell.get("color") == color(CellType.TOTAL)
+        )
+        cells[total_label]["color"] = color(CellType.ACTUALLY_PAID)
+        # a missing price breaks both the sum of prices and the purchases
+        missing_price = cells.pop(rowcol_to_a1(3, 4))["value"]
+        self.server.add_spreadsheet("2019-01", {"05": cells})
+
+        result = ReceiptBook("2019-01").get_receipt("05").validate()
+
+        self.assertEqual(result.status, MISMATCH, result.message)
+        self.assertIsNotNone(result.expected)
+        self.assertEqual(result.expected - result.actual, Money.parse(missing_price))
@@ -0,0 +1,75 @@
+import io
+import json
+from unittest import TestCase
+
+from gspread.urls import SPREADSHEETS_API_V4_BASE_URL
+
+from utils.stats import ApiCall, ApiStats, get_endpoint_kind, percentile
+
+SPREADSHEET_URL = f"{SPREADSHEETS_API_V4_BASE_URL}/1BxiM"
+
+
+class GetEndpointKindTestCase(TestCase):
+    def test_kinds(self):
+        cases = [
+            ("get", f"{SPREADSHEET_URL}/values/Sheet1", "values"),
+            ("get", f"{SPREADSHEET_URL}/values:batchGet", "values"),
+            ("put", f"{SPREADSHEET_URL}/values/Sheet1!A1:B2", "values"),
+            ("get", SPREADSHEET_URL, "get"),
+            ("post", f"{SPREADSHEET_URL}:batchUpdate", "batchUpdate"),
+            ("post", f"{SPREADSHEET_URL}/sheets/0:copyTo", "copyTo"),
+            ("get", "https://www.googleapis.com/drive/v3/files", "drive list"),
+            ("get", "https://www.googleapis.com/drive/v3/files/1BxiM", "drive get"),
+        ]
+        for method, url, expected_kind in cases:
+            with self.subTest(url=url):
+                self.assertEqual(get_endpoint_kind(method, url), expected_kind)
+
+
+class PercentileTestCase(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertEqual(percentile([], 50), 0)
+
+
+class ApiStatsTestCase(TestCase):
+    def make_call(self, **kwargs):
+        defaults = dict(
+            method="get",
+            endpoint_kind="values",
+            url=SPREADSHEET_URL,
+            status=200,
+            sent_bytes=0,
+            received_bytes=2048,
+            latency=0.1,
+            retries=0,
+            throttled=0,
+        )
+        defaults.update(kwargs)
+        return ApiCall(**defaults)
+
+    def test_summary(self):
+        stats = ApiStats()
+        stats.record(self.make_call())
+        stats.record(self.make_call(retries=2, throttled=1.5, latency=0.3))
+        stats.record(self.make_call(cached=True, received_bytes=0, latency=0))
+        stats.record(self.make_call(endpoint_kind="batchUpdate", sent_bytes=1024))
+
+        summary = stats.summary()
+        self.assertIn("API calls: 3 sent, 1 served from cache", summary)
+        self.assertIn("values            3      1       2      100      300", summary)
+        self.assertIn("Time spent rate-limited: 1.5 s", summary)
+        self.assertIn("Transferred: 1.0 KB sent, 6.0 KB received", summary)
+
+    def test_trace(self):
+        stats = ApiStats()
+        stats.trace_file = io.StringIO()
+        stats.record(self.make_call())
+        stats.record(self.make_call(method="post"))
+
+        lines = stats.trace_file.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])["method"], "post")
@@ -0,0 +1,66 @@
+from datetime import date
+from types import SimpleNamespace
+from unittest import TestCase
+
+from models.transaction import TransactionDecoder
+from utils.dates import parse_cell_date
+from utils.money import Money
+
+
+class TransactionDecoderTestCase(TestCase):
+    def setUp(self):
+        self.decoder = TransactionDecoder(SimpleNamespace(title="2019"))
+
+    def test_decode(self):
+        transactions = self.decoder.decode(
+            [
+                ["Y", "2019-01-05", "POS LOBLAWS", "12.34", "VISA"],
+                ["", "01/06/2019", "PRESTO", "3.10"],
+            ],
+            start_row=2,
+        )
+        self.assertEqual(
+            [
+                (t.has_receipt, t.created, t.title, t.price, t.label)
+                for t in transactions
+            ],
+            [
+                (True, date(2019, 1, 5), "POS LOBLAWS", Money(1234), "A2"),
+                (False, date(2019, 1, 6), "PRESTO", Money(310), "A3"),
+            ],
+        )
+        self.assertEqual(self.decoder.errors, [])
+
+    def test_errors(self):
+        transactions = self.decoder.decode(
+            [
+                ["", "", "", ""],
+                ["", "yesterday", "PRESTO", "3.10"],
+                ["", "2019-01-05", "PRESTO", "free"],
+                ["", "2019-01-05"],
+            ],
+            start_row=2,
+        )
+        self.assertEqual(transactions, [])
+        self.assertEqual(len(self.decoder.errors), 3)
+        self.assertIn("'yesterday' from cell B3 (2019)", self.decoder.errors[0])
+        self.assertIn("'free' from cell D4 (2019)", self.decoder.errors[1])
+        self.assertIn("'' from cell D5 (2019)", self.decoder.errors[2])
+
+
+class ParseCellDateTestCase(TestCase):
+    def setUp(self):
+        parse_cell_date.cache_clear()
+
+    def test_formats(self):
+        for value in ("2019-01-05", "01/05/2019", "2019/01/05", "Jan 5, 2019"):
+            with self.subTest(value=value):
+                self.assertEqual(parse_cell_date(value), date(2019, 1, 5))
+
+    def test_ambiguous_dates_do_not_depend_on_earlier_ones(self):
+        self.assertEqual(parse_cell_date("13/03/2019"), date(2019, 3, 13))
+        self.assertEqual(parse_cell_date("02/03/2019"), date(2019, 2, 3))
+
+    def test_not_a_date(self):
+        with self.assertRaises(ValueError):
+            parse_cell_date("POS LOBLAWS")
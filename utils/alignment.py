@@ -0,0 +1,38 @@
+def align_prices(goods, prices):
+    """
+    Assign the prices to the goods in one pass over both columns.
+
+    Sometimes, due to recognition artifacts, price may be shifted up or down
+    comparing to the good's name, and therefore may appear to belong to the
+    good which already has the price. In some situations multiple prices per
+    good is a valid case. So, to distinguish that, the number of goods is
+    compared with the number of prices: if they are equal, then it's an artifact
+    and the prices are assigned one by one in their order. Otherwise each good
+    takes the prices greedily until the next good's name is met (at least one).
+
+    :param list goods: packed coordinates of the goods' names, sorted
+    :param list prices: packed coordinates of the prices, sorted
+    :return list: indices of the prices assigned to each good, e.g.
+        goods [B3, B5], prices [D3, D4, D5] ==> [[0, 1], [2]]
+    """
+    if len(prices) <= len(goods):
+        return [[i] if i < len(prices) else [] for i in range(len(goods))]
+
+    result = []
+    price_index = 0
+    for good_index in range(len(goods)):
+        is_last_good = good_index + 1 == len(goods)
+        next_good = None if is_last_good else goods[good_index + 1]
+        assigned = []
+        while price_index < len(prices):
+            assigned.append(price_index)
+            price_index += 1
+            next_good_met = (
+                next_good is not None
+                and price_index < len(prices)
+                and next_good < prices[price_index]
+            )
+            if next_good_met:
+                break
+        result.append(assigned)
+    return result
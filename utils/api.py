@@ -1,20 +1,234 @@
 import json
+import re
+import threading
 import time
 
-import gspread
-from gspread import Client
+from gspread import Client, Spreadsheet
+from gspread.exceptions import APIError, SpreadsheetNotFound
 from gspread.urls import SPREADSHEETS_API_V4_BASE_URL
-from gspread.utils import rowcol_to_a1
 from oauth2client.service_account import ServiceAccountCredentials
+from requests import Response, Session
 
-from config import QUOTA_DELAY, SCOPES
-from utils.cells import a1_to_coords
+from config import GRID_PAGE_SIZE, HTTP_POOL_SIZE, MAX_RETRIES, SCOPES, VALUES_PAGE_SIZE
+from utils.cache import response_cache
+from utils.receipt_store import receipt_store
+from utils.cassette import REPLAY, CassetteAdapter, ReplayCredentials, cassette
+from utils.cells import (
+    a1_to_coords,
+    coords_to_label,
+    get_column_letter,
+    pack_coords,
+)
+from utils.drive_index import SpreadsheetIndex
+from utils.rate_limit import RETRY_STATUSES, get_retry_delay, rate_limiter
+from utils.stats import ApiCall, api_stats, get_endpoint_kind
+
+DRIVE_FILES_API_V3_URL = "https://www.googleapis.com/drive/v3/files"
+SNAPSHOT_FIELDS = "formattedValue,userEnteredFormat/backgroundColor,note"
+SPREADSHEET_ID_PATTERN = re.compile(
+    re.escape(SPREADSHEETS_API_V4_BASE_URL) + r"/([^/?:]+)"
+)
 
 
 class QuotaCompliantClient(Client):
-    def request(self, *args, **kwargs):
-        time.sleep(QUOTA_DELAY)
-        return super().request(*args, **kwargs)
+    rate_limiter = rate_limiter
+    response_cache = response_cache
+    receipt_store = receipt_store
+
+    def __init__(self, auth, session=None):
+        super().__init__(auth, session=session)
+        self._lock = threading.Lock()
+        # requests in flight from all threads, nested pools included, never
+        # exceed the kept-alive connections
+        self._connections = threading.BoundedSemaphore(HTTP_POOL_SIZE)
+        self._spreadsheets = {}
+        self._versions = {}
+        self.spreadsheet_index = SpreadsheetIndex()
+
+    def login(self):
+        with self._lock:
+            super().login()
+
+    def request(self, method, endpoint, params=None, **kwargs):
+        """
+        Send the request, or take the response from cache if it's still valid.
+
+        Reads from Sheets API are cached along with the Drive version of the
+        spreadsheet and served from there until the spreadsheet is changed.
+        """
+        match = SPREADSHEET_ID_PATTERN.match(endpoint)
+        is_cacheable = match and method.lower() == "get" and self.response_cache.enabled
+        if not is_cacheable:
+            response = self._send(method, endpoint, params=params, **kwargs)
+            if method.lower() != "get":
+                # the cached versions of modified spreadsheets aren't valid anymore
+                with self._lock:
+                    self._versions.clear()
+            return response
+
+        spreadsheet_id = match.group(1)
+        version = self.get_spreadsheet_version(spreadsheet_id)
+        key = json.dumps([endpoint, params], sort_keys=True)
+        content = self.response_cache.get(spreadsheet_id, version, key)
+        if content is not None:
+            response = Response()
+            response.status_code = 200
+            response._content = content
+            api_stats.record(
+                ApiCall(
+                    method=method,
+                    endpoint_kind=get_endpoint_kind(method, endpoint),
+                    url=endpoint,
+                    status=response.status_code,
+                    sent_bytes=0,
+                    received_bytes=0,
+                    latency=0,
+                    retries=0,
+                    throttled=0,
+                    cached=True,
+                )
+            )
+            return response
+
+        response = self._send(method, endpoint, params=params, **kwargs)
+        self.response_cache.set(spreadsheet_id, version, key, response.content)
+        return response
+
+    def get_spreadsheet_version(self, spreadsheet_id):
+        """
+        Return the version of the spreadsheet from Drive.
+
+        It's requested once per run, and again only after this client
+        has modified any spreadsheet.
+        """
+        with self._lock:
+            version = self._versions.get(spreadsheet_id)
+        if version is None:
+            url = f"{DRIVE_FILES_API_V3_URL}/{spreadsheet_id}"
+            params = {"fields": "version,modifiedTime", "supportsTeamDrives": True}
+            content = self._send("get", url, params=params).json()
+            version = f"{content['version']}:{content['modifiedTime']}"
+            with self._lock:
+                self._versions[spreadsheet_id] = version
+        return version
+
+    def _send(self, method, endpoint, **kwargs):
+        """
+        Send the request as soon as the read/write quota allows it.
+
+        Requests throttled by API (429) or failed on the server side (5xx)
+        are retried up to MAX_RETRIES times with exponential backoff.
+        """
+        kind = self.rate_limiter.get_kind(method)
+        attempt = 0
+        throttled = 0
+        while True:
+            throttled += self.rate_limiter.acquire(kind)
+            if getattr(self.auth, "access_token_expired", False):
+                self.login()
+            try:
+                with self._connections:
+                    started = time.monotonic()
+                    response = super().request(method, endpoint, **kwargs)
+            except APIError as e:
+                status = e.response.status_code
+                if status not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                    self._record(
+                        method,
+                        endpoint,
+                        kwargs,
+                        e.response,
+                        started,
+                        attempt,
+                        throttled,
+                    )
+                    raise
+                if status == 429:
+                    self.rate_limiter.drain(kind)
+                delay = get_retry_delay(e.response, attempt)
+                time.sleep(delay)
+                throttled += delay
+                attempt += 1
+            else:
+                self._record(
+                    method, endpoint, kwargs, response, started, attempt, throttled
+                )
+                return response
+
+    @staticmethod
+    def _record(method, endpoint, kwargs, response, started, retries, throttled):
+        payload = kwargs.get("json")
+        sent_bytes = len(json.dumps(payload)) if payload is not None else 0
+        api_stats.record(
+            ApiCall(
+                method=method,
+                endpoint_kind=get_endpoint_kind(method, endpoint),
+                url=endpoint,
+                status=response.status_code,
+                sent_bytes=sent_bytes,
+                received_bytes=len(response.content),
+                latency=time.monotonic() - started,
+                retries=retries,
+                throttled=throttled,
+            )
+        )
+
+    def list_spreadsheet_files(self):
+        """
+        List all spreadsheets available in Drive and refresh the name index with them.
+
+        :return list: [{"id": "1BxiM...", "name": "2019-01"}, ...]
+        """
+        files = []
+        params = {
+            "q": "mimeType='application/vnd.google-apps.spreadsheet'",
+            "pageSize": 1000,
+            "fields": "nextPageToken,files(id,name)",
+            "supportsTeamDrives": True,
+            "includeTeamDriveItems": True,
+        }
+        while True:
+            content = self.request("get", DRIVE_FILES_API_V3_URL, params=params).json()
+            files.extend(content["files"])
+            page_token = content.get("nextPageToken")
+            if not page_token:
+                break
+            params["pageToken"] = page_token
+
+        self.spreadsheet_index.update(files)
+        return files
+
+    def get_spreadsheet_files(self, refresh=False):
+        """Same as list_spreadsheet_files() but served from the index while it is fresh."""
+        if refresh or not self.spreadsheet_index.is_fresh:
+            return self.list_spreadsheet_files()
+        return self.spreadsheet_index.files
+
+    def open(self, title):
+        """
+        Open a spreadsheet by title.
+
+        The title is resolved to ID via the spreadsheet index, which is refreshed
+        only if the title is not there. The spreadsheet handle is cached too, so
+        opening the same file again doesn't cost any requests.
+
+        :raise: SpreadsheetNotFound
+        """
+        with self._lock:
+            spreadsheet = self._spreadsheets.get(title)
+        if spreadsheet is not None:
+            return spreadsheet
+
+        spreadsheet_id = self.spreadsheet_index.get_id(title)
+        if spreadsheet_id is None:
+            self.list_spreadsheet_files()
+            spreadsheet_id = self.spreadsheet_index.get_id(title)
+        if spreadsheet_id is None:
+            raise SpreadsheetNotFound
+
+        spreadsheet = Spreadsheet(self, {"id": spreadsheet_id, "title": title})
+        with self._lock:
+            return self._spreadsheets.setdefault(title, spreadsheet)
 
     def copy_worksheet_to(self, worksheet, dest_filename):
         """
@@ -49,25 +263,120 @@ class QuotaCompliantClient(Client):
             "L2": "Note"
         }
         """
-        result = {}
-        spreadsheet_id = worksheet.spreadsheet.id
-        url = (
-            f"{SPREADSHEETS_API_V4_BASE_URL}/{spreadsheet_id}?ranges='{worksheet.title}'"
-            f"&fields=sheets/data/rowData/values/note"
+        content = self._get_grid(worksheet, fields="note")
+        return parse_grid_data(content["sheets"][0])["notes"]
+
+    def get_notes(self, worksheet, labels):
+        """
+        Get notes of the specified cells only, in one request.
+
+        :param list labels: ["E14", "F15", ...]
+        :return dict: {"E14": "Blah", "F15": "", ...}, "" for cells without notes
+        """
+        title = quote_title(worksheet.title)
+        content = self._get_grids(
+            worksheet.spreadsheet.id,
+            ranges=[f"{title}!{label}" for label in labels],
+            fields="note",
         )
-        response = self.request("get", url)
-        content = json.loads(response.content)
+        notes = {}
+        for sheet_container in content.get("sheets", []):
+            notes.update(parse_grid_data(sheet_container)["notes"])
+        return {label: notes.get(label, "") for label in labels}
 
-        row_containers = content["sheets"][0]["data"][0]["rowData"]
-        for row, row_container in enumerate(row_containers, 1):
-            cell_containers = row_container.get("values", [])
-            for col, cell_container in enumerate(cell_containers, 1):
-                note = cell_container.get("note")
-                if note:
-                    label = rowcol_to_a1(row=row, col=col)
-                    result[label] = note
+    def get_values(self, spreadsheet, ranges):
+        """
+        Get formatted values of many ranges of the spreadsheet via values:batchGet.
+
+        The ranges are requested in pages of VALUES_PAGE_SIZE ranges per request.
+
+        :param list ranges: ["'01'!G2", "'02'!A1:D5", ...]
+        :return list: values of each range [[["LOBLAWS"]], [["", "Bread"], ...], ...]
+        """
+        url = f"{SPREADSHEETS_API_V4_BASE_URL}/{spreadsheet.id}/values:batchGet"
+        result = []
+        for i in range(0, len(ranges), VALUES_PAGE_SIZE):
+            response = self.request(
+                "get", url, params={"ranges": ranges[i : i + VALUES_PAGE_SIZE]}
+            )
+            value_ranges = json.loads(response.content).get("valueRanges", [])
+            result.extend(value_range.get("values", []) for value_range in value_ranges)
         return result
 
+    def get_grid_snapshot(self, worksheet, fields=SNAPSHOT_FIELDS, ranges=None):
+        """
+        Get values, background colors and notes of the cells in one request.
+
+        :param str fields: cell fields to request, e.g. "formattedValue,userEnteredValue"
+        :param list ranges: A1 ranges to get, e.g. ["B:B", "E14:AI14"], the whole tab by default
+        :return dict: {
+            "values": [["", "Bread", "", "3.45"], ...],
+            "colors": {
+                "B": [None, {"red": 0.858689, "green": 0.3425, "blue": 0.85004}],
+                ...
+            },
+            "notes": {"A1": "Blah", ...},
+            "formulas": {"E14": "=3.45+1.2", ...}
+        }
+        """
+        content = self._get_grid(worksheet, fields=fields, ranges=ranges)
+        return parse_grid_data(content["sheets"][0])
+
+    def get_grid_snapshots(self, spreadsheet, ranges_by_title):
+        """
+        Get snapshots of many tabs of the spreadsheet in a few requests.
+
+        Tabs are requested in pages of GRID_PAGE_SIZE tabs per spreadsheets.get,
+        each tab limited to its own list of A1 ranges.
+
+        :param Spreadsheet spreadsheet:
+        :param dict ranges_by_title: {"01": ["A:D", "G2:I2"], "02": [...], ...}
+        :return dict: {"01": <snapshot like get_grid_snapshot() returns>, ...}
+        """
+        result = {}
+        for page in paginate(ranges_by_title, GRID_PAGE_SIZE):
+            result.update(self.get_grid_snapshots_page(spreadsheet, page))
+        return result
+
+    def get_grid_snapshots_page(self, spreadsheet, ranges_by_title):
+        """Same as get_grid_snapshots() but all tabs are requested at once."""
+        result = {}
+        ranges = [
+            f"{quote_title(title)}!{a1_range}"
+            for title, a1_ranges in ranges_by_title.items()
+            for a1_range in a1_ranges
+        ]
+        content = self._get_grids(spreadsheet.id, ranges=ranges, fields=SNAPSHOT_FIELDS)
+        for sheet_container in content.get("sheets", []):
+            title = sheet_container["properties"]["title"]
+            result[title] = parse_grid_data(sheet_container)
+        return result
+
+    def _get_grid(self, worksheet, fields, ranges=None):
+        """Request specified fields of the cells of the worksheet via spreadsheets.get."""
+        title = quote_title(worksheet.title)
+        return self._get_grids(
+            worksheet.spreadsheet.id,
+            ranges=(
+                [f"{title}!{a1_range}" for a1_range in ranges] if ranges else [title]
+            ),
+            fields=fields,
+        )
+
+    def _get_grids(self, spreadsheet_id, ranges, fields):
+        """Request specified fields of all cells in the ranges via spreadsheets.get."""
+        url = f"{SPREADSHEETS_API_V4_BASE_URL}/{spreadsheet_id}"
+        params = {
+            "ranges": ranges,
+            "includeGridData": "true",
+            "fields": (
+                f"sheets(properties/title,"
+                f"data(startRow,startColumn,rowData/values({fields})))"
+            ),
+        }
+        response = self.request("get", url, params=params)
+        return json.loads(response.content)
+
     def insert_notes(self, worksheet, labels_notes, replace=False):
         """
         Adds specified notes to the cells.
@@ -79,12 +388,16 @@ class QuotaCompliantClient(Client):
                 "B2": "cheese, bread"
             }
         :param bool replace: if False, the notes will be appended to existing ones
+
+        Existing notes are requested only for the cells being updated.
         """
         if not labels_notes:
             return
 
         spreadsheet_id = worksheet.spreadsheet.id
-        existing_notes = {} if replace else self.get_all_notes(worksheet)
+        existing_notes = (
+            {} if replace else self.get_notes(worksheet, list(labels_notes))
+        )
 
         url = f"{SPREADSHEETS_API_V4_BASE_URL}/{spreadsheet_id}:batchUpdate"
         requests_payload = []
@@ -107,35 +420,131 @@ class QuotaCompliantClient(Client):
                     }
                 }
             )
-        self.request("post", url, json={"requests": [requests_payload]})
+        self.request("post", url, json={"requests": requests_payload})
 
-    def get_all_colors(self, worksheet):
+    def get_all_colors(self, worksheet, ranges=None):
         """
-        Return background colors of all cells.
+        Return background colors of the cells, column by column.
 
-        :return dict: {
-            "A1": {"red": 0.858689, "green": 0.3425, "blue": 0.85004},
-            ...
-        }
+        :param list ranges: A1 ranges to get the colors of, e.g. ["B:B", "D:D"],
+            the whole tab by default
+        :return dict: colors by row (starting from 1st) for each column with any
+            colored cells, None for cells without color {
+                "B": [None, None, {"red": 0.858689, "green": 0.3425, "blue": 0.85004}],
+                "D": [None, {"red": 0.3, "green": 0.8, "blue": 0.1}],
+            }
         """
-        result = {}
-        spreadsheet_id = worksheet.spreadsheet.id
-        url = (
-            f"{SPREADSHEETS_API_V4_BASE_URL}/{spreadsheet_id}?ranges='{worksheet.title}'"
-            f"&fields=sheets/data/rowData/values/userEnteredFormat/backgroundColor"
+        content = self._get_grid(
+            worksheet, fields="userEnteredFormat/backgroundColor", ranges=ranges
         )
-        response = self.request("get", url)
-        content = json.loads(response.content)
+        return parse_grid_data(content["sheets"][0])["colors"]
 
-        row_containers = content["sheets"][0]["data"][0]["rowData"]
-        for row, row_container in enumerate(row_containers, 1):
+
+def paginate(mapping, page_size):
+    """Split the dict into dicts of page_size items at most."""
+    items = list(mapping.items())
+    for i in range(0, len(items), page_size):
+        yield dict(items[i : i + page_size])
+
+
+def quote_title(title):
+    """Quote the tab title for A1 notation: Bob's ==> 'Bob''s'"""
+    escaped_title = title.replace("'", "''")
+    return f"'{escaped_title}'"
+
+
+def parse_grid_data(sheet_container):
+    """
+    Collect values, background colors and notes from the grid data of a sheet.
+
+    The grid may consist of several ranges positioned by their startRow and
+    startColumn. Their values are merged into one table padded the same way
+    as Worksheet.get_all_values() does it. Colors are kept per column, as
+    lists by row starting from the 1st one, since receipts look up only a
+    couple of columns by color.
+
+    :param dict sheet_container: an item of "sheets" from spreadsheets.get response
+    :return dict: {
+        "values": [["", "Bread", "", "3.45"], ...],
+        "colors": {"B": [None, {"red": 0.858689, "green": 0.3425, "blue": 0.85004}], ...},
+        "notes": {"A1": "Blah", ...},
+        "formulas": {"E14": "=3.45+1.2", "E15": "7", ...}
+    }
+    """
+    values, colors, notes, formulas = {}, {}, {}, {}
+    column_letters = {}
+    for grid in sheet_container.get("data", []):
+        first_row = grid.get("startRow", 0) + 1
+        first_col = grid.get("startColumn", 0) + 1
+        for row, row_container in enumerate(grid.get("rowData", []), first_row):
             cell_containers = row_container.get("values", [])
-            for col, cell_container in enumerate(cell_containers, 1):
+            for col, cell_container in enumerate(cell_containers, first_col):
+                value = cell_container.get("formattedValue")
                 formatting = cell_container.get("userEnteredFormat")
+                note = cell_container.get("note")
+                user_entered_value = cell_container.get("userEnteredValue")
+                if value:
+                    values[row, col] = value
                 if formatting:
-                    label = rowcol_to_a1(row=row, col=col)
-                    result[label] = formatting.get("backgroundColor")
-        return result
+                    if col not in column_letters:
+                        column_letters[col] = get_column_letter(col)
+                    column_colors = colors.setdefault(column_letters[col], [])
+                    column_colors.extend([None] * (row - len(column_colors)))
+                    column_colors[row - 1] = formatting.get("backgroundColor")
+                if note:
+                    notes[coords_to_label(pack_coords(row, col))] = note
+                if user_entered_value:
+                    formulas[coords_to_label(pack_coords(row, col))] = (
+                        from_user_entered_value(user_entered_value)
+                    )
+
+    table = []
+    if values:
+        rows = max(row for row, _ in values)
+        cols = max(col for _, col in values)
+        table = [[""] * cols for _ in range(rows)]
+        for (row, col), value in values.items():
+            table[row - 1][col - 1] = value
+
+    return {"values": table, "colors": colors, "notes": notes, "formulas": formulas}
+
+
+def from_user_entered_value(user_entered_value):
+    """
+    Render ExtendedValue the way it is typed in by user (like FORMULA render option).
+
+    :param dict user_entered_value: {"formulaValue": "=1+2"} or {"numberValue": 3}, ...
+    :return str: "=1+2", "3"
+    """
+    if "formulaValue" in user_entered_value:
+        return user_entered_value["formulaValue"]
+    if "numberValue" in user_entered_value:
+        number = user_entered_value["numberValue"]
+        return str(int(number)) if float(number).is_integer() else str(number)
+    if "boolValue" in user_entered_value:
+        return str(user_entered_value["boolValue"]).upper()
+    return str(user_entered_value.get("stringValue", ""))
+
+
+def to_user_entered_value(value):
+    """
+    Convert a string typed in by user to ExtendedValue (like USER_ENTERED input option).
+
+    :return dict: "=1+2" ==> {"formulaValue": "=1+2"}, "" ==> {} (clears the cell)
+    """
+    value = str(value)
+    if not value:
+        return {}
+    if value.startswith("="):
+        return {"formulaValue": value}
+    try:
+        return {"numberValue": float(value)}
+    except ValueError:
+        return {"stringValue": value}
+
+
+_client = None
+_client_lock = threading.Lock()
 
 
 def get_credentials():
@@ -145,7 +554,36 @@ def get_credentials():
     return credentials
 
 
+def get_session():
+    """
+    Return HTTP session keeping up to HTTP_POOL_SIZE connections alive.
+
+    The requests are recorded to or replayed from the cassette if it's on.
+    """
+    session = Session()
+    adapter = CassetteAdapter(
+        cassette, pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE
+    )
+    session.mount("https://", adapter)
+    return session
+
+
 def get_client():
-    credentials = get_credentials()
-    client = gspread.authorize(credentials, client_class=QuotaCompliantClient)
-    return client
+    """
+    Return the client shared across the process.
+
+    Credentials are read and authorized only once, on the first call,
+    then the same token, HTTP session and opened spreadsheets are reused.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            # replayed runs don't reach Google, so they don't need real credentials
+            auth = ReplayCredentials() if cassette.mode == REPLAY else get_credentials()
+            client = QuotaCompliantClient(auth=auth, session=get_session())
+            if cassette.mode:
+                # recorded and replayed runs look up the spreadsheets the same way
+                client.spreadsheet_index = SpreadsheetIndex(path=None)
+            client.login()
+            _client = client
+        return _client
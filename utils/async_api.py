@@ -0,0 +1,118 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+
+from config import GRID_PAGE_SIZE, MAX_CONCURRENT_REQUESTS
+from utils.api import paginate
+
+
+class AsyncQuotaCompliantClient:
+    """
+    Asyncio interface to QuotaCompliantClient for fetching many things at once.
+
+    The calls are made in a pool of at most `concurrency` threads through the
+    wrapped client, so they share its keep-alive HTTP session, response cache
+    and the process-wide rate limiter - concurrent calls just wait for their
+    turn in the same read/write token buckets.
+
+    Create it within a running event loop:
+
+        async def fetch(worksheets):
+            async with AsyncQuotaCompliantClient(get_client()) as client:
+                return await asyncio.gather(
+                    *(client.get_all_values(worksheet) for worksheet in worksheets)
+                )
+    """
+
+    def __init__(self, client, concurrency=MAX_CONCURRENT_REQUESTS):
+        self.client = client
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._executor.shutdown(wait=False)
+
+    async def run(self, func, *args, **kwargs):
+        """Run any blocking function making API calls in the thread pool."""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, partial(func, *args, **kwargs)
+            )
+
+    async def get_all_values(self, worksheet):
+        return await self.run(worksheet.get_all_values)
+
+    async def get_all_colors(self, worksheet):
+        return await self.run(self.client.get_all_colors, worksheet)
+
+    async def get_all_notes(self, worksheet):
+        return await self.run(self.client.get_all_notes, worksheet)
+
+    async def insert_notes(self, worksheet, labels_notes, replace=False):
+        return await self.run(
+            self.client.insert_notes, worksheet, labels_notes, replace=replace
+        )
+
+    async def copy_worksheet_to(self, worksheet, dest_filename):
+        return await self.run(self.client.copy_worksheet_to, worksheet, dest_filename)
+
+    async def get_grid_snapshot(self, worksheet):
+        return await self.run(self.client.get_grid_snapshot, worksheet)
+
+    async def get_grid_snapshots(self, spreadsheet, ranges_by_title):
+        """Same as QuotaCompliantClient.get_grid_snapshots() but pages are fetched concurrently."""
+        pages = await asyncio.gather(
+            *(
+                self.run(self.client.get_grid_snapshots_page, spreadsheet, page)
+                for page in paginate(ranges_by_title, GRID_PAGE_SIZE)
+            )
+        )
+        result = {}
+        for page in pages:
+            result.update(page)
+        return result
+
+
+def run_concurrently(func, *args_list, return_exceptions=False):
+    """
+    Call blocking func for each of args concurrently, return results in the same order.
+
+        books = run_concurrently(ReceiptBook, ("2019-01",), ("2019-02",))
+
+    :param bool return_exceptions: if True, exceptions are returned in place of
+        the results of the failed calls instead of being raised.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        futures = [executor.submit(func, *args) for args in args_list]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+    return results
+
+
+def run_as_completed(func, *args_list, concurrency=MAX_CONCURRENT_REQUESTS):
+    """
+    Call blocking func for each of args in a pool of threads, yield results as they finish.
+
+        for (filename,), book in run_as_completed(ReceiptBook, ("2019-01",), ("2019-02",)):
+            ...
+
+    Exceptions are yielded in place of the results of the failed calls.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(func, *args): args for args in args_list}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = e
+            yield futures[future], result
@@ -0,0 +1,211 @@
+from collections import defaultdict
+
+from utils.api import to_user_entered_value
+from utils.cells import a1_to_coords, coords_to_label, pack_coords
+
+CELL_FIELDS = "formattedValue,userEnteredValue,note"
+
+
+class WriteSession:
+    """
+    Collects cell values and notes in memory and writes them all at once.
+
+    Changes are flushed as one spreadsheets.batchUpdate per spreadsheet. The
+    current content of the cells is read only once, on the first access, so
+    the pending changes can be built on top of it. The ranges to be changed
+    can be read beforehand in one request, other cells are read one by one:
+
+        with WriteSession() as session:
+            session.read(month_billing.worksheet, ["E14:AI14", "E15:AI15"])
+            month_billing.import_receipt(receipt, session=session)
+            month_billing.import_transaction(transaction, session=session)
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+        self._spreadsheets = {}
+        # values of the written cells, the way they are expected to be evaluated
+        self._values = {}
+        # {spreadsheet_id: {(sheet_id, label): {"value": "=1+2", "note": "Bread"}}}
+        self._pending = defaultdict(dict)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # changes collected before the failure are still written,
+        # the same as if they were sent one by one
+        self.flush()
+        return False
+
+    def _snapshot(self, worksheet):
+        key = (worksheet.spreadsheet.id, worksheet.id)
+        if key not in self._snapshots:
+            self._snapshots[key] = {
+                "values": {},
+                "notes": {},
+                "formulas": {},
+                # (first row, first col, last row, last col) of the read ranges
+                "boxes": [],
+            }
+        return self._snapshots[key]
+
+    def _read_cell(self, worksheet, label):
+        self.read(worksheet, [label])
+        return self._snapshot(worksheet)
+
+    def read(self, worksheet, ranges):
+        """
+        Read the cells of the tab in one request, except for the ones read already.
+
+        :param list ranges: A1 ranges or labels, e.g. ["E14:AI14", "B2"]
+        """
+        snapshot = self._snapshot(worksheet)
+        boxes = {}
+        for a1_range in ranges:
+            box = get_box(a1_range)
+            if not any(is_inside(box, read_box) for read_box in snapshot["boxes"]):
+                boxes[a1_range] = box
+        if not boxes:
+            return
+
+        client = worksheet.spreadsheet.client
+        grid = client.get_grid_snapshot(
+            worksheet, fields=CELL_FIELDS, ranges=list(boxes)
+        )
+        for row, row_values in enumerate(grid["values"], 1):
+            for col, value in enumerate(row_values, 1):
+                if value:
+                    snapshot["values"][coords_to_label(pack_coords(row, col))] = value
+        snapshot["notes"].update(grid["notes"])
+        snapshot["formulas"].update(grid["formulas"])
+        snapshot["boxes"].extend(boxes.values())
+
+    def _get_pending(self, worksheet, label):
+        cells = self._pending.get(worksheet.spreadsheet.id, {})
+        return cells.get((worksheet.id, label), {})
+
+    def _set_pending(self, worksheet, label, **changes):
+        self._spreadsheets[worksheet.spreadsheet.id] = worksheet.spreadsheet
+        cells = self._pending[worksheet.spreadsheet.id]
+        cells.setdefault((worksheet.id, label), {}).update(changes)
+
+    def get_formula(self, worksheet, label):
+        """Return the cell content the way it's entered by user: "=1.23+4.56"."""
+        pending = self._get_pending(worksheet, label)
+        if "value" in pending:
+            return pending["value"]
+        return self._read_cell(worksheet, label)["formulas"].get(label, "")
+
+    def get_value(self, worksheet, label):
+        """
+        Return the formatted value of the cell: "5.79".
+
+        The formulas are not evaluated locally, so for the written cells the
+        value is the one provided in update_value(), or the content itself.
+        """
+        key = (worksheet.spreadsheet.id, worksheet.id, label)
+        if key in self._values:
+            return self._values[key]
+
+        return self._read_cell(worksheet, label)["values"].get(label, "")
+
+    def get_note(self, worksheet, label):
+        pending = self._get_pending(worksheet, label)
+        if "note" in pending:
+            return pending["note"]
+        return self._read_cell(worksheet, label)["notes"].get(label, "")
+
+    def update_value(self, worksheet, label, value, evaluated_value=None):
+        """
+        Set the cell content the way it's entered by user.
+
+        :param str value: "=1.23+4.56", "Bread", "" to clear the cell
+        :param evaluated_value: the value the formula is expected to result in
+        """
+        self._set_pending(worksheet, label, value=value)
+        key = (worksheet.spreadsheet.id, worksheet.id, label)
+        self._values[key] = str(value if evaluated_value is None else evaluated_value)
+
+    def update_note(self, worksheet, label, note):
+        """Replace the note of the cell, empty note removes it."""
+        self._set_pending(worksheet, label, note=note)
+
+    def append_note(self, worksheet, label, note):
+        """Add the note to the existing one of the cell."""
+        existing_note = self.get_note(worksheet, label)
+        note = f"{existing_note}, {note}" if existing_note else note
+        self.update_note(worksheet, label, note)
+
+    def flush(self):
+        """Write all pending changes, one batchUpdate per spreadsheet."""
+        for spreadsheet_id, cells in self._pending.items():
+            if not cells:
+                continue
+
+            requests_payload = []
+            for (sheet_id, label), changes in cells.items():
+                row, col = a1_to_coords(label)
+                cell_data = {}
+                if "value" in changes:
+                    cell_data["userEnteredValue"] = to_user_entered_value(
+                        changes["value"]
+                    )
+                if "note" in changes:
+                    cell_data["note"] = changes["note"]
+                requests_payload.append(
+                    {
+                        "updateCells": {
+                            "range": {
+                                "sheetId": sheet_id,
+                                "startRowIndex": row,
+                                "endRowIndex": row + 1,
+                                "startColumnIndex": col,
+                                "endColumnIndex": col + 1,
+                            },
+                            "rows": [{"values": [cell_data]}],
+                            "fields": ",".join(cell_data),
+                        }
+                    }
+                )
+
+            spreadsheet = self._spreadsheets[spreadsheet_id]
+            spreadsheet.batch_update(body={"requests": requests_payload})
+            self._apply_to_snapshots(spreadsheet_id, cells)
+
+        self._pending.clear()
+
+    def _apply_to_snapshots(self, spreadsheet_id, cells):
+        """Keep already read cells consistent with what has been written."""
+        for (sheet_id, label), changes in cells.items():
+            snapshot = self._snapshots.get((spreadsheet_id, sheet_id))
+            if snapshot is None:
+                continue
+            for field, snapshot_key in (("value", "formulas"), ("note", "notes")):
+                if field not in changes:
+                    continue
+                if changes[field]:
+                    snapshot[snapshot_key][label] = changes[field]
+                else:
+                    snapshot[snapshot_key].pop(label, None)
+
+
+def get_box(a1_range):
+    """
+    Return 0-based coordinates of the corner cells of the range.
+
+    :return tuple: "E14:AI15" ==> (13, 4, 14, 34), "B2" ==> (1, 1, 1, 1)
+    """
+    first, _, last = a1_range.partition(":")
+    return a1_to_coords(first) + a1_to_coords(last or first)
+
+
+def is_inside(box, outer_box):
+    first_row, first_col, last_row, last_col = box
+    outer_first_row, outer_first_col, outer_last_row, outer_last_col = outer_box
+    return (
+        outer_first_row <= first_row
+        and outer_first_col <= first_col
+        and last_row <= outer_last_row
+        and last_col <= outer_last_col
+    )
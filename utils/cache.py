@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from config import RESPONSE_CACHE_FILE, RESPONSE_CACHE_MAX_SIZE
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of API responses for unchanged spreadsheets.
+
+    Every entry is stored along with the version of the spreadsheet it was
+    read from, so it's served only while the spreadsheet stays the same.
+    The least recently used entries are evicted when the total size of
+    the cache exceeds `max_size` bytes.
+    """
+
+    def __init__(
+        self,
+        path=RESPONSE_CACHE_FILE,
+        max_size=RESPONSE_CACHE_MAX_SIZE,
+        clock=time.time,
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.enabled = True
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "spreadsheet_id TEXT, key TEXT, version TEXT, content BLOB, "
+                "size INTEGER, accessed REAL, PRIMARY KEY (spreadsheet_id, key))"
+            )
+        return self._connection
+
+    def get(self, spreadsheet_id, version, key):
+        """Return cached content (bytes) if it was read from the same version, else None."""
+        with self._lock, self.connection as connection:
+            row = connection.execute(
+                "SELECT version, content FROM responses WHERE spreadsheet_id=? AND key=?",
+                (spreadsheet_id, key),
+            ).fetchone()
+            if row is None:
+                return None
+
+            cached_version, content = row
+            if cached_version != version:
+                connection.execute(
+                    "DELETE FROM responses WHERE spreadsheet_id=? AND key=?",
+                    (spreadsheet_id, key),
+                )
+                return None
+
+            connection.execute(
+                "UPDATE responses SET accessed=? WHERE spreadsheet_id=? AND key=?",
+                (self._clock(), spreadsheet_id, key),
+            )
+        return zlib.decompress(content)
+
+    def set(self, spreadsheet_id, version, key, content):
+        compressed = zlib.compress(content)
+        with self._lock, self.connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    spreadsheet_id,
+                    key,
+                    version,
+                    compressed,
+                    len(compressed),
+                    self._clock(),
+                ),
+            )
+            self._evict(connection)
+
+    def _evict(self, connection):
+        """Delete the least recently used entries until the cache fits max_size."""
+        (total_size,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total_size <= self.max_size:
+            return
+
+        rows = connection.execute(
+            "SELECT spreadsheet_id, key, size FROM responses ORDER BY accessed"
+        ).fetchall()
+        for spreadsheet_id, key, size in rows:
+            if total_size <= self.max_size:
+                break
+            connection.execute(
+                "DELETE FROM responses WHERE spreadsheet_id=? AND key=?",
+                (spreadsheet_id, key),
+            )
+            total_size -= size
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,148 @@
+import base64
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from requests.structures import CaseInsensitiveDict
+
+RECORD = "record"
+REPLAY = "replay"
+
+# response headers kept in the cassette, the rest don't affect the client
+RECORDED_HEADERS = ("Content-Type", "Retry-After")
+
+
+class CassetteMissError(RequestException):
+    """The request was not recorded in the cassette being replayed."""
+
+
+class Cassette:
+    """
+    Gzipped file of HTTP interactions, one JSON line per request.
+
+    In record mode every request sent over CassetteAdapter is saved along
+    with its response and latency. In replay mode the responses are served
+    from the file instead of the network: the same requests are answered
+    in the recorded order, and the latency is reproduced scaled by
+    `latency_scale` (0 answers right away).
+    """
+
+    def __init__(self):
+        self.mode = None
+        self.path = None
+        self.latency_scale = 1.0
+        self._lock = threading.Lock()
+        self._file = None
+        self._interactions = defaultdict(deque)
+
+    def record(self, path):
+        self.mode, self.path = RECORD, path
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    def replay(self, path, latency_scale=1.0):
+        self.mode, self.path = REPLAY, path
+        self.latency_scale = latency_scale
+        self._interactions.clear()
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                interaction = json.loads(line)
+                key = self._get_key(
+                    interaction["method"], interaction["url"], interaction["body"]
+                )
+                self._interactions[key].append(interaction)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @staticmethod
+    def _get_key(method, url, body):
+        return method.upper(), url, body or ""
+
+    @staticmethod
+    def _get_body(request):
+        body = request.body or ""
+        return body.decode("utf-8") if isinstance(body, bytes) else body
+
+    def save(self, request, response, latency):
+        interaction = {
+            "method": request.method,
+            "url": request.url,
+            "body": self._get_body(request),
+            "status": response.status_code,
+            "headers": {
+                name: response.headers[name]
+                for name in RECORDED_HEADERS
+                if name in response.headers
+            },
+            "content": base64.b64encode(response.content).decode("ascii"),
+            "latency": latency,
+        }
+        with self._lock:
+            self._file.write(json.dumps(interaction) + "\n")
+            self._file.flush()
+
+    def play(self, request):
+        """
+        Return the recorded interaction for the request.
+
+        Repeated requests get the recorded responses one by one, the last
+        one is repeated once they run out.
+        """
+        key = self._get_key(request.method, request.url, self._get_body(request))
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                raise CassetteMissError(
+                    f"{request.method} {request.url} is not recorded in {self.path}",
+                    request=request,
+                )
+            return interactions.popleft() if len(interactions) > 1 else interactions[0]
+
+
+class CassetteAdapter(HTTPAdapter):
+    """HTTP adapter recording or replaying the requests if the cassette is on."""
+
+    def __init__(self, cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == REPLAY:
+            interaction = self.cassette.play(request)
+            time.sleep(interaction["latency"] * self.cassette.latency_scale)
+            return self._build_replayed_response(request, interaction)
+
+        started = time.monotonic()
+        response = super().send(request, **kwargs)
+        if self.cassette.mode == RECORD:
+            self.cassette.save(request, response, time.monotonic() - started)
+        return response
+
+    def _build_replayed_response(self, request, interaction):
+        response = Response()
+        response.status_code = interaction["status"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response._content = base64.b64decode(interaction["content"])
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+
+class ReplayCredentials:
+    """Credentials which never expire, for the runs not reaching Google."""
+
+    access_token = "replay"
+    access_token_expired = False
+
+
+cassette = Cassette()
@@ -1,7 +1,9 @@
-from decimal import Decimal, InvalidOperation
+from functools import lru_cache
 
 from gspread.utils import a1_to_rowcol, rowcol_to_a1
 
+from utils.money import Money
+
 
 def a1_to_coords(label):
     """
@@ -16,12 +18,77 @@ def a1_to_coords(label):
     return row, col
 
 
-def price_to_decimal(value, worksheet_title=None, label=None):
-    if "," in value and "." in value:
-        value = value.replace(",", "")
+# Cells are addressed internally by packed coordinates: 1-based row and column
+# in one int, so that sorting them orders cells top-to-bottom, left-to-right.
+COL_BITS = 16
+COL_MASK = (1 << COL_BITS) - 1
+
+
+def pack_coords(row, col):
+    """
+    Pack 1-based row and column into one int.
+
+    :return int: (2, 3) ==> 131075
+    """
+    return row << COL_BITS | col
+
+
+def unpack_coords(coords):
+    """
+    Unpack the coordinates into 1-based row and column.
+
+    :return tuple: 131075 ==> (2, 3)
+    """
+    return coords >> COL_BITS, coords & COL_MASK
+
+
+@lru_cache(maxsize=None)
+def label_to_coords(label):
+    """Convert A1 label into packed coordinates: "C2" ==> pack_coords(2, 3)"""
+    return pack_coords(*a1_to_rowcol(label))
+
+
+@lru_cache(maxsize=None)
+def coords_to_label(coords):
+    """Convert packed coordinates into A1 label: pack_coords(2, 3) ==> "C2" """
+    return rowcol_to_a1(*unpack_coords(coords))
+
+
+@lru_cache(maxsize=None)
+def get_column_number(letter):
+    """
+    Convert column letter to its 1-based number.
+
+    :return int: "A" ==> 1, "AB" ==> 28
+    """
+    _, col = a1_to_rowcol(f"{letter}1")
+    return col
+
+
+def get_column_letter(col):
+    """
+    Convert 1-based column number to its letter.
+
+    :return str: 1 ==> "A", 28 ==> "AB"
+    """
+    return rowcol_to_a1(1, col)[:-1]
+
+
+def split_label(label):
+    """
+    Split A1 label into column letter and row number.
+
+    :return tuple: "B12" ==> ("B", 12)
+    """
+    column = label.rstrip("0123456789")
+    return column, int(label[len(column) :])
+
+
+def price_to_money(value, worksheet_title=None, label=None):
+    """Parse the price from the cell value: "1,234.56" ==> Money("1234.56")"""
     try:
-        return Decimal(value)
-    except (TypeError, InvalidOperation):
+        return Money.parse(value)
+    except (AttributeError, ValueError):
         if worksheet_title:
             msg = f"Error converting '{value}' to number in worksheet '{worksheet_title}', cell {label}"
         else:
@@ -35,14 +102,4 @@ def get_earliest_label(*labels):
     if not labels:
         raise ValueError("At least one non-empty label must be provided.")
 
-    if len(labels) == 1:
-        return labels[0]
-
-    coords = [a1_to_rowcol(label) for label in labels]
-    min_row = min(row for row, _ in coords)
-    earliest_row = [(row, col) for row, col in coords if row == min_row]
-
-    min_col = min(col for _, col in earliest_row)
-    earliest = [(row, col) for row, col in earliest_row if col == min_col][0]
-    earliest_label = rowcol_to_a1(*earliest)
-    return earliest_label
+    return min(labels, key=label_to_coords)
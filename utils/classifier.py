@@ -0,0 +1,108 @@
+import os
+from collections import deque
+
+import toml
+
+from utils.constants import CellType
+
+
+class KeywordClassifier:
+    """
+    Finds the categories of a text by the keywords it contains.
+
+    All keywords are compiled into an Aho-Corasick automaton, so the text is
+    scanned once regardless of the number of keywords, and keywords inside
+    other keywords ("-MART" in "WAL-MART") are found too.
+
+        classifier = KeywordClassifier({CellType.GASOLINE: {"SHELL", "ESSO"}, ...})
+        classifier.classify("POS SHELL C00123") ==> [CellType.GASOLINE]
+    """
+
+    def __init__(self, mapping):
+        """:param dict mapping: {CellType.GROCERY: {"FOOD", "METRO", ...}, ...}"""
+        # the categories are returned in the order of the mapping
+        self._order = {category: i for i, category in enumerate(mapping)}
+        self._goto = [{}]
+        self._outputs = [set()]
+        for category, words in mapping.items():
+            for word in words:
+                self._add_word(word.upper(), category)
+        self._fail = self._build_fail_links()
+        self._cache = {}
+
+    def _add_word(self, word, category):
+        state = 0
+        for char in word:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._outputs.append(set())
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._outputs[state].add(category)
+
+    def _build_fail_links(self):
+        """Link each state to the longest suffix state, merging their outputs."""
+        fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = self._goto[fallback].get(char, 0)
+                self._outputs[next_state] |= self._outputs[fail[next_state]]
+        return fail
+
+    def classify(self, text):
+        """
+        Return the categories of all keywords found in the text, each one once.
+
+        :return list: [CellType.GROCERY, CellType.TAKEOUTS]
+        """
+        result = self._cache.get(text)
+        if result is not None:
+            return result
+
+        found, state = set(), 0
+        for char in text.upper():
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            found |= self._outputs[state]
+
+        result = sorted(found, key=self._order.get)
+        self._cache[text] = result
+        return result
+
+    def classify_many(self, texts):
+        """
+        Classify many texts at once, each distinct text is scanned once.
+
+        :return dict: {"POS SHELL C00123": [CellType.GASOLINE], ...}
+        """
+        return {text: self.classify(text) for text in set(texts)}
+
+
+def load_keyword_rules(path):
+    """
+    Read extra keywords of categories from the TOML file, if it exists.
+
+        GROCERY = ["FARM BOY", "T&T"]
+        TAKEOUTS = ["PIZZA"]
+
+    :return dict: {CellType.GROCERY: {"FARM BOY", "T&T"}, ...}
+    :raise ValueError: if the category is unknown
+    """
+    if not path or not os.path.exists(path):
+        return {}
+
+    result = {}
+    for name, words in toml.load(path).items():
+        try:
+            category = CellType[name.upper()]
+        except KeyError:
+            raise ValueError(f"Unknown category '{name}' in {path}")
+        result[category] = {str(word).upper() for word in words}
+    return result
@@ -2,10 +2,12 @@ from decimal import Decimal
 from enum import Enum
 
 import click
+from attr import asdict
 
+from config import COLOR_TOLERANCE
 from models.base import Color
 
-HST = Decimal(0.13)
+HST = Decimal("0.13")
 
 RESULT_OK = click.style("OK. ", fg="green")
 RESULT_WARNING = click.style("WARNING: {}", fg="yellow")
@@ -97,3 +99,70 @@ GOODS_TYPES = (
     CellType.DENTAL_VISION,
     CellType.OTHER,
 )
+
+
+def quantize_color(color):
+    """
+    Return the color as a tuple of 8-bit components.
+
+    Sheets API omits zero components, so they are optional in the dict.
+
+    :param color: Color or dict {"red": 1, "green": 0.9490196, "blue": 0.8}
+    :return tuple: (255, 242, 204)
+    """
+    if isinstance(color, Color):
+        color = asdict(color)
+    return tuple(
+        round(color.get(component, 0) * 255) for component in ("red", "green", "blue")
+    )
+
+
+CELL_TYPES_BY_COLOR = {
+    quantize_color(cell_type.value): cell_type
+    for cell_type in CellType
+    if cell_type.value is not None
+}
+
+# CellTypes of the colors not found in CELL_TYPES_BY_COLOR: {((r, g, b), tolerance): CellType}
+_nearest_cell_types = {}
+
+
+def get_cell_type(color, tolerance=COLOR_TOLERANCE):
+    """
+    Recognize the CellType by the cell background color.
+
+    The exact palette colors are found right away, other colors are matched
+    to the nearest palette color within the tolerance (the result is cached).
+
+    :param color: Color, dict like in Sheets API or None for cells without color
+    :return CellType: CellType.REGULAR for cells without color,
+        None if the color is not in the palette
+    """
+    if not color:
+        return CellType.REGULAR
+
+    key = quantize_color(color)
+    cell_type = CELL_TYPES_BY_COLOR.get(key)
+    if cell_type is not None:
+        return cell_type
+
+    cache_key = key, tolerance
+    if cache_key not in _nearest_cell_types:
+        distance, palette_key = min(
+            (max(abs(a - b) for a, b in zip(key, palette_key)), palette_key)
+            for palette_key in CELL_TYPES_BY_COLOR
+        )
+        _nearest_cell_types[cache_key] = (
+            CELL_TYPES_BY_COLOR[palette_key] if distance <= tolerance * 255 else None
+        )
+    return _nearest_cell_types[cache_key]
+
+
+def get_cell_types(colors, tolerance=COLOR_TOLERANCE):
+    """
+    Recognize CellTypes of a column of colors in one pass.
+
+    :param list colors: [None, {"red": 1, "green": 0.9490196, "blue": 0.8}, ...]
+    :return list: [CellType.REGULAR, CellType.GROCERY, ...]
+    """
+    return [get_cell_type(color, tolerance) for color in colors]
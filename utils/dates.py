@@ -0,0 +1,180 @@
+import calendar
+import datetime
+import re
+from functools import lru_cache
+
+from attr import dataclass
+from dateutil import parser
+
+YEAR_PATTERN = re.compile(r"^\s*(\d{4})\s*$")
+YEAR_MONTH_PATTERN = re.compile(r"^\s*(\d{4})-(\d{1,2})\s*$")
+MONTH_NAMES = {
+    name.lower(): month
+    for month in range(1, 13)
+    for name in (calendar.month_name[month], calendar.month_abbr[month])
+}
+MONTH_NAMES["sept"] = 9
+MONTH_NAME_PATTERN = re.compile(
+    rf"^\s*({'|'.join(MONTH_NAMES)})\.?(?:[\s,]+(\d{{4}}))?\s*$", re.IGNORECASE
+)
+# 2018/08/01, 22.11.2017, 18-08-07: the same separator between the numbers
+NUMERIC_DATE_PATTERN = re.compile(
+    r"(?<!\d)(\d{1,4})([/.\-\\])(\d{1,2})\2(\d{1,4})(?!\d)"
+)
+
+# formats of dates in the cells tried one by one, in this order
+CELL_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+    "%d.%m.%Y",
+    "%b %d, %Y",
+    "%d %b %Y",
+    "%B %d, %Y",
+)
+
+# orders of day, month and year in numeric dates tried one by one (as dateutil does)
+YMD, MDY, DMY = (0, 1, 2), (2, 0, 1), (2, 1, 0)
+
+
+@dataclass(frozen=True)
+class TitleDate:
+    """
+    Date found in a tab title or a filename, day or month may be missing.
+
+    If the numbers in the title can be read in several ways, e.g. "05.11.2017"
+    is May 11 or November 5, the other valid readings are in `alternatives`.
+    """
+
+    year: int = None
+    month: int = None
+    day: int = None
+    alternatives: tuple = ()
+
+    @property
+    def ambiguous(self):
+        return bool(self.alternatives)
+
+    @property
+    def date(self):
+        if None in (self.year, self.month, self.day):
+            raise ValueError(f"{self} is not a full date")
+        return datetime.date(self.year, self.month, self.day)
+
+    @property
+    def readings(self):
+        """All valid readings, the preferred one goes first."""
+        return (self,) + self.alternatives
+
+
+def _get_orders(first, last, dayfirst, yearfirst):
+    if len(first) == 4:
+        return (YMD,)
+    if len(last) == 4:
+        return (DMY, MDY) if dayfirst else (MDY, DMY)
+    if yearfirst:
+        return (YMD, DMY, MDY) if dayfirst else (YMD, MDY, DMY)
+    return (DMY, MDY, YMD) if dayfirst else (MDY, DMY, YMD)
+
+
+def _read_numeric_date(numbers, dayfirst, yearfirst):
+    """
+    Return all valid readings of three numbers, in the order of preference.
+
+    :return list: ("18", "08", "07") ==> [TitleDate(2007, 8, 18), TitleDate(2018, 8, 7)]
+    """
+    readings = []
+    for order in _get_orders(numbers[0], numbers[2], dayfirst, yearfirst):
+        year, month, day = (int(numbers[i]) for i in order)
+        if len(numbers[order[0]]) <= 2:
+            year += 2000
+        if not 1 <= month <= 12 or not 1 <= day <= calendar.monthrange(year, month)[1]:
+            continue
+        reading = TitleDate(year=year, month=month, day=day)
+        if reading not in readings:
+            readings.append(reading)
+    return readings
+
+
+@lru_cache(maxsize=None)
+def _parse_title_date(string, dayfirst, yearfirst, fuzzy):
+    match = YEAR_PATTERN.match(string)
+    if match:
+        return TitleDate(year=int(match[1]))
+
+    match = YEAR_MONTH_PATTERN.match(string)
+    if match and 1 <= int(match[2]) <= 12:
+        return TitleDate(year=int(match[1]), month=int(match[2]))
+
+    match = MONTH_NAME_PATTERN.match(string)
+    if match:
+        return TitleDate(
+            year=match[2] and int(match[2]), month=MONTH_NAMES[match[1].lower()]
+        )
+
+    match = NUMERIC_DATE_PATTERN.search(string)
+    if match:
+        readings = _read_numeric_date(match.group(1, 3, 4), dayfirst, yearfirst)
+        if readings:
+            first, *alternatives = readings
+            return TitleDate(
+                year=first.year,
+                month=first.month,
+                day=first.day,
+                alternatives=tuple(alternatives),
+            )
+
+    try:
+        result = parser.parse(
+            string, dayfirst=dayfirst, yearfirst=yearfirst, fuzzy=fuzzy
+        )
+    except (ValueError, OverflowError):
+        return None
+    return TitleDate(year=result.year, month=result.month, day=result.day)
+
+
+def parse_title_date(string, dayfirst=False, yearfirst=False, fuzzy=False):
+    """
+    Parse the date in the tab title or the filename.
+
+    The formats in use are recognized by the precompiled patterns, anything
+    else is parsed by dateutil. The results are cached per string.
+        "2019-01" ==> TitleDate(year=2019, month=1)
+        "January" ==> TitleDate(month=1)
+        "Copy of 2018/08/01 PM" ==> TitleDate(year=2018, month=8, day=1)
+        "05.11.2017" ==> TitleDate(year=2017, month=5, day=11, alternatives=(TitleDate(2017, 11, 5),))
+
+    :param bool dayfirst: prefer reading numbers as day before month
+    :param bool yearfirst: prefer reading 2-digit numbers as year first
+    :param bool fuzzy: let dateutil skip the unknown words
+    :return TitleDate:
+    """
+    result = _parse_title_date(string, dayfirst, yearfirst, fuzzy)
+    if result is None:
+        raise ValueError(f"Date not found in '{string}'")
+    return result
+
+
+@lru_cache(maxsize=None)
+def parse_cell_date(value):
+    """
+    Parse the date in the cell: "2019-01-05", "01/05/2019", "Jan 5, 2019" ==> date(2019, 1, 5)
+
+    The formats are tried one by one in the same order for every value, so
+    ambiguous dates are always read month first. Values of no known format
+    are parsed by dateutil.
+
+    :raise ValueError: if the value is not a date
+    """
+    value = value.strip()
+    for date_format in CELL_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+
+    try:
+        return parser.parse(value).date()
+    except OverflowError:
+        raise ValueError(f"Date not found in '{value}'")
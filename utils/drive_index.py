@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+import time
+
+from config import SPREADSHEET_INDEX_FILE, SPREADSHEET_INDEX_TTL
+
+
+class SpreadsheetIndex:
+    """
+    Map of spreadsheet names to their IDs built from the Drive file listing.
+
+    The index is persisted to a local file, so the listing is reused across
+    runs while it is fresher than `ttl` seconds.
+    """
+
+    def __init__(
+        self, path=SPREADSHEET_INDEX_FILE, ttl=SPREADSHEET_INDEX_TTL, clock=time.time
+    ):
+        self.path = path
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._files = None
+        # {name: id} of the files, the first one listed for duplicate names
+        self._ids = {}
+        self._updated = 0
+
+    @property
+    def is_fresh(self):
+        self._load()
+        return self._files is not None and self._clock() - self._updated < self.ttl
+
+    @property
+    def files(self):
+        """
+        Return the indexed files in the order Drive listed them.
+
+        :return list: [{"id": "1BxiM...", "name": "2019-01"}, ...]
+        """
+        self._load()
+        return list(self._files or [])
+
+    def get_id(self, name):
+        """Return ID of the first spreadsheet with such name, None if it's unknown or stale."""
+        if not self.is_fresh:
+            return None
+        return self._ids.get(name)
+
+    def update(self, files):
+        """Replace the index with a fresh Drive listing and persist it."""
+        with self._lock:
+            self._files = [{"id": file["id"], "name": file["name"]} for file in files]
+            self._ids = get_ids(self._files)
+            self._updated = self._clock()
+            self._save()
+
+    def _load(self):
+        with self._lock:
+            if self._files is not None or not self.path:
+                return
+            try:
+                with open(self.path) as f:
+                    content = json.load(f)
+                self._files = content["files"]
+                self._ids = get_ids(self._files)
+                self._updated = content["updated"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump({"updated": self._updated, "files": self._files}, f)
+
+
+def get_ids(files):
+    """
+    Map the names of the files to their IDs, the first file wins for duplicate names.
+
+    :return dict: {"2019-01": "1BxiM...", ...}
+    """
+    ids = {}
+    for file in files:
+        ids.setdefault(file["name"], file["id"])
+    return ids
@@ -0,0 +1,81 @@
+import datetime
+from collections import defaultdict
+
+from attr import dataclass
+
+from utils.money import Money
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """
+    Content of a receipt compared with other ones when looking for duplicates.
+
+    The purchase lines are compared by the hash of their prices, since the prices
+    survive re-scanning of the same receipt better than the recognized names.
+    """
+
+    book: str
+    tab: str
+    store: str
+    # None if the tab title doesn't tell the date
+    date: datetime.date
+    # the amount actually paid, or the total if unknown
+    amount: Money
+    lines: int
+
+    @staticmethod
+    def hash_lines(prices):
+        """Return the same hash for the same prices in any order."""
+        return hash(tuple(sorted(price.cents for price in prices)))
+
+
+def is_duplicate(a, b, days, tolerance):
+    """
+    Return True if the fingerprints likely belong to the same receipt.
+
+    Both must be from the same store, with amounts differing by up to `tolerance`
+    and dates by up to `days`. If a date is unknown, the purchase lines must match.
+    """
+    if a.store != b.store or abs(a.amount - b.amount) > tolerance:
+        return False
+    if a.date and b.date:
+        return abs((a.date - b.date).days) <= days
+    return a.lines == b.lines
+
+
+def find_clusters(fingerprints, days=1, tolerance=Money()):
+    """
+    Group the fingerprints of likely duplicate receipts.
+
+    The fingerprints are indexed in buckets by store and amount, a bucket spans
+    `tolerance` + 1 cent, so each fingerprint is compared only with the ones
+    in its own and two neighbouring buckets instead of all others.
+
+    :param int days: max difference of dates of duplicates
+    :param Money tolerance: max difference of amounts of duplicates
+    :return list: groups of 2+ fingerprints, in the order of their first members
+        [[Fingerprint(book="2019-01", tab="31", ...), Fingerprint(book="2019-02", tab="01", ...)], ...]
+    """
+    width = tolerance.cents + 1
+    buckets = defaultdict(list)
+    parents = list(range(len(fingerprints)))
+
+    def find_root(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    for i, fingerprint in enumerate(fingerprints):
+        bucket = fingerprint.amount.cents // width
+        for neighbour in (bucket - 1, bucket, bucket + 1):
+            for j in buckets.get((fingerprint.store, neighbour), ()):
+                if is_duplicate(fingerprints[j], fingerprint, days, tolerance):
+                    parents[find_root(i)] = find_root(j)
+        buckets[(fingerprint.store, bucket)].append(i)
+
+    clusters = defaultdict(list)
+    for i, fingerprint in enumerate(fingerprints):
+        clusters[find_root(i)].append(fingerprint)
+    return [cluster for cluster in clusters.values() if len(cluster) > 1]
@@ -0,0 +1,141 @@
+import operator
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from fractions import Fraction
+from functools import total_ordering
+
+AMOUNT_PATTERN = re.compile(r"^(-?)(\d*)(?:\.(\d{0,2}))?$")
+CENT = Decimal("0.01")
+
+
+@total_ordering
+class Money:
+    """
+    Amount of money stored as integer number of cents.
+
+    Sums, differences and comparisons are exact integer operations. Plain
+    numbers (int, Decimal) are treated as amounts in dollars, so that
+    `price > 50` or `sum(prices)` work as with Decimal prices.
+
+        Money.parse("1,234.5") ==> Money("1234.50")
+    """
+
+    __slots__ = ("cents",)
+
+    def __init__(self, cents=0):
+        self.cents = cents
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Parse the amount from the sheet cell value: "3.45", "-1,234.56", "7".
+
+        Values with more than 2 decimal digits are rounded half up.
+        """
+        value = value.strip()
+        if "," in value and "." in value:
+            value = value.replace(",", "")
+
+        match = AMOUNT_PATTERN.match(value)
+        if match and (match.group(2) or match.group(3)):
+            sign, dollars, cents = match.groups()
+            amount = int(dollars or 0) * 100 + int((cents or "").ljust(2, "0"))
+            return cls(-amount if sign else amount)
+
+        try:
+            return cls.from_number(Decimal(value))
+        except InvalidOperation:
+            raise ValueError(f"Error converting '{value}' to number")
+
+    @classmethod
+    def from_number(cls, number):
+        """Convert int, Decimal or float amount in dollars, rounding to cents."""
+        if isinstance(number, Money):
+            return number
+        if isinstance(number, int):
+            return cls(number * 100)
+        if isinstance(number, float):
+            number = Decimal(repr(number))
+        if not isinstance(number, Decimal) or not number.is_finite():
+            raise ValueError(f"Error converting '{number}' to number")
+        return cls(int((number * 100).quantize(1, rounding=ROUND_HALF_UP)))
+
+    def to_decimal(self):
+        return Decimal(self.cents) * CENT
+
+    @staticmethod
+    def _get_cents(other):
+        if isinstance(other, Money):
+            return other.cents
+        if isinstance(other, (int, Decimal, float)):
+            return Money.from_number(other).cents
+        return None
+
+    def __add__(self, other):
+        cents = self._get_cents(other)
+        return NotImplemented if cents is None else Money(self.cents + cents)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        cents = self._get_cents(other)
+        return NotImplemented if cents is None else Money(self.cents - cents)
+
+    def __rsub__(self, other):
+        cents = self._get_cents(other)
+        return NotImplemented if cents is None else Money(cents - self.cents)
+
+    def __mul__(self, other):
+        """Multiply by a number (e.g. a tax rate), rounding half up to cents."""
+        if not isinstance(other, (int, Decimal)):
+            return NotImplemented
+        return Money.from_number(self.to_decimal() * other)
+
+    __rmul__ = __mul__
+
+    def __mod__(self, other):
+        cents = self._get_cents(other)
+        return NotImplemented if cents is None else Money(self.cents % cents)
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    def __abs__(self):
+        return Money(abs(self.cents))
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def _compare(self, other, compare):
+        if isinstance(other, Money):
+            return compare(self.cents, other.cents)
+        if isinstance(other, int):
+            return compare(self.cents, other * 100)
+        if isinstance(other, Decimal):
+            return compare(self.to_decimal(), other)
+        if isinstance(other, float):
+            return compare(float(self), other)
+        return NotImplemented
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+
+    def __hash__(self):
+        # equal to the hash of the same amount as int or Decimal
+        if self.cents % 100 == 0:
+            return hash(self.cents // 100)
+        return hash(Fraction(self.cents, 100))
+
+    def __float__(self):
+        return self.cents / 100
+
+    def __str__(self):
+        sign = "-" if self.cents < 0 else ""
+        dollars, cents = divmod(abs(self.cents), 100)
+        return f"{sign}{dollars}.{cents:02d}"
+
+    def __repr__(self):
+        return f"Money('{self}')"
@@ -1,7 +1,7 @@
 import re
 from string import ascii_letters
 
-from dateutil import parser
+from utils.dates import parse_title_date
 
 DATE_PATTERN = re.compile(r"(\d{2,4}|[\/.\-\\])+")
 
@@ -45,19 +45,24 @@ def get_normalized_title(tab_title, filename, names_registry=None):
         raise ValueError(f"The tab '{tab_title}' is normalized already.")
 
     file_year = filename[2:4]
-    file_date = parser.parse(filename, yearfirst=True)
+    file_date = parse_title_date(filename, yearfirst=True)
 
     year_first = not match_date.endswith(file_year)
-    tab_date = parser.parse(match_date, yearfirst=year_first, fuzzy=True)
-
-    if file_date.year != tab_date.year or file_date.month != tab_date.month:
-        err = f"The date in the tab '{tab_title}' does not correspond to the file name '{filename}'."
-        if not year_first:
-            tab_date = parser.parse(match_date, dayfirst=True, fuzzy=True)
-            if file_date.year != tab_date.year or file_date.month != tab_date.month:
-                raise ValueError(err)
-        else:
-            raise ValueError(err)
+    tab_date = parse_title_date(match_date, yearfirst=year_first, fuzzy=True)
+
+    # ambiguous dates are taken in the reading which matches the file name
+    tab_date = next(
+        (
+            reading
+            for reading in tab_date.readings
+            if (reading.year, reading.month) == (file_date.year, file_date.month)
+        ),
+        None,
+    )
+    if tab_date is None:
+        raise ValueError(
+            f"The date in the tab '{tab_title}' does not correspond to the file name '{filename}'."
+        )
 
     normalized_title = "{:02d}".format(tab_date.day)
     if names_registry:
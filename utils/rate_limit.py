@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from config import (
+    BACKOFF_BASE,
+    BACKOFF_MAX,
+    QUOTA_PERIOD,
+    READ_QUOTA,
+    WRITE_QUOTA,
+)
+
+READ = "read"
+WRITE = "write"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket that allows `capacity` requests per `period` seconds.
+
+    The bucket starts full, so short bursts are not delayed at all, and
+    is refilled continuously at a rate of capacity/period tokens per second.
+    """
+
+    def __init__(self, capacity, period, clock=time.monotonic, sleep=time.sleep):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """
+        Take one token and return the number of seconds to wait before using it.
+
+        The balance may go negative - that's how concurrent callers queue up
+        for the tokens which are not refilled yet.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until a token is available, return the time spent waiting."""
+        delay = self.reserve()
+        if delay:
+            self._sleep(delay)
+        return delay
+
+    def drain(self):
+        """Empty the bucket, e.g. when API responded that the quota is exceeded."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0)
+
+
+class RateLimiter:
+    """Separate token buckets for read and write requests sharing the quota period."""
+
+    def __init__(
+        self,
+        read_quota=READ_QUOTA,
+        write_quota=WRITE_QUOTA,
+        period=QUOTA_PERIOD,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.buckets = {
+            READ: TokenBucket(read_quota, period, clock=clock, sleep=sleep),
+            WRITE: TokenBucket(write_quota, period, clock=clock, sleep=sleep),
+        }
+
+    @staticmethod
+    def get_kind(method):
+        return READ if method.lower() == "get" else WRITE
+
+    def acquire(self, kind):
+        return self.buckets[kind].acquire()
+
+    def drain(self, kind):
+        self.buckets[kind].drain()
+
+
+def get_retry_delay(response, attempt):
+    """
+    Return the number of seconds to wait before retrying the failed request.
+
+    `Retry-After` header is honored if the response has it (both seconds and
+    HTTP-date formats), otherwise the delay grows exponentially with the attempt.
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    return delay + random.uniform(0, BACKOFF_BASE)
+
+
+rate_limiter = RateLimiter()
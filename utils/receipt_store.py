@@ -0,0 +1,69 @@
+import json
+import os
+import sqlite3
+import threading
+
+from config import RECEIPT_STORE_FILE
+
+
+class ReceiptStore:
+    """
+    SQLite-backed store of parsed receipts (see Receipt.to_snapshot).
+
+    Receipts are stored by the spreadsheet and sheet IDs along with the
+    version of the spreadsheet they were parsed from. Once the spreadsheet
+    is changed, all its receipts are dropped on the next read.
+    """
+
+    def __init__(self, path=RECEIPT_STORE_FILE):
+        self.path = path
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS receipts ("
+                "spreadsheet_id TEXT, sheet_id INTEGER, version TEXT, data TEXT, "
+                "PRIMARY KEY (spreadsheet_id, sheet_id))"
+            )
+        return self._connection
+
+    def get(self, spreadsheet_id, version):
+        """
+        Return the receipts parsed from the same version of the spreadsheet.
+
+        :return dict: {sheet_id: <Receipt.to_snapshot() result>, ...}
+        """
+        with self._lock, self.connection as connection:
+            connection.execute(
+                "DELETE FROM receipts WHERE spreadsheet_id=? AND version!=?",
+                (spreadsheet_id, version),
+            )
+            rows = connection.execute(
+                "SELECT sheet_id, data FROM receipts WHERE spreadsheet_id=?",
+                (spreadsheet_id,),
+            ).fetchall()
+        return {sheet_id: json.loads(data) for sheet_id, data in rows}
+
+    def set(self, spreadsheet_id, version, snapshots):
+        """
+        :param dict snapshots: {sheet_id: <Receipt.to_snapshot() result>, ...}
+        """
+        with self._lock, self.connection as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO receipts VALUES (?, ?, ?, ?)",
+                [
+                    (spreadsheet_id, sheet_id, version, json.dumps(snapshot))
+                    for sheet_id, snapshot in snapshots.items()
+                ],
+            )
+
+
+receipt_store = ReceiptStore()
@@ -0,0 +1,110 @@
+import json
+import math
+import threading
+from collections import defaultdict
+
+from attr import asdict, dataclass
+
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+
+
+@dataclass
+class ApiCall:
+    """One call of QuotaCompliantClient.request()."""
+
+    method: str
+    endpoint_kind: str
+    url: str
+    status: int
+    sent_bytes: int
+    received_bytes: int
+    latency: float
+    retries: int
+    throttled: float
+    cached: bool = False
+
+
+def get_endpoint_kind(method, url):
+    """
+    Classify the API endpoint of the request.
+
+    :return str: "values", "get", "batchUpdate", "copyTo",
+        "drive list", "drive get" or "other"
+    """
+    path = url.split("?")[0]
+    if path.endswith(":copyTo"):
+        return "copyTo"
+    if path.endswith(":batchUpdate"):
+        return "batchUpdate"
+    if "/values" in path:
+        return "values"
+    if path == DRIVE_FILES_URL:
+        return "drive list"
+    if path.startswith(DRIVE_FILES_URL):
+        return "drive get"
+    if "/spreadsheets/" in path and method.lower() == "get":
+        return "get"
+    return "other"
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of the values."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class ApiStats:
+    """
+    Collects all API calls made by the process.
+
+    If `trace_file` is set, each call is also written there as a JSON line
+    right when it's recorded.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.trace_file = None
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        with self._lock:
+            self.calls.append(call)
+            if self.trace_file is not None:
+                self.trace_file.write(json.dumps(asdict(call)) + "\n")
+
+    def summary(self):
+        """Return a human readable report of the API usage."""
+        with self._lock:
+            calls = list(self.calls)
+
+        by_kind = defaultdict(list)
+        for call in calls:
+            by_kind[call.endpoint_kind].append(call)
+
+        cached = sum(1 for call in calls if call.cached)
+        lines = [
+            f"API calls: {len(calls) - cached} sent, {cached} served from cache",
+            f"{'endpoint':<12} {'calls':>6} {'cached':>6} {'retries':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8}",
+        ]
+        for kind, kind_calls in sorted(by_kind.items()):
+            latencies = [call.latency * 1000 for call in kind_calls if not call.cached]
+            lines.append(
+                f"{kind:<12} {len(kind_calls):>6} "
+                f"{sum(1 for call in kind_calls if call.cached):>6} "
+                f"{sum(call.retries for call in kind_calls):>7} "
+                f"{percentile(latencies, 50):>8.0f} {percentile(latencies, 95):>8.0f}"
+            )
+
+        throttled = sum(call.throttled for call in calls)
+        sent = sum(call.sent_bytes for call in calls) / 1024
+        received = sum(call.received_bytes for call in calls) / 1024
+        lines.append(f"Time spent rate-limited: {throttled:.1f} s")
+        lines.append(f"Transferred: {sent:.1f} KB sent, {received:.1f} KB received")
+        return "\n".join(lines)
+
+
+api_stats = ApiStats()